@@ -32,6 +32,61 @@ def load_api_settings():
         "azure_endpoint": "",  # Default Azure endpoint
         "azure_subscription_key": "",  # Default Azure subscription key
         "verbose_mode": False,  # Enable verbose logging/debug output
+        "capture_max_age_ms": 50,  # Reuse a screen frame younger than this instead of grabbing again
+        "capture_backend": "auto",  # Screen grabber: "auto", "xshm" (Linux/X11 MIT-SHM) or "pyautogui"
+        "match_workers": 0,  # Threads for tiled pattern matching (0 = one per CPU core, 1 = no tiling)
+        "match_tile_min_pixels": 500000,  # Search areas smaller than this are matched without tiling
+        "local_ocr_languages": ["en"],  # EasyOCR language codes for Local OCR
+        "local_ocr_gpu": False,  # Run EasyOCR on CUDA if available
+        "local_ocr_readers": 1,  # Pre-loaded EasyOCR readers per language set (concurrent calls)
+        "local_ocr_workers": 0,  # Local OCR worker processes (0 = run in the app process)
+        "local_ocr_quantize": True,  # int8 recognition network on CPU (built once, cached in storage/ocr_models)
+        "ocr_corpus_dir": "",  # If set, every Image AI capture is also saved here (e.g. "storage/ocr_corpus")
+        "image_ai_async_workers": 4,  # Background threads for Image AI events with the async option
+        "image_ai_await_timeout": 60,  # Seconds an If event waits for a pending async Image AI result
+        "image_ai_cache_size": 128,  # Image AI results remembered per identical capture (0 = disabled)
+        "image_ai_cache_tolerance": 0,  # Max per-pixel gray difference treated as identical (0 = exact pixels)
+        "ai_cache_enabled": True,  # Keep ChatGPT/Azure answers in storage/ai_cache.sqlite3 across runs
+        "ai_cache_ttl_hours": 24,  # Cached answers older than this are not reused (0 = never expire)
+        "ai_cache_max_entries": 5000,  # Least recently used answers beyond this are deleted
+        "vision_upload_format": "PNG",  # ChatGPT/Azure upload format: PNG, JPEG or WEBP (Azure sends WEBP as JPEG)
+        "vision_upload_quality": 85,  # JPEG/WebP quality
+        "vision_max_dimension": 0,  # Downscale uploads so the longest side fits (0 = full resolution)
+        "openai_image_detail": "auto",  # OpenAI image detail level: low, high or auto
+        "chatgpt_stream": False,  # Receive ChatGPT answers as a stream (measures time to first token)
+        "chatgpt_stop_pattern": "",  # Regex that ends a streamed answer early once it matches (e.g. "\\d+")
+        "azure_read_first_interval": 0.25,  # First Azure Read poll after submitting, in seconds
+        "azure_read_backoff": 1.5,  # Poll delay growth per "running" answer
+        "azure_read_max_interval": 2.0,  # Longest delay between two polls of one Read operation
+        "azure_read_poll_workers": 4,  # Read polls sent at the same time (a slow poll only delays its own operation)
+        "image_ai_deadline": 30,  # Time budget in seconds for one Image AI event (timeouts, retries and polling)
+        "circuit_failure_threshold": 5,  # Consecutive failed calls that open a provider's circuit (calls then fail fast)
+        "circuit_reset_seconds": 30,  # Seconds before an open circuit lets a probe call through
+        "notification_timeout": 10,  # Time budget in seconds for sending one Pushover notification
+        "notification_queue_size": 100,  # Notifications waiting to be sent; more are dropped while it is full
+        "notification_dedup_seconds": 30,  # Identical notifications within this window are sent once with a count
+        "pushover_url": "https://api.pushover.net/1/messages.json",  # Point at scripts/api_stub_server.py for offline tests
+        "router_backends": ["Local OCR", "Azure", "ChatGPT"],  # Backends the "Auto" Image AI provider may use
+        "router_hedge_percentile": 90,  # Hedge to the next backend once the chosen one exceeds this latency percentile
+        "router_hedge_after": 2.0,  # Hedge delay in seconds until a backend has enough latency samples
+        "router_window": 50,  # Recent calls per backend used for latency and error rates
+        "router_max_error_rate": 0.5,  # Backends failing more often are only used as a last resort
+        "router_explore_rate": 0.05,  # Share of requests sent first to a backend with too few samples or unhealthy
+        "openai_base_url": "https://api.openai.com/v1",  # Point at scripts/api_stub_server.py for offline tests
+        "rate_limits": {  # Client-side token buckets per provider and API key (rate = requests per second)
+            "chatgpt": {"rate": 5, "burst": 10},
+            "azure": {"rate": 10, "burst": 10},
+            "pushover": {"rate": 1, "burst": 5},
+        },
+        "rate_limit_lock_dir": "",  # If set (e.g. "storage/rate_limits"), other aimacro processes share the buckets
+        "log_file": "logs/aimacro.jsonl",  # JSON-lines log of messages and per-event timings ("" = off)
+        "log_max_bytes": 5000000,  # Rotate the log file at this size
+        "log_backups": 3,  # Rotated log files kept (aimacro.jsonl.1, .2, ...)
+        "metrics_dir": "logs/metrics",  # Per-event-type latency histograms written here after each run ("" = off)
+        "metrics_port": 0,  # Serve live metrics on http://127.0.0.1:<port>/metrics (0 = off)
+        "http_max_retries": 3,  # Retries on HTTP 429/5xx and connection errors
+        "http_backoff_base": 0.5,  # First backoff ceiling in seconds (doubles per retry, full jitter)
+        "http_backoff_max": 8.0,  # Largest backoff ceiling in seconds
     }
 
     os.makedirs("storage", exist_ok=True)
@@ -16,11 +16,23 @@ OCR_PATTERN = re.compile(
     r"Feature:\s*(.+?),\s*"
     r"Area:\s*(\{.*?\}),\s*"
     r"Variable:\s*(\w+),\s*"
+    r"(?:Options:\s*(\{.*?\}),\s*)?"
     r"Variable Content:\s*(.*)",
     re.DOTALL
 )
-SEARCH_PATTERN = re.compile(r"Search Pattern - Image: (.+?), Search Area: (.+?), Succeed Go To: ([^,]+), Fail Go To: ([^,]+), Click: (True|False), Wait: (\d+\.\d+)s, Threshold: (\d+\.\d+), Scene Change: (True|False)(?:, Succeed Notification: ([\w-]+))?(?:, Fail Notification: ([\w-]+))?")
+OCR_BATCH_PATTERN = re.compile(
+    r"Image AI Batch - Provider:\s*(.+?),\s*"
+    r"Feature:\s*(.+?),\s*"
+    r"Regions:\s*(\[.*?\]),\s*"
+    r"(?:Options:\s*(\{.*?\}),\s*)?"
+    r"Variable Content:\s*(.*)",
+    re.DOTALL
+)
+SEARCH_PATTERN = re.compile(r"Search Pattern - Image: (.+?), Search Area: (.+?), Succeed Go To: ([^,]+), Fail Go To: ([^,]+), Click: (True|False), Wait: (\d+\.\d+)s, Threshold: (\d+\.\d+), Scene Change: (True|False)(?:, Succeed Notification: ([\w-]+))?(?:, Fail Notification: ([\w-]+))?(?:, Find All: (\w+))?")
+SEARCH_ANY_PATTERN = re.compile(r"Search Any - Search Area: (.+?), Fail Go To: ([^,]+), Click: (True|False), Wait: (\d+\.\d+)s, Patterns: (\[.*\])$", re.DOTALL)
+CLICK_MATCH_PATTERN = re.compile(r"Click Match - Variable: (\w+), Mode: (Next|All), Interval: (\d+\.\d+)s")
 IF_PATTERN = re.compile(r"If - Variable:\s*(\w+),\s*Condition:\s*([><=!%]+|Contains),\s*Value:\s*(.+?),\s*Succeed Go To:\s*([^,]+),\s*Fail Go To:\s*([^,]+)(?:,\s*Succeed Notification:\s*([\w-]+))?(?:,\s*Fail Notification:\s*([\w-]+))?")
 WAIT_PATTERN = re.compile(r"Wait: (\d+\.\d+)s")
+AWAIT_PATTERN = re.compile(r"Await Variable - Variable: (\w+), Timeout: (\d+(?:\.\d+)?)s")
 GOTO_PATTERN = re.compile(r"Go To - (Target|Line): (.+?)(?:, Element: (.+))?$")
 
@@ -4,9 +4,10 @@ import re
 import datetime
 import os
 import ast
-import base64
 import traceback
-from io import BytesIO
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from PIL import Image
 
 from pynput import keyboard as pynput_keyboard
 from pynput import mouse as pynput_mouse
@@ -24,26 +25,265 @@ from .event_patterns import (
     MOUSE_RIGHT_PRESS_PATTERN,
     MOUSE_RIGHT_RELEASE_PATTERN,
     OCR_PATTERN,
+    OCR_BATCH_PATTERN,
     SEARCH_PATTERN,
+    SEARCH_ANY_PATTERN,
+    CLICK_MATCH_PATTERN,
     IF_PATTERN,
     WAIT_PATTERN,
+    AWAIT_PATTERN,
     GOTO_PATTERN,
 )
 
 # Import services
-from ..services.ai_services import send_to_chatgpt, send_to_azure, send_to_local_ocr
+from ..services.ai_services import (send_to_chatgpt, send_to_azure, send_to_local_ocr, send_to_glyph_ocr,
+                                    send_batch_to_local_ocr, send_batch_to_chatgpt, is_error_result)
+from ..services.result_cache import get_result_cache
+from ..services.provider_router import get_provider_router
+from ..services.ocr_engine import get_ocr_engine
+from ..services.ocr_workers import get_ocr_worker_pool
 from ..services.notification_service import send_notification
 
 # Import utilities
-from ..utils.pattern_utils import search_for_pattern, unpack_coords, load_image, image_to_base64
-from ..utils.image_utils import upscale_min_size
-from ..utils.logger import verbose, info, error
+from ..utils.pattern_utils import search_for_pattern, search_for_any_pattern, search_for_all_patterns, unpack_coords, load_image, image_to_base64
+from ..utils.image_encoding import ensure_min_size
+from ..utils.screen_capture import get_screen_capture
+from ..utils.logger import verbose, info, error, get_logger, is_verbose, log_event
+from ..utils.metrics import get_macro_metrics, observe_phase, metric_phase, timed_sleep
+
+
+def is_local_ocr_provider(provider):
+    """Return True if an Image AI provider name refers to Local OCR."""
+    return provider.strip().lower() in ("local ocr", "local_ocr", "local")
+
+
+def warm_up_local_ocr(events, settings):
+    """Start loading Local OCR readers in the background for every precision the Image AI events use."""
+    precisions = set()
+    routed_local = "Local OCR" in (settings.get("router_backends") or ["Local OCR"])
+    for event in events:
+        ocr_match = OCR_PATTERN.search(event)
+        batch_match = OCR_BATCH_PATTERN.search(event)
+        if ocr_match and (is_local_ocr_provider(ocr_match.group(1))
+                          or (ocr_match.group(1).strip().lower() == "auto" and routed_local)):
+            options_str = ocr_match.group(5)
+        elif batch_match and is_local_ocr_provider(batch_match.group(1)):
+            options_str = batch_match.group(4)
+        else:
+            continue
+        try:
+            options = ast.literal_eval(options_str) if options_str else {}
+        except Exception:
+            options = {}
+        quantize = options.get("quantize")
+        precisions.add(settings.get("local_ocr_quantize", True) if quantize is None else quantize)
+    for quantize in precisions:
+        if int(settings.get("local_ocr_workers", 0) or 0) > 0:
+            # Worker processes load their models as soon as they are spawned
+            threading.Thread(target=get_ocr_worker_pool, args=(settings, quantize), daemon=True).start()
+        else:
+            get_ocr_engine(settings).warm_up(settings.get("local_ocr_languages") or ["en"], quantize)
+
+
+def run_image_ai(region, provider, feature, variable_name, variable_content, options, settings):
+    """Answer an Image AI event for an already captured region (cache first, then the provider)."""
+    started = time.perf_counter()
+    # Same pixels with the same provider, feature, prompt and options give the same answer
+    cache = get_result_cache(settings)
+    answer_options = sorted((k, v) for k, v in options.items() if k != "async")
+    cache_context = (provider.strip().lower(), feature, variable_content, repr(answer_options))
+    # One time budget for the whole event: every timeout, retry and poll shrinks to what is left
+    deadline = time.monotonic() + float(settings.get("image_ai_deadline", 30))
+    text = cache.lookup(region, cache_context)
+
+    # Route to appropriate provider based on selection
+    if text is not None:
+        verbose("Image AI result served from cache")
+    elif provider.lower() == "glyph ocr":
+        # Glyph templates read the captured pixels directly, no encoding needed
+        text = send_to_glyph_ocr(region, font=feature, allowlist=options.get("allowlist"))
+    else:
+        # One PIL image for every provider; each encodes it only in the form it sends
+        screenshot = ensure_min_size(Image.fromarray(region), min_size=(50, 50))
+        if is_verbose():
+            os.makedirs("./logs", exist_ok=True)
+            screenshot.save("./logs/ocr.png")
+        corpus_dir = settings.get("ocr_corpus_dir")
+        if corpus_dir:
+            # Keep every capture for offline comparisons (scripts/ocr_quantize_compare.py)
+            os.makedirs(corpus_dir, exist_ok=True)
+            screenshot.save(os.path.join(corpus_dir, f"{variable_name}_{int(time.time() * 1000)}.png"))
+
+        if provider.lower() == "azure":
+            text = send_to_azure(screenshot, settings, feature=feature, upload=options, deadline=deadline)
+        elif provider.lower() == "chatgpt":
+            # Use the variable_content as prompt for ChatGPT
+            prompt = variable_content if variable_content else "What's in this image?"
+            text = send_to_chatgpt(screenshot, settings, prompt=prompt, upload=options, deadline=deadline)
+        elif is_local_ocr_provider(provider):
+            # Local OCR doesn't use a prompt; feature "recognize" skips text detection
+            text = send_to_local_ocr(screenshot, settings,
+                                     recognize_only=(feature == "recognize"),
+                                     allowlist=options.get("allowlist"),
+                                     quantize=options.get("quantize"),
+                                     deadline=deadline)
+        elif provider.lower() == "auto":
+            # Fastest healthy backend, hedged to the next one when it is slow (see provider_router.py)
+            text = get_provider_router(settings).read(screenshot, settings, feature=feature,
+                                                      prompt=variable_content, options=options, deadline=deadline)
+        else:
+            text = f"Unknown provider: {provider}"
+        # Only text answers: Azure Read reports timeouts and failed operations as dicts
+        if isinstance(text, str) and not is_error_result(text):
+            cache.store(region, cache_context, text)
+
+    verbose("AI Result: %s", text)
+    observe_phase("ai", time.perf_counter() - started)
+    return text
+
+
+def run_image_ai_batch(crops, provider, feature, variable_content, options, settings):
+    """Answer an Image AI Batch event: one text per crop, uncached crops read in a single batch."""
+    started = time.perf_counter()
+    cache = get_result_cache(settings)
+    answer_options = sorted((k, v) for k, v in options.items() if k != "async")
+    cache_context = (provider.strip().lower(), feature, variable_content, repr(answer_options), "batch")
+    deadline = time.monotonic() + float(settings.get("image_ai_deadline", 30))
+    texts = [cache.lookup(crop, cache_context) for crop in crops]
+    missing = [i for i, text in enumerate(texts) if text is None]
+    if not missing:
+        verbose("Image AI batch served from cache")
+        observe_phase("ai", time.perf_counter() - started)
+        return texts
+
+    todo = [crops[i] for i in missing]
+    if provider.lower() == "glyph ocr":
+        results = [send_to_glyph_ocr(crop, font=feature, allowlist=options.get("allowlist")) for crop in todo]
+    else:
+        images = [ensure_min_size(Image.fromarray(crop), min_size=(50, 50)) for crop in todo]
+        if is_local_ocr_provider(provider):
+            results = send_batch_to_local_ocr(images, settings,
+                                              recognize_only=(feature == "recognize"),
+                                              allowlist=options.get("allowlist"),
+                                              quantize=options.get("quantize"),
+                                              deadline=deadline)
+        elif provider.lower() == "chatgpt":
+            results = send_batch_to_chatgpt(images, settings, prompt=variable_content, upload=options,
+                                            deadline=deadline)
+        elif provider.lower() == "azure":
+            # Azure answers are plain text without positions, so each crop is its own (concurrent) request
+            results = list(get_image_ai_executor(settings).map(
+                lambda image: send_to_azure(image, settings, feature=feature, upload=options, deadline=deadline),
+                images))
+        else:
+            results = [f"Unknown provider: {provider}"] * len(todo)
+
+    for i, text in zip(missing, results):
+        texts[i] = text
+        if isinstance(text, str) and not is_error_result(text):
+            cache.store(crops[i], cache_context, text)
+    verbose("AI Batch Results: %s", texts)
+    observe_phase("ai", time.perf_counter() - started)
+    return texts
+
+
+def store_image_ai_results(page1, results):
+    """Write Image AI results ({variable: text}) together; stop the macro if a provider call failed."""
+    results = {name: text for name, text in results.items() if name}
+    for variable_name, text in results.items():
+        # If you want to use Variable Content directly:
+        # page1.variables[variable_name] = variable_content or text
+        # Otherwise, write the OCR result:
+        page1.variables[variable_name] = text
+        verbose("OCR result '%s' saved to variable '%s'", text, variable_name)
+    if results:
+        verbose("Current variables: %s", page1.variables)
+        with metric_phase("ui"):
+            page1.page2.update_variables_list()
+
+    if any(bad in str(text) for text in results.values() for bad in ("API request failed", "JSON parsing error")):
+        error(f"OCR failed, stopping macro...")
+        page1.running = False
+    else:
+        verbose("OCR found text, continuing macro...")
+
+
+def store_image_ai_result(page1, variable_name, text):
+    """Write one Image AI result to its variable (see store_image_ai_results)."""
+    store_image_ai_results(page1, {variable_name: text})
+
+
+# Background pool for async Image AI events (created from settings on first use)
+_image_ai_executor = None
+_pending_lock = threading.Lock()
+
+
+def get_image_ai_executor(settings=None):
+    """Get the shared thread pool that runs async Image AI events."""
+    global _image_ai_executor
+    with _pending_lock:
+        if _image_ai_executor is None:
+            workers = int((settings or {}).get("image_ai_async_workers", 4) or 4)
+            _image_ai_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-ai")
+        return _image_ai_executor
+
+
+def apply_pending_result(page1, variable_name, future):
+    """Store a finished async result once, unless a newer request for the variable replaced it."""
+    with _pending_lock:
+        if page1.pending_results.get(variable_name) is not future:
+            return
+        del page1.pending_results[variable_name]
+    if future.cancelled():
+        return
+    try:
+        text = future.result()
+    except Exception as e:
+        text = f"Image AI error: {e}"
+    store_image_ai_result(page1, variable_name, text)
+
+
+def await_variable(page1, variable_name, timeout):
+    """
+    Block until a pending async Image AI result for `variable_name` has been stored.
+
+    Returns True once the variable is up to date (or nothing was pending), False if the
+    macro was stopped or `timeout` seconds passed first.
+    """
+    future = page1.pending_results.get(variable_name)
+    if future is None:
+        return True
+    verbose("Waiting for Image AI result '%s'...", variable_name)
+    deadline = time.monotonic() + timeout if timeout else None
+    with metric_phase("wait"):
+        while page1.running:
+            try:
+                future.result(timeout=0.1)
+            except FutureTimeout:
+                if deadline is not None and time.monotonic() >= deadline:
+                    error(f"Timed out after {timeout}s waiting for '{variable_name}'")
+                    return False
+                continue
+            except Exception:
+                pass
+            apply_pending_result(page1, variable_name, future)
+            return True
+    return False
+
+
+def cancel_pending_results(page1):
+    """Drop async results that have not arrived (e.g. left over from a previous run)."""
+    with _pending_lock:
+        pending = list(page1.pending_results.values())
+        page1.pending_results.clear()
+    for future in pending:
+        future.cancel()
 
 
 def execute_macro_logic(action, page1, current_index, variables, previous_timestamp=None):
     """Process a single macro event and return the next index and timestamp, waiting for time difference if needed."""
     if not page1.running:
-        print("Macro not running, skipping event.")
+        verbose("Macro not running, skipping event.")
         return current_index, previous_timestamp
 
     # print(f"Processing: {action} at index {current_index}")
@@ -57,15 +297,15 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
     if timestamp_match:
         timestamp, event_action = timestamp_match.groups()
         current_timestamp = float(timestamp)
-        verbose(f"Parsed timestamp: {current_timestamp}, action: {event_action}")
+        verbose("Parsed timestamp: %s, action: %s", current_timestamp, event_action)
         action = event_action
 
         # Wait for the time difference between previous and current event
         if previous_timestamp is not None:
             time_diff = current_timestamp - previous_timestamp
             if time_diff > 0:
-                verbose(f"Waiting {time_diff:.3f} seconds before executing...")
-                time.sleep(time_diff)
+                verbose("Waiting %.3f seconds before executing...", time_diff)
+                timed_sleep(time_diff)
 
     # Handle key press events
     key_press_match = KEY_PRESS_PATTERN.match(action)
@@ -75,14 +315,14 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         try:
             if key.startswith("'") and key.endswith("'"):  # Single character keys: 'a', 's', 'd'
                 kb_controller.press(key[1])
-                verbose(f"Pressed key: {key}")
+                verbose("Pressed key: %s", key)
             elif key.startswith("Key."):  # Special keys: Key.alt_l, Key.tab
                 key_name = key.replace("Key.", "")
                 kb_controller.press(getattr(pynput_keyboard.Key, key_name))
-                verbose(f"Pressed key: {key}")
+                verbose("Pressed key: %s", key)
             else:  # Plain single character keys: a, s, d
                 kb_controller.press(key)
-                verbose(f"Pressed key: {key}")
+                verbose("Pressed key: %s", key)
         except AttributeError:
             error(f"Key not recognized: {key}")
         return current_index + 1, current_timestamp
@@ -95,14 +335,14 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         try:
             if key.startswith("'") and key.endswith("'"):  # Single character keys: 'a', 's', 'd'
                 kb_controller.release(key[1])
-                verbose(f"Released key: {key}")
+                verbose("Released key: %s", key)
             elif key.startswith("Key."):  # Special keys: Key.alt_l, Key.tab
                 key_name = key.replace("Key.", "")
                 kb_controller.release(getattr(pynput_keyboard.Key, key_name))
-                verbose(f"Released key: {key}")
+                verbose("Released key: %s", key)
             else:  # Plain single character keys: a, s, d
                 kb_controller.release(key)
-                verbose(f"Released key: {key}")
+                verbose("Released key: %s", key)
         except AttributeError:
             error(f"Key not recognized: {key}")
         return current_index + 1, current_timestamp
@@ -112,7 +352,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         page1.dynamic_text.set(f"line: {current_index} - " + mouse_move_match.string)
         x, y = map(int, mouse_move_match.groups())
         mouse_controller.position = (x, y)
-        verbose(f"Moved mouse to: ({x}, {y})")
+        verbose("Moved mouse to: (%s, %s)", x, y)
         return current_index + 1, current_timestamp
 
     mouse_scroll_match = MOUSE_SCROLL_PATTERN.match(action)
@@ -125,7 +365,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
             x, y = mouse_controller.position
         scroll_amount = 1 if direction == "up" else -1
         mouse_controller.scroll(0, scroll_amount)
-        verbose(f"Scrolled {direction} at: ({x}, {y})")
+        verbose("Scrolled %s at: (%s, %s)", direction, x, y)
         return current_index + 1, current_timestamp
 
     mouse_left_press_match = MOUSE_LEFT_PRESS_PATTERN.match(action)
@@ -138,7 +378,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         else:
             pos = mouse_controller.position
         mouse_controller.press(pynput_mouse.Button.left)
-        verbose(f"Left click pressed at: {pos}")
+        verbose("Left click pressed at: %s", pos)
         return current_index + 1, current_timestamp
 
     mouse_left_release_match = MOUSE_LEFT_RELEASE_PATTERN.match(action)
@@ -151,7 +391,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         else:
             pos = mouse_controller.position
         mouse_controller.release(pynput_mouse.Button.left)
-        verbose(f"Left click released at: {pos}")
+        verbose("Left click released at: %s", pos)
         return current_index + 1, current_timestamp
 
     mouse_right_press_match = MOUSE_RIGHT_PRESS_PATTERN.match(action)
@@ -164,7 +404,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         else:
             pos = mouse_controller.position
         mouse_controller.press(pynput_mouse.Button.right)
-        verbose(f"Right click pressed at: {pos}")
+        verbose("Right click pressed at: %s", pos)
         return current_index + 1, current_timestamp
 
     mouse_right_release_match = MOUSE_RIGHT_RELEASE_PATTERN.match(action)
@@ -177,17 +417,17 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         else:
             pos = mouse_controller.position
         mouse_controller.release(pynput_mouse.Button.right)
-        verbose(f"Right click released at: {pos}")
+        verbose("Right click released at: %s", pos)
         return current_index + 1, current_timestamp
 
-    verbose(f"Action after timestamp parsing: {action}")
+    verbose("Action after timestamp parsing: %s", action)
     action = action.strip()  # Remove leading/trailing whitespace
 
     # Use .search instead of .match for more tolerance
     ocr_match = OCR_PATTERN.search(action)
     if ocr_match:
         page1.dynamic_text.set(f"line: {current_index} - " + ocr_match.string)
-        provider, feature, coords_str, variable_name, variable_content = ocr_match.groups()
+        provider, feature, coords_str, variable_name, options_str, variable_content = ocr_match.groups()
 
         # Safe parse
         try:
@@ -195,90 +435,109 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         except Exception as e:
             error(f"Area parse error: {e} -> coords_str={coords_str!r}")
             return current_index + 1, previous_timestamp
+        try:
+            options = ast.literal_eval(options_str) if options_str else {}
+        except Exception as e:
+            error(f"Options parse error: {e} -> options_str={options_str!r}")
+            options = {}
 
         variable_content = (variable_content or "").strip()
 
-        x1, y1 = coords['start']
-        x2, y2 = coords['end']
-
-        screenshot = pyautogui.screenshot(region=(x1, y1, x2 - x1, y2 - y1))
-        buffered = BytesIO()
-        os.makedirs("./logs", exist_ok=True)
-        screenshot.save(buffered, format="PNG")
-        screenshot.save("./logs/ocr.png")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        img_str = upscale_min_size(img_str, min_size=(50, 50))
+        settings = page1.master.master.settings
+        region = get_screen_capture().region(coords)
+        if options.get("async"):
+            # The region is captured now; the provider call runs in the background and the
+            # variable is filled in when it answers (If / Await Variable wait on it if needed)
+            future = get_image_ai_executor(settings).submit(
+                run_image_ai, region, provider, feature, variable_name, variable_content, options, settings)
+            with _pending_lock:
+                page1.pending_results[variable_name] = future
+            future.add_done_callback(lambda f: apply_pending_result(page1, variable_name, f))
+            verbose("Image AI request for '%s' sent in the background", variable_name)
+            return current_index + 1, previous_timestamp
 
-        # Route to appropriate provider based on selection
-        if provider.lower() == "azure":
-            text = send_to_azure(img_str, page1.master.master.settings, feature=feature)
-        elif provider.lower() == "chatgpt":
-            # Use the variable_content as prompt for ChatGPT
-            prompt = variable_content if variable_content else "What's in this image?"
-            text = send_to_chatgpt(img_str, page1.master.master.settings, prompt=prompt)
-        elif provider.lower() in ("local ocr", "local_ocr", "local"):
-            # Local OCR doesn't use feature or prompt, just extracts text
-            text = send_to_local_ocr(img_str, page1.master.master.settings)
-        else:
-            text = f"Unknown provider: {provider}"
-        
-        verbose(f"AI Result: {text}")
-
-        if variable_name:
-            # If you want to use Variable Content directly:
-            # page1.variables[variable_name] = variable_content or text
-            # Otherwise, write the OCR result:
-            page1.variables[variable_name] = text
-            verbose(f"OCR result '{text}' saved to variable '{variable_name}'")
-            verbose(f"Current variables: {page1.variables}")
-            page1.page2.update_variables_list()
+        text = run_image_ai(region, provider, feature, variable_name, variable_content, options, settings)
+        store_image_ai_result(page1, variable_name, text)
+        return current_index + 1, previous_timestamp
 
-        if any(bad in str(text) for bad in ("API request failed", "JSON parsing error")):
-            error(f"OCR failed, stopping macro...")
-            page1.running = False
-        else:
-            verbose("OCR found text, continuing macro...")
+    batch_match = OCR_BATCH_PATTERN.search(action)
+    if batch_match:
+        page1.dynamic_text.set(f"line: {current_index} - " + batch_match.string)
+        provider, feature, regions_str, options_str, variable_content = batch_match.groups()
+        try:
+            regions = ast.literal_eval(regions_str)
+            options = ast.literal_eval(options_str) if options_str else {}
+        except Exception as e:
+            error(f"Image AI Batch parse error: {e} -> regions={regions_str!r}, options={options_str!r}")
+            return current_index + 1, previous_timestamp
+        variable_content = (variable_content or "").strip()
 
+        settings = page1.master.master.settings
+        # One frame for every region, cropped without copying
+        frame = get_screen_capture().grab()
+        crops = [frame.region(*region["area"]["start"], *region["area"]["end"]) for region in regions]
+        texts = run_image_ai_batch(crops, provider, feature, variable_content, options, settings)
+        store_image_ai_results(page1, {region["variable"]: text for region, text in zip(regions, texts)})
         return current_index + 1, previous_timestamp
 
     search_match = SEARCH_PATTERN.match(action)
     if search_match:
         page1.dynamic_text.set(f"line: {current_index} - " + search_match.string)
-        img_str, search_coords_str, succeed_checkpoint, fail_checkpoint, click_if_found, wait_time, threshold_str, scene_change, succeed_notification_name, fail_notification_name = search_match.groups()
-        verbose(f"Parsed Search event: Image={img_str[:25]}, Search Area={search_coords_str}, Succeed Go To={succeed_checkpoint}, Fail Go To={fail_checkpoint}, Click={click_if_found}, Wait={wait_time}, Threshold={threshold_str}")
+        img_str, search_coords_str, succeed_checkpoint, fail_checkpoint, click_if_found, wait_time, threshold_str, scene_change, succeed_notification_name, fail_notification_name, find_all_variable = search_match.groups()
+        verbose("Parsed Search event: Image=%s, Search Area=%s, Succeed Go To=%s, Fail Go To=%s, Click=%s, Wait=%s, "
+                "Threshold=%s", img_str[:25], search_coords_str, succeed_checkpoint, fail_checkpoint, click_if_found,
+                wait_time, threshold_str)
         try:
             wait_time = float(wait_time)
             threshold = float(threshold_str) if threshold_str.replace('.', '').isdigit() else 0.7
             search_coords = eval(search_coords_str) if search_coords_str != 'Full Screen' else 'Full Screen'
             click_if_found = click_if_found == 'True'
 
-            verbose("Calling search_for_pattern...")
-            pattern_found = search_for_pattern(img_str, search_coords, page1.master.master.settings, page1=page1, click_if_found=click_if_found, wait_time=wait_time, threshold=threshold)
-            verbose(f"search_for_pattern returned: {pattern_found}")
+            if find_all_variable:
+                verbose("Calling search_for_all_patterns...")
+                matches = search_for_all_patterns(img_str, search_coords, page1.master.master.settings, page1=page1, wait_time=wait_time, threshold=threshold)
+                pattern_found = bool(matches)
+                # Later Click Match events iterate over these without searching again
+                page1.variables[find_all_variable] = len(matches)
+                page1.variables[f"{find_all_variable}_matches"] = [list(m) for m in matches]
+                page1.variables[f"{find_all_variable}_index"] = 0
+                page1.variables[f"{find_all_variable}_remaining"] = len(matches)
+                with metric_phase("ui"):
+                    page1.page2.update_variables_list()
+                verbose("Stored %s matches in '%s_matches'", len(matches), find_all_variable)
+                if matches and click_if_found:
+                    timed_sleep(0.5)
+                    pyautogui.click(*matches[0])
+                    verbose("Clicked at first match: %s", matches[0])
+            else:
+                verbose("Calling search_for_pattern...")
+                pattern_found = search_for_pattern(img_str, search_coords, page1.master.master.settings, page1=page1, click_if_found=click_if_found, wait_time=wait_time, threshold=threshold)
+                verbose("search_for_pattern returned: %s", pattern_found)
             target_checkpoint = succeed_checkpoint if pattern_found else fail_checkpoint
-            verbose(f"Pattern {'found' if pattern_found else 'not found'}, going to '{target_checkpoint}'...")
+            verbose("Pattern %s, going to '%s'...", 'found' if pattern_found else 'not found', target_checkpoint)
 
             # Send notification based on pattern result
             if pattern_found and succeed_notification_name:
-                verbose(f"Attempting to send succeed notification: {succeed_notification_name}")
+                verbose("Attempting to send succeed notification: %s", succeed_notification_name)
                 send_notification(succeed_notification_name, page1)
             elif not pattern_found and fail_notification_name:
-                verbose(f"Attempting to send fail notification: {fail_notification_name}")
+                verbose("Attempting to send fail notification: %s", fail_notification_name)
                 send_notification(fail_notification_name, page1)
 
             if scene_change == 'True' and not pattern_found:
-                x1, y1, x2, y2, width, height = unpack_coords(search_coords).values()
-                screen = pyautogui.screenshot(region=(x1, y1, width, height))
+                # The search just grabbed this area, so the cached frame is reused here
+                screen = get_screen_capture().region_image(None if search_coords == 'Full Screen' else search_coords)
                 screen_str = image_to_base64(screen)
-                os.makedirs("./logs", exist_ok=True)
-                load_image(screen_str).save("./logs/newone.png")
+                if is_verbose():
+                    os.makedirs("./logs", exist_ok=True)
+                    load_image(screen_str).save("./logs/newone.png")
                 new_text = re.sub(r'Image: [^\s,]+', 'Image: ' + str(screen_str), page1.left_treeview.item(page1.left_treeview.get_children()[current_index])["text"])                # Update the event in self.events and treeview text
                 page1.left_treeview.item(page1.left_treeview.get_children()[current_index], text=new_text)
                 
             if target_checkpoint != "Next":
                 next_index = page1.get_checkpoint_index(target_checkpoint)
                 if next_index is not None:
-                    verbose(f"Jumping to checkpoint index: {next_index}")
+                    verbose("Jumping to checkpoint index: %s", next_index)
                     return next_index, current_timestamp
                 error(f"Checkpoint '{target_checkpoint}' not found, stopping macro...")
                 page1.running = False
@@ -289,11 +548,74 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
             error(f"Error parsing numeric values: {e}")
             return current_index + 1, current_timestamp
 
+    search_any_match = SEARCH_ANY_PATTERN.match(action)
+    if search_any_match:
+        search_coords_str, fail_checkpoint, click_if_found, wait_time, patterns_str = search_any_match.groups()
+        try:
+            search_coords = ast.literal_eval(search_coords_str) if search_coords_str != 'Full Screen' else 'Full Screen'
+            patterns = ast.literal_eval(patterns_str)
+            wait_time = float(wait_time)
+        except (ValueError, SyntaxError) as e:
+            error(f"Search Any parse error: {e}")
+            return current_index + 1, current_timestamp
+        page1.dynamic_text.set(f"line: {current_index} - Search Any ({len(patterns)} patterns)")
+        verbose("Parsed Search Any event: Patterns=%s, Search Area=%s, Fail Go To=%s, Click=%s, Wait=%s",
+                len(patterns), search_coords_str, fail_checkpoint, click_if_found, wait_time)
+
+        found_index = search_for_any_pattern(patterns, search_coords, page1.master.master.settings, page1=page1, click_if_found=click_if_found == 'True', wait_time=wait_time)
+        target_checkpoint = patterns[found_index].get("goto", "Next") if found_index is not None else fail_checkpoint
+        verbose("Search Any %s, going to '%s'...",
+                f"matched pattern #{found_index}" if found_index is not None else "found nothing", target_checkpoint)
+
+        if target_checkpoint != "Next":
+            next_index = page1.get_checkpoint_index(target_checkpoint)
+            if next_index is not None:
+                verbose("Jumping to checkpoint index: %s", next_index)
+                return next_index, current_timestamp
+            error(f"Checkpoint '{target_checkpoint}' not found, stopping macro...")
+            page1.running = False
+            return current_index, current_timestamp
+        return current_index + 1, current_timestamp
+
+    click_match_match = CLICK_MATCH_PATTERN.match(action)
+    if click_match_match:
+        page1.dynamic_text.set(f"line: {current_index} - " + click_match_match.string)
+        variable_name, mode, interval = click_match_match.groups()
+        interval = float(interval)
+        matches = page1.variables.get(f"{variable_name}_matches") or []
+        index = int(page1.variables.get(f"{variable_name}_index", 0) or 0)
+        if mode == "All":
+            for x, y in matches:
+                if not page1.running:
+                    return current_index, current_timestamp
+                pyautogui.click(x, y)
+                verbose("Clicked match at: (%s, %s)", x, y)
+                timed_sleep(interval)
+            index = len(matches)
+        elif index < len(matches):
+            x, y = matches[index]
+            pyautogui.click(x, y)
+            verbose("Clicked match %s/%s at: (%s, %s)", index + 1, len(matches), x, y)
+            index += 1
+            timed_sleep(interval)
+        else:
+            verbose("No matches left in '%s_matches'", variable_name)
+        page1.variables[f"{variable_name}_index"] = index
+        page1.variables[f"{variable_name}_remaining"] = max(0, len(matches) - index)
+        with metric_phase("ui"):
+            page1.page2.update_variables_list()
+        return current_index + 1, current_timestamp
+
     if_match = IF_PATTERN.match(action)
     if if_match:
         page1.dynamic_text.set(f"line: {current_index} - " + if_match.string)
         variable_name, condition, value, succeed_checkpoint, fail_checkpoint, succeed_notification_name, fail_notification_name = if_match.groups()
-        verbose(f"Parsed If event: Variable={variable_name}, Condition={condition}, Value={value}, Succeed Go To={succeed_checkpoint}, Fail Go To={fail_checkpoint}")
+        verbose("Parsed If event: Variable=%s, Condition=%s, Value=%s, Succeed Go To=%s, Fail Go To=%s",
+                variable_name, condition, value, succeed_checkpoint, fail_checkpoint)
+        # An async Image AI event may still be filling this variable
+        if not await_variable(page1, variable_name, page1.master.master.settings.get("image_ai_await_timeout", 60)):
+            if not page1.running:
+                return current_index, current_timestamp
         now = datetime.datetime.now()
         # Update time variables in page1.variables to ensure consistency
         page1.variables["time_hour"] = now.hour
@@ -307,9 +629,9 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
         variable_value = page1.variables.get(variable_name)
         
         if variable_value is None:
-            verbose(f"Variable '{variable_name}' not found in variables: {page1.variables}, skipping If condition.")
+            verbose("Variable '%s' not found in variables: %s, skipping If condition.", variable_name, page1.variables)
             return current_index + 1, current_timestamp
-        verbose(f"variable_value: {variable_value} - value: {value}")
+        verbose("variable_value: %s - value: %s", variable_value, value)
         condition_met = False
         if condition == "==":
             try:
@@ -318,13 +640,13 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
             except:
                 condition_met = str(variable_value) == str(value)
         elif condition == ">":
-            condition_met = float(variable_value) > float(value) if variable_value.replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
+            condition_met = float(variable_value) > float(value) if str(variable_value).replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
         elif condition == "<":
-            condition_met = float(variable_value) < float(value) if variable_value.replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
+            condition_met = float(variable_value) < float(value) if str(variable_value).replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
         elif condition == ">=":
-            condition_met = float(variable_value) >= float(value) if variable_value.replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
+            condition_met = float(variable_value) >= float(value) if str(variable_value).replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
         elif condition == "<=":
-            condition_met = float(variable_value) <= float(value) if variable_value.replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
+            condition_met = float(variable_value) <= float(value) if str(variable_value).replace('.', '').isdigit() and value.replace('.', '').isdigit() else False
         elif condition == "!=":
             condition_met = str(variable_value) != str(value)
         elif condition == "Contains":
@@ -339,20 +661,20 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
                 condition_met = False
 
         target_checkpoint = succeed_checkpoint if condition_met else fail_checkpoint
-        verbose(f"Condition {'met' if condition_met else 'not met'}, going to '{target_checkpoint}'...")
+        verbose("Condition %s, going to '%s'...", 'met' if condition_met else 'not met', target_checkpoint)
 
         # Send notification based on condition result
         if condition_met and succeed_notification_name:
-            verbose(f"Attempting to send succeed notification: {succeed_notification_name}")
+            verbose("Attempting to send succeed notification: %s", succeed_notification_name)
             send_notification(succeed_notification_name, page1)
         elif not condition_met and fail_notification_name:
-            verbose(f"Attempting to send fail notification: {fail_notification_name}")
+            verbose("Attempting to send fail notification: %s", fail_notification_name)
             send_notification(fail_notification_name, page1)
 
         if target_checkpoint != "Next":
             next_index = page1.get_checkpoint_index(target_checkpoint)
             if next_index is not None:
-                verbose(f"Jumping to checkpoint index: {next_index}")
+                verbose("Jumping to checkpoint index: %s", next_index)
                 return next_index, current_timestamp
             error(f"Checkpoint '{target_checkpoint}' not found, stopping macro...")
             page1.running = False
@@ -362,15 +684,24 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
     wait_match = WAIT_PATTERN.match(action)
     if wait_match:
         wait_time = float(wait_match.group(1))
-        verbose(f"Waiting for {wait_time} seconds...")
+        verbose("Waiting for %s seconds...", wait_time)
         for i in range(int(wait_time)):
             page1.dynamic_text.set(f"line: {current_index} - " + f"waiting: {wait_time-i}")
-            time.sleep(1)
+            timed_sleep(1)
             if page1 and not page1.running:
                 page1.running = False
                 return current_index, previous_timestamp
     
-        verbose(f"Wait completed after {wait_time} seconds.")
+        verbose("Wait completed after %s seconds.", wait_time)
+        return current_index + 1, current_timestamp
+
+    await_match = AWAIT_PATTERN.match(action)
+    if await_match:
+        page1.dynamic_text.set(f"line: {current_index} - " + action)
+        variable_name, timeout = await_match.group(1), float(await_match.group(2))
+        if not await_variable(page1, variable_name, timeout) and not page1.running:
+            return current_index, previous_timestamp
+        verbose("Variable '%s' ready: %r", variable_name, page1.variables.get(variable_name))
         return current_index + 1, current_timestamp
 
     goto_match = GOTO_PATTERN.match(action)
@@ -382,7 +713,7 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
             checkpoint_name = target.strip()
             next_index = page1.get_checkpoint_index(checkpoint_name)
             if next_index is not None:
-                verbose(f"Jumping to checkpoint '{checkpoint_name}' at index: {next_index}")
+                verbose("Jumping to checkpoint '%s' at index: %s", checkpoint_name, next_index)
                 return next_index, current_timestamp
             else:
                 error(f"Checkpoint '{checkpoint_name}' not found, stopping macro...")
@@ -397,8 +728,8 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
                     if element_text:
                         current_element = page1.left_treeview.item(children[line_num])["text"]
                         if current_element != element_text:
-                            verbose(f"WARNING: Element at line {line_num} has changed from saved value")
-                    verbose(f"Jumping to line {line_num}")
+                            verbose("WARNING: Element at line %s has changed from saved value", line_num)
+                    verbose("Jumping to line %s", line_num)
                     return line_num, current_timestamp
                 else:
                     error(f"Line number {line_num} is out of range, continuing to next event...")
@@ -411,21 +742,41 @@ def execute_macro_logic(action, page1, current_index, variables, previous_timest
     if checkpoint_match:
         page1.dynamic_text.set(f"line: {current_index} - " + action)
         checkpoint_name = action.split("Checkpoint: ")[1]
-        verbose(f"Reached Checkpoint: {checkpoint_name}")
+        verbose("Reached Checkpoint: %s", checkpoint_name)
         return current_index + 1, current_timestamp
 
-    verbose(f"Unrecognized event format: {action}")
+    verbose("Unrecognized event format: %s", action)
     return current_index + 1, current_timestamp
 
 
+def event_type(action):
+    """Short event type for logs ("Image AI", "Search Pattern", "Mouse Button.left pressed", ...)."""
+    timestamp_match = TIMESTAMP_PATTERN.match(action)
+    if timestamp_match:
+        action = timestamp_match.group(2)
+    return re.split(r" - |:| at", action, maxsplit=1)[0].strip()
+
+
 def execute_macro_logic_wrapper(action, page1, current_index, variables, previous_timestamp=None):
-    """Wrapper for execute_macro_logic with error handling."""
+    """Wrapper for execute_macro_logic with error handling, phase metrics and a timing record per event."""
+    kind = event_type(action)
+    metrics = get_macro_metrics()
+    metrics.begin_event(kind)
+    started = time.perf_counter()
     try:
         next_index, new_timestamp = execute_macro_logic(action, page1, current_index, variables, previous_timestamp)
+        elapsed = time.perf_counter() - started
+        metrics.end_event(elapsed)
+        log_event("event", index=current_index, type=kind, next_index=next_index,
+                  duration_ms=round(elapsed * 1000, 3))
         return next_index, new_timestamp
     except Exception as e:
+        elapsed = time.perf_counter() - started
+        metrics.end_event(elapsed)
         error_trace = traceback.format_exc()
         error(f"Unexpected error in execute_macro_logic: {type(e).__name__}: {e}\nStack trace:\n{error_trace}")
+        log_event("event", index=current_index, type=kind, error=f"{type(e).__name__}: {e}",
+                  duration_ms=round(elapsed * 1000, 3))
         page1.running = False
         return current_index, previous_timestamp
 
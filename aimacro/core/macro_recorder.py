@@ -69,8 +69,45 @@ class MacroRecorder:
 
     def execute_macro(self):
         """Execute the recorded macro event s."""
-        from .macro_executor import execute_macro_logic_wrapper as execute_macro_logic
+        from .macro_executor import (execute_macro_logic_wrapper as execute_macro_logic, warm_up_local_ocr,
+                                     cancel_pending_results)
+        from ..services.ocr_engine import get_ocr_engine
+        from ..services.ocr_workers import peek_ocr_worker_pools
+        from ..services.result_cache import get_result_cache
+        from ..services.response_cache import peek_response_cache
+        from ..services.http_client import peek_provider_clients
+        from ..services.azure_read import peek_azure_read_multiplexer
+        from ..services.provider_router import peek_provider_router
+        from ..services.chat_stream import peek_stream_stats
+        from ..services.rate_limiter import peek_rate_limiter
+        from ..services.notification_service import peek_notification_dispatcher
+        from ..utils.screen_capture import get_screen_capture
+        from ..utils.metrics import get_macro_metrics, start_metrics_server
+        settings = self.page1.master.master.settings
+        get_screen_capture().reset_stats()
+        get_macro_metrics().reset()
+        start_metrics_server(settings.get("metrics_port", 0))
+        cancel_pending_results(self.page1)
+        get_result_cache(self.page1.master.master.settings).reset_stats()
+        get_ocr_engine(settings).reset_stats()
+        for pool in peek_ocr_worker_pools():
+            pool.reset_stats()
+        if peek_response_cache():
+            peek_response_cache().reset_stats()
+        for client in peek_provider_clients():
+            client.reset_stats()
+        if peek_azure_read_multiplexer():
+            peek_azure_read_multiplexer().reset_stats()
+        if peek_provider_router():
+            peek_provider_router().reset_stats()
+        if peek_stream_stats():
+            peek_stream_stats().reset_stats()
+        if peek_rate_limiter():
+            peek_rate_limiter().reset_stats()
+        if peek_notification_dispatcher():
+            peek_notification_dispatcher().reset_stats()
         self.events = [self.page1.left_treeview.item(item)["text"] for item in self.page1.left_treeview.get_children()]
+        warm_up_local_ocr(self.events, self.page1.master.master.settings)
         # print("self.events content:", self.events)
         current_index = 0
         run_count = 1
@@ -85,6 +122,35 @@ class MacroRecorder:
         self.page1.running = False
         self.page1.run_button.config(state="normal")
         self.page1.stop_run_button.config(state="disabled")
+        info(get_screen_capture().format_stats())
+        ocr_stats = get_ocr_engine().format_stats()
+        if ocr_stats:
+            info(ocr_stats)
+        for pool in peek_ocr_worker_pools():
+            info(pool.format_stats())
+        info(get_result_cache().format_stats())
+        if peek_response_cache():
+            info(peek_response_cache().format_stats())
+        for client in peek_provider_clients():
+            info(client.format_stats())
+        if peek_azure_read_multiplexer():
+            info(peek_azure_read_multiplexer().format_stats())
+        if peek_provider_router():
+            info(peek_provider_router().format_stats())
+        if peek_stream_stats() and peek_stream_stats().stats()["streams"]:
+            info(peek_stream_stats().format_stats())
+        if peek_rate_limiter() and peek_rate_limiter().format_stats():
+            info(peek_rate_limiter().format_stats())
+        if peek_notification_dispatcher():
+            info(peek_notification_dispatcher().format_stats())
+        metrics_stats = get_macro_metrics().format_stats()
+        if metrics_stats:
+            info(metrics_stats)
+            if settings.get("metrics_dir"):
+                try:
+                    info(f"Run metrics written to {get_macro_metrics().export(settings['metrics_dir'])}")
+                except OSError as e:
+                    error(f"Could not write run metrics: {e}")
         info("Macro execution completed.")
 
     def on_key_press(self, key):
@@ -0,0 +1,76 @@
+"""
+Inspect and prune the persistent AI response cache (storage/ai_cache.sqlite3).
+
+    python -m aimacro.scripts.ai_cache stats
+    python -m aimacro.scripts.ai_cache list --limit 10
+    python -m aimacro.scripts.ai_cache prune --ttl-hours 24 --max-entries 5000
+    python -m aimacro.scripts.ai_cache clear --provider azure
+    python -m aimacro.scripts.ai_cache bench
+"""
+import sys
+import time
+import argparse
+import datetime
+import numpy as np
+
+from aimacro.services.response_cache import ResponseCache, DEFAULT_PATH
+
+
+def fmt_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_PATH, help="cache database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="entries, hits and size per provider/variant")
+    list_parser = sub.add_parser("list", help="most recently used entries")
+    list_parser.add_argument("--limit", type=int, default=20)
+    prune_parser = sub.add_parser("prune", help="delete expired and least recently used entries")
+    prune_parser.add_argument("--ttl-hours", type=float, default=24)
+    prune_parser.add_argument("--max-entries", type=int, default=5000)
+    clear_parser = sub.add_parser("clear", help="delete all entries (or one provider's)")
+    clear_parser.add_argument("--provider", choices=["chatgpt", "azure"])
+    bench_parser = sub.add_parser("bench", help="time cache lookups")
+    bench_parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "prune":
+        cache = ResponseCache(args.db, ttl_hours=args.ttl_hours, max_entries=args.max_entries)
+    else:
+        cache = ResponseCache(args.db, ttl_hours=0)
+
+    if args.command == "stats":
+        rows = cache.summary()
+        if not rows:
+            print(f"{args.db}: empty")
+        for provider, variant, count, hits, size, oldest, last_used in rows:
+            print(f"{provider:>8} {variant:<20} {count:>6} entries {hits:>7} hits {size / 1024:>9.1f} KiB  "
+                  f"oldest {fmt_time(oldest)}  last used {fmt_time(last_used)}")
+    elif args.command == "list":
+        for key, provider, variant, hits, created, last_used, response in cache.entries(args.limit):
+            preview = response.replace("\n", " | ")[:60]
+            print(f"{key[:12]} {provider:>8} {variant:<16} {hits:>4} hits  {fmt_time(created)}  {preview!r}")
+    elif args.command == "prune":
+        expired, evicted = cache.prune()
+        cache.vacuum()
+        print(f"Deleted {expired} expired and {evicted} least recently used entries")
+    elif args.command == "clear":
+        print(f"Deleted {cache.clear(args.provider)} entries")
+        cache.vacuum()
+    elif args.command == "bench":
+        keys = [key for key, *_ in cache.entries(args.rounds)] or ["missing"]
+        times = []
+        for i in range(args.rounds):
+            started = time.perf_counter()
+            cache.get(keys[i % len(keys)])
+            times.append((time.perf_counter() - started) * 1000)
+        print(f"{args.rounds} lookups over {len(keys)} keys: median {np.median(times):.3f} ms, "
+              f"p99 {np.percentile(times, 99):.3f} ms")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Local stub of the OpenAI, Azure Computer Vision and Pushover endpoints used by aimacro.
+
+Lets latency, retry and connection-reuse behaviour be measured offline.
+Point the app at it with, in storage/settings.json:
+    "openai_base_url": "http://127.0.0.1:8765/v1",
+    "azure_endpoint": "http://127.0.0.1:8765",
+    "pushover_url": "http://127.0.0.1:8765/1/messages.json"
+
+Chat completions requested with "stream": true are answered as server-sent
+events, one short token every --token-ms, followed by --stream-tail (extra
+words a stop pattern should cut off).
+
+    python -m aimacro.scripts.api_stub_server --latency 80 --fail-rate 0.1
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import urllib.parse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_TEXT = "12345"
+
+
+def chat_answer(body):
+    """STUB_TEXT, or a JSON array of it when the prompt asks for one per field (Image AI Batch)."""
+    try:
+        prompt = json.dumps(json.loads(body)["messages"])
+    except (ValueError, KeyError, TypeError):
+        return STUB_TEXT
+    batch = re.search(r"JSON array of exactly (\d+) strings", prompt)
+    return json.dumps([STUB_TEXT] * int(batch.group(1))) if batch else STUB_TEXT
+
+
+def wants_stream(body):
+    try:
+        return bool(json.loads(body).get("stream"))
+    except (ValueError, AttributeError):
+        return False
+
+
+class StubState:
+    """Counters and pending Read operations shared by all handler threads."""
+
+    def __init__(self, latency_ms=50, read_polls=2, fail_rate=0.0, retry_after=1, read_seconds=None, token_ms=20,
+                 stream_tail=""):
+        self.latency = latency_ms / 1000
+        self.read_polls = read_polls
+        self.read_seconds = read_seconds  # if set, a Read is ready this long after submit (polls ignored)
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.token_delay = token_ms / 1000
+        self.stream_tail = stream_tail
+        self.lock = threading.Lock()
+        self.operations = {}  # operation id -> polls remaining before "succeeded" (or ready time)
+        self.counts = {"connections": 0, "requests": 0, "failures": 0, "streams": 0, "streams_aborted": 0,
+                       "notifications": 0}
+        self.notifications = []  # form fields of every accepted Pushover message
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible in the counters
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls on reuse
+    state = None
+
+    def setup(self):
+        super().setup()
+        self.state.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_stream(self, text):
+        """Send a chat completion as SSE chunks (chunked transfer encoding keeps the connection reusable)."""
+        self.state.count("streams")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = re.findall(r"\S{1,3}|\s+", text)
+        events = [{"choices": [{"index": 0, "delta": {"role": "assistant"}}]}]
+        events += [{"choices": [{"index": 0, "delta": {"content": token}}]} for token in tokens]
+        events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        try:
+            for i, event in enumerate(events):
+                if i > 1:
+                    time.sleep(self.state.token_delay)
+                self.write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            self.write_chunk(b"data: [DONE]\n\n")
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading early (stop pattern matched)
+            self.state.count("streams_aborted")
+            self.close_connection = True
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def maybe_fail(self):
+        """Randomly answer 429 (with Retry-After) or 503 to exercise client retries (POSTs and Read polls)."""
+        if random.random() >= self.state.fail_rate:
+            return False
+        self.state.count("failures")
+        if random.random() < 0.5:
+            self.send_json(429, {"error": {"message": "stub rate limit"}}, {"Retry-After": str(self.state.retry_after)})
+        else:
+            self.send_json(503, {"error": {"message": "stub unavailable"}})
+        return True
+
+    def do_POST(self):
+        self.state.count("requests")
+        body = self.read_body()
+        time.sleep(self.state.latency)
+        if self.maybe_fail():
+            return
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/chat/completions") and wants_stream(body):
+            self.send_stream(chat_answer(body) + self.state.stream_tail)
+        elif path.endswith("/chat/completions"):
+            self.send_json(200, {"choices": [{"message": {"role": "assistant", "content": chat_answer(body)}}]})
+        elif path.endswith("/1/messages.json"):
+            fields = dict(urllib.parse.parse_qsl(body.decode()))
+            with self.state.lock:
+                self.state.notifications.append(fields)
+            self.state.count("notifications")
+            self.send_json(200, {"status": 1, "request": uuid.uuid4().hex})
+        elif path.endswith("/vision/v3.2/ocr"):
+            self.send_json(200, {"regions": [{"lines": [{"words": [{"text": STUB_TEXT}]}]}]})
+        elif path.endswith("/vision/v3.2/describe"):
+            self.send_json(200, {"description": {"captions": [{"text": "a stub screen", "confidence": 0.9}]}})
+        elif path.endswith("/vision/v3.2/analyze"):
+            self.send_json(200, {"tags": [{"name": "screenshot"}], "categories": [{"name": "text_"}]})
+        elif path.endswith("/vision/v3.2/read/analyze"):
+            operation = uuid.uuid4().hex
+            with self.state.lock:
+                if self.state.read_seconds is not None:
+                    self.state.operations[operation] = time.monotonic() + self.state.read_seconds
+                else:
+                    self.state.operations[operation] = self.state.read_polls
+            host = self.headers.get("Host") or f"127.0.0.1:{self.server.server_port}"
+            location = f"http://{host}/vision/v3.2/read/analyzeResults/{operation}"
+            self.send_json(202, {}, {"Operation-Location": location})
+        else:
+            self.send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+    def do_GET(self):
+        self.state.count("requests")
+        path = self.path.split("?")[0]
+        if "/read/analyzeResults/" not in path:
+            self.send_json(404, {"error": {"message": f"unknown path {path}"}})
+            return
+        if self.maybe_fail():
+            return
+        operation = path.rsplit("/", 1)[-1]
+        with self.state.lock:
+            remaining = self.state.operations.get(operation)
+            if remaining and self.state.read_seconds is not None:
+                remaining = 1 if time.monotonic() < remaining else 0
+            elif remaining:
+                self.state.operations[operation] = remaining - 1
+        if remaining is None:
+            self.send_json(404, {"error": {"message": "unknown operation"}})
+        elif remaining > 0:
+            self.send_json(200, {"status": "running"})
+        else:
+            self.send_json(200, {"status": "succeeded", "analyzeResult": {
+                "readResults": [{"lines": [{"text": STUB_TEXT}]}]}})
+
+
+def start_stub_server(host="127.0.0.1", port=8765, **state_kwargs):
+    """Start the stub in a daemon thread; return (server, state). Port 0 picks a free port."""
+    state = StubState(**state_kwargs)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="api-stub", daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=50, help="server-side delay per POST in ms")
+    parser.add_argument("--read-polls", type=int, default=2, help="'running' answers before a Read succeeds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of POSTs answered with 429/503")
+    parser.add_argument("--read-seconds", type=float, help="a Read is ready this many seconds after submit "
+                                                             "(instead of after --read-polls polls)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--token-ms", type=float, default=20, help="delay between streamed tokens in ms")
+    parser.add_argument("--stream-tail", default="", help="text streamed after the answer (for stop patterns)")
+    args = parser.parse_args()
+
+    server, state = start_stub_server(args.host, args.port, latency_ms=args.latency, read_polls=args.read_polls,
+                                      fail_rate=args.fail_rate, retry_after=args.retry_after,
+                                      read_seconds=args.read_seconds, token_ms=args.token_ms,
+                                      stream_tail=args.stream_tail)
+    print(f"Stub API listening on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"connections {state.counts['connections']}, requests {state.counts['requests']}, "
+                  f"injected failures {state.counts['failures']}, streams {state.counts['streams']} "
+                  f"({state.counts['streams_aborted']} stopped early), notifications {state.counts['notifications']}")
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Compare Azure Read polling strategies against the local stub server.
+
+"fixed" submits one operation at a time and polls it every --interval seconds
+(the old send_to_azure loop); "multiplexed" submits every operation and lets
+AzureReadMultiplexer poll them all from one thread with adaptive backoff.
+Each Read becomes ready --read-seconds after it is submitted.
+
+    python -m aimacro.scripts.azure_read_benchmark --operations 8 --read-seconds 0.6
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from aimacro.scripts.api_stub_server import start_stub_server
+from aimacro.services.http_client import ProviderClient
+from aimacro.services.azure_read import AzureReadMultiplexer
+
+HEADERS = {"Ocp-Apim-Subscription-Key": "stub", "Content-Type": "application/octet-stream"}
+
+
+def submit(client, base):
+    response = client.post(f"{base}/vision/v3.2/read/analyze", headers=HEADERS, data=b"stub", timeout=10)
+    response.raise_for_status()
+    return response.headers["Operation-Location"]
+
+
+def run_fixed(client, base, operations, interval):
+    latencies = []
+    for _ in range(operations):
+        started = time.perf_counter()
+        location = submit(client, base)
+        while True:
+            time.sleep(interval)
+            if client.get(location, headers=HEADERS, timeout=10).json().get("status") == "succeeded":
+                break
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_multiplexed(client, base, operations, multiplexer):
+    started = time.perf_counter()
+    futures = []
+    for _ in range(operations):
+        futures.append((time.perf_counter(), multiplexer.track(submit(client, base), "stub")))
+    latencies = []
+    for submitted, future in futures:
+        future.result()
+        latencies.append(time.perf_counter() - submitted)
+    return latencies, time.perf_counter() - started
+
+
+def report(label, latencies, wall, polls, read_seconds):
+    print(f"{label:<12} wall {wall:6.2f} s  per read median {np.median(latencies):5.2f} s "
+          f"(ready after {read_seconds:.2f} s)  p95 {np.percentile(latencies, 95):5.2f} s  polls {polls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=8)
+    parser.add_argument("--read-seconds", type=float, default=0.6, help="time until a stub Read succeeds")
+    parser.add_argument("--interval", type=float, default=1.5, help="fixed poll interval of the old loop")
+    parser.add_argument("--latency", type=float, default=20, help="stub server delay per POST in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 429/503")
+    args = parser.parse_args()
+
+    server, state = start_stub_server(port=0, latency_ms=args.latency, read_seconds=args.read_seconds,
+                                      fail_rate=args.fail_rate, retry_after=0)
+    base = f"http://127.0.0.1:{server.server_port}"
+    client = ProviderClient("bench", max_retries=5, backoff_base=0.05)
+
+    before = state.counts["requests"]
+    started = time.perf_counter()
+    latencies = run_fixed(client, base, args.operations, args.interval)
+    report("fixed", latencies, time.perf_counter() - started,
+           state.counts["requests"] - before - args.operations, args.read_seconds)
+
+    multiplexer = AzureReadMultiplexer(client)
+    before = state.counts["requests"]
+    latencies, wall = run_multiplexed(client, base, args.operations, multiplexer)
+    report("multiplexed", latencies, wall, multiplexer.stats()["polls"], args.read_seconds)
+    print(multiplexer.format_stats())
+    print(f"stub totals: {state.counts['requests']} requests, {state.counts['failures']} injected failures")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
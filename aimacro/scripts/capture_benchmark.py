@@ -0,0 +1,54 @@
+"""
+Compare screen capture backends (MIT-SHM vs pyautogui) on the current display.
+
+Works headless under Xvfb, e.g.:
+    xvfb-run -s "-screen 0 1920x1080x24" python -m aimacro.scripts.capture_benchmark
+"""
+import sys
+import time
+import argparse
+import numpy as np
+
+from aimacro.utils.screen_capture import ScreenCapture
+
+
+def time_backend(capture, rounds):
+    """Return (frame array, per-grab latencies in ms) for `rounds` forced grabs."""
+    latencies = []
+    frame = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        frame = capture.grab(max_age=0)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return frame.array, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=30, help="grabs per backend")
+    args = parser.parse_args()
+
+    results = {}
+    for backend in ("xshm", "pyautogui"):
+        capture = ScreenCapture(max_age=0, backend=backend)
+        if capture.backend != backend:
+            print(f"{backend}: not available on this display")
+            continue
+        array, latencies = time_backend(capture, args.rounds)
+        results[backend] = array
+        print(f"{backend:>10}: {array.shape[1]}x{array.shape[0]}  "
+              f"median {np.median(latencies):.2f} ms  p95 {np.percentile(latencies, 95):.2f} ms")
+
+    if len(results) == 2:
+        a, b = results["xshm"], results["pyautogui"]
+        if a.shape != b.shape:
+            print(f"Frame size mismatch: xshm {a.shape} vs pyautogui {b.shape}")
+            return 1
+        diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).max()
+        print(f"Max pixel difference between backends: {diff}")
+        return 0 if diff == 0 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
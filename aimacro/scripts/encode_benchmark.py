@@ -0,0 +1,86 @@
+"""
+Measure the Image AI capture-to-payload pipeline, old chain versus single encode.
+
+Old: PNG encode -> base64 -> upscale_min_size (decode, PNG, base64) -> Azure decodes base64 again.
+New: ensure_min_size on the PIL image -> one PNG encode (+ base64 only for JSON bodies).
+
+    python -m aimacro.scripts.encode_benchmark --rounds 20
+"""
+import sys
+import time
+import base64
+import argparse
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from aimacro.utils.image_encoding import ensure_min_size, encode_image, encode_image_base64, to_array
+
+SIZES = [(120, 32), (400, 120), (800, 600), (1920, 1080)]
+
+
+def old_chain(region, provider):
+    """Returns (payload, encoded bytes produced along the way)."""
+    screenshot = Image.fromarray(region)
+    buffered = BytesIO()
+    screenshot.save(buffered, format="PNG")
+    first = base64.b64encode(buffered.getvalue()).decode()
+    img = Image.open(BytesIO(base64.b64decode(first)))
+    img = ensure_min_size(img, (50, 50))
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    second = base64.b64encode(buf.getvalue()).decode("ascii")
+    produced = len(buffered.getvalue()) + len(first) + len(buf.getvalue()) + len(second)
+    if provider == "azure":
+        payload = base64.b64decode(second)
+        produced += len(payload)
+    elif provider == "local":
+        payload = np.array(Image.open(BytesIO(base64.b64decode(second))))
+    else:
+        payload = second
+    return payload, produced
+
+
+def new_chain(region, provider):
+    screenshot = ensure_min_size(Image.fromarray(region), (50, 50))
+    if provider == "azure":
+        payload = encode_image(screenshot)
+        return payload, len(payload)
+    if provider == "local":
+        payload = to_array(screenshot)
+        return payload, 0
+    payload = encode_image_base64(screenshot)
+    return payload, len(payload) * 7 // 4  # PNG bytes plus their base64 text
+
+
+def timed(func, rounds):
+    times, result = [], None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return result, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'region':>10} {'provider':>8} {'old ms':>8} {'new ms':>8} {'old KiB':>9} {'new KiB':>9}")
+    for width, height in SIZES:
+        # UI-like content: flat areas with some text-like noise
+        region = np.full((height, width, 3), 235, np.uint8)
+        region[height // 4: height // 2, : width // 2] = rng.integers(0, 255, (height // 2 - height // 4, width // 2, 3))
+        for provider in ("chatgpt", "azure", "local"):
+            (old_payload, old_bytes), old_ms = timed(lambda: old_chain(region, provider), args.rounds)
+            (new_payload, new_bytes), new_ms = timed(lambda: new_chain(region, provider), args.rounds)
+            print(f"{width}x{height:<5} {provider:>8} {old_ms:>8.2f} {new_ms:>8.2f} "
+                  f"{old_bytes / 1024:>9.1f} {new_bytes / 1024:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Scaling benchmark for tiled template matching.
+
+Matches synthetic patterns against synthetic screens of several sizes with
+1..N worker threads and prints the speedup over a single-threaded match.
+Also checks that the tiled result equals the single full-area match.
+
+    python -m aimacro.scripts.match_benchmark --rounds 5
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+
+from aimacro.utils.pattern_utils import match_pattern, match_pattern_tiled
+
+SCREENS = [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+PATTERNS = [24, 64, 160]
+
+
+def make_screen(width, height, rng):
+    """Smooth-ish random grayscale screen, closer to real UI content than white noise."""
+    noise = rng.integers(0, 255, (height // 8 + 1, width // 8 + 1), dtype=np.uint8)
+    screen = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    return cv2.add(screen, rng.integers(0, 16, (height, width), dtype=np.uint8))
+
+
+def timed(func, rounds):
+    """Return (last result, median ms) of `rounds` calls."""
+    times = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return result, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="timed runs per configuration")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    worker_counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+    print(f"CPU cores: {os.cpu_count()}  OpenCV threads: {cv2.getNumThreads()}")
+    print(f"{'screen':>10} {'pattern':>8} {'1 thread':>10} " + " ".join(f"{w:>4}w x" for w in worker_counts[1:]))
+
+    mismatches = 0
+    for width, height in SCREENS:
+        screen = make_screen(width, height, rng)
+        for size in PATTERNS:
+            y, x = height // 3, width // 2
+            pattern = screen[y:y + size, x:x + size].copy()
+            expected, base_ms = timed(lambda: match_pattern(screen, pattern), args.rounds)
+            speedups = []
+            for workers in worker_counts[1:]:
+                result, ms = timed(lambda: match_pattern_tiled(screen, pattern, workers, min_tile_pixels=0), args.rounds)
+                if result[1] != expected[1] or abs(result[0] - expected[0]) > 1e-4:
+                    mismatches += 1
+                speedups.append(base_ms / ms)
+            print(f"{width}x{height:<5} {size:>6}px {base_ms:>8.1f}ms " + " ".join(f"{s:>6.2f}" for s in speedups))
+
+    if mismatches:
+        print(f"{mismatches} tiled results differ from the single full-area match")
+        return 1
+    print("All tiled results match the single full-area match.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Compare float32 and int8-quantized local OCR on a corpus of saved captures.
+
+Collect a corpus by setting "ocr_corpus_dir" in storage/settings.json and
+running the macro, or drop PNG region captures into a folder. An optional
+labels JSON file ({"file.png": "expected text", ...}) enables accuracy.
+
+    python -m aimacro.scripts.ocr_quantize_compare storage/ocr_corpus --labels labels.json --mode recognize
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from PIL import Image
+
+from aimacro.services.ocr_engine import OcrEngineManager
+
+
+def run_variant(quantize, images, args):
+    """Return (load seconds, {file: text}, {file: median ms}) for one precision."""
+    engine = OcrEngineManager(quantize=quantize)
+    started = time.perf_counter()
+    with engine.reader(args.languages):
+        pass  # loads the readers
+    load_seconds = time.perf_counter() - started
+
+    kwargs = {"allowlist": args.allowlist} if args.allowlist else {}
+    texts, times = {}, {}
+    for name, array in images.items():
+        samples = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            results = engine.run(args.mode, array, args.languages, **kwargs)
+            samples.append((time.perf_counter() - started) * 1000)
+        texts[name] = "\n".join(r[1] for r in results).strip()
+        times[name] = float(np.median(samples))
+    return load_seconds, texts, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=os.path.join("storage", "ocr_corpus"), help="folder of PNG captures")
+    parser.add_argument("--labels", help="JSON file mapping file names to expected text")
+    parser.add_argument("--mode", choices=["readtext", "recognize"], default="readtext")
+    parser.add_argument("--allowlist", help="restrict recognized characters, e.g. 0123456789")
+    parser.add_argument("--languages", nargs="+", default=["en"])
+    parser.add_argument("--rounds", type=int, default=3, help="timed runs per image")
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(args.corpus) if f.lower().endswith(".png"))
+    if not files:
+        print(f"No PNG captures in {args.corpus}")
+        return 1
+    images = {}
+    for name in files:
+        image = Image.open(os.path.join(args.corpus, name))
+        images[name] = np.array(image.convert("L") if args.mode == "recognize" else image.convert("RGB"))
+    labels = {}
+    if args.labels:
+        with open(args.labels, encoding="utf-8") as f:
+            labels = json.load(f)
+
+    print(f"{len(images)} captures, mode {args.mode}, {args.rounds} rounds each")
+    outputs = {}
+    for label, quantize in (("fp32", False), ("int8", True)):
+        load_seconds, texts, times = run_variant(quantize, images, args)
+        outputs[label] = texts
+        line = (f"{label}: load {load_seconds:.2f}s, median {np.median(list(times.values())):.1f} ms, "
+                f"p95 {np.percentile(list(times.values()), 95):.1f} ms")
+        if labels:
+            scored = [name for name in images if name in labels]
+            correct = sum(texts[name] == labels[name] for name in scored)
+            line += f", accuracy {correct}/{len(scored)}"
+        print(line)
+
+    differing = [name for name in images if outputs["fp32"][name] != outputs["int8"][name]]
+    print(f"Variants agree on {len(images) - len(differing)}/{len(images)} captures")
+    for name in differing:
+        print(f"  {name}: fp32 {outputs['fp32'][name]!r} vs int8 {outputs['int8'][name]!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
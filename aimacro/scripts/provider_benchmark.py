@@ -0,0 +1,77 @@
+"""
+Measure AI provider call overhead against the local stub server.
+
+Compares one-off requests.post calls (a new connection each time) with the
+pooled ProviderClient, then runs send_to_chatgpt / send_to_azure end to end
+and reports how many connections the stub saw.
+
+    python -m aimacro.scripts.provider_benchmark --calls 50 --latency 20
+"""
+import sys
+import time
+import base64
+import argparse
+from io import BytesIO
+
+import numpy as np
+import requests
+from PIL import Image
+
+from aimacro.scripts.api_stub_server import start_stub_server
+from aimacro.services.http_client import ProviderClient
+from aimacro.services.ai_services import send_to_chatgpt, send_to_azure
+
+
+def timed_calls(func, calls):
+    times = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def report(label, times, state, connections_before):
+    print(f"{label:<28} median {np.median(times):7.2f} ms  p95 {np.percentile(times, 95):7.2f} ms  "
+          f"connections {state.counts['connections'] - connections_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=20, help="stub server delay per POST in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, state = start_stub_server(port=0, latency_ms=args.latency, read_polls=2, fail_rate=args.fail_rate,
+                                      retry_after=0)
+    base = f"http://127.0.0.1:{server.server_port}"
+    url = f"{base}/v1/chat/completions"
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+
+    before = state.counts["connections"]
+    report("requests.post (no pooling)", timed_calls(lambda: requests.post(url, json=payload, timeout=10), args.calls),
+           state, before)
+    client = ProviderClient("bench", max_retries=3, backoff_base=0.05)
+    before = state.counts["connections"]
+    report("ProviderClient.post", timed_calls(lambda: client.post(url, json=payload, timeout=10), args.calls),
+           state, before)
+
+    buffered = BytesIO()
+    Image.new("RGB", (120, 40), "white").save(buffered, format="PNG")
+    image = base64.b64encode(buffered.getvalue()).decode()
+    settings = {"chatgpt_api_key": "stub", "openai_base_url": f"{base}/v1", "azure_endpoint": base,
+                "azure_api_key": "stub", "ai_cache_enabled": False, "http_backoff_base": 0.05}
+    before = state.counts["connections"]
+    report("send_to_chatgpt", timed_calls(lambda: send_to_chatgpt(image, settings), args.calls), state, before)
+    before = state.counts["connections"]
+    report("send_to_azure (read)", timed_calls(
+        lambda: send_to_azure(image, settings, feature="read", read_poll_interval=0.01), args.calls), state, before)
+
+    print(f"stub totals: {state.counts['requests']} requests, {state.counts['failures']} injected failures")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,100 @@
 """
 AI service integrations for image processing.
-Supports ChatGPT Vision API, Azure Computer Vision, and Local OCR.
+Supports ChatGPT Vision API, Azure Computer Vision, Local OCR and Glyph OCR.
 """
-import base64
 import time
+import base64
 import requests
 import json
-from io import BytesIO
-from PIL import Image
+
+from .ocr_engine import get_ocr_engine
+from .ocr_workers import get_ocr_worker_pool
+from .glyph_ocr import get_glyph_ocr
+from .response_cache import get_response_cache
+from .http_client import get_provider_client, cap_timeout, time_left
+from .azure_read import get_azure_read_multiplexer
+from .chat_stream import compile_stop_pattern, read_chat_stream, get_stream_stats
+from ..utils.logger import verbose
+from ..utils.image_encoding import to_array, to_pil_image, prepare_upload, image_digest, build_mosaic, band_of
+
+# Prefixes of the error strings the send_to_* functions return instead of raising
+ERROR_PREFIXES = (
+    "ChatGPT API key is missing", "Unexpected response format", "API request failed",
+    "An unexpected error occurred", "Image decode error", "Unsupported feature", "JSON parsing error",
+    "easyocr library not installed", "Local OCR error", "Glyph OCR error", "Unknown provider",
+)
+
+
+def is_error_result(text):
+    """Return True if a provider result is one of the error strings rather than real output."""
+    return str(text).startswith(ERROR_PREFIXES)
+
+
+def cached_response(settings, provider, variant, prompt, image, request):
+    """
+    Return a stored response for this image/provider/variant/prompt, or call
+    `request()` and store its result if it is a successful text answer.
+    """
+    cache = get_response_cache(settings)
+    if cache is None:
+        return request()
+    key = cache.make_key(image_digest(image), provider, variant, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        verbose(f"{provider} response served from the response cache")
+        return cached
+    result = request()
+    if isinstance(result, str) and not is_error_result(result):
+        cache.put(key, provider, variant, result)
+    return result
+
+
+# Azure Computer Vision v3.2 input limits (legacy OCR accepts at most 4200 px per side)
+AZURE_MIN_SIZE = (50, 50)
+AZURE_MAX_SIZE = {"ocr": (4200, 4200)}
+AZURE_DEFAULT_MAX_SIZE = (10000, 10000)
+AZURE_MAX_BYTES = 4 * 1024 * 1024
+AZURE_API_VERSION = "v3.2"
+
+
+def upload_options(settings, overrides=None):
+    """
+    Resolve upload format, quality, max dimension and OpenAI detail level:
+    per-event `overrides` first, then the vision_upload_* / openai_image_detail settings.
+    """
+    overrides = overrides or {}
+    return {
+        "format": str(overrides.get("format") or settings.get("vision_upload_format") or "PNG").upper(),
+        "quality": int(overrides.get("quality") or settings.get("vision_upload_quality") or 85),
+        "max_dim": int(overrides.get("max_dim", settings.get("vision_max_dimension", 0)) or 0),
+        "detail": overrides.get("detail") or settings.get("openai_image_detail") or "auto",
+    }
 
 
-def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", model="gpt-4o", max_tokens=300, timeout=30):
+def send_to_chatgpt(image, settings, prompt="What's in this image?", model="gpt-4o", max_tokens=300, timeout=30,
+                    upload=None, deadline=None, stream=None, stop_pattern=None):
     """
     Sends an image and a prompt to OpenAI's ChatGPT with Vision API.
+    Answers are kept in the persistent response cache (see response_cache.py).
 
     Required `settings` keys:
       - chatgpt_api_key: Your OpenAI API key.
 
     Args:
-      - image_base64: The base64-encoded string of the image.
+      - image: PIL image, NumPy array or base64 PNG string (encoded once, only if needed).
       - settings: The application settings dictionary.
       - prompt: The text prompt to send along with the image.
       - model: The model to use (e.g., "gpt-4o", "gpt-4-vision-preview").
       - max_tokens: The maximum number of tokens to generate in the response.
       - timeout: The request timeout in seconds.
+      - upload: Optional overrides for format, quality, max_dim and detail (see upload_options).
+      - deadline: Optional time.monotonic() value the whole call must finish by; timeouts and
+                  retries shrink to the time left.
+      - stream: Receive the answer as server-sent events (None = `upload["stream"]`, then
+                the chatgpt_stream setting).
+      - stop_pattern: Regex; when streaming, the answer is cut off as soon as it matches and
+                      the text up to the end of the match is returned (None = `upload["stop"]`,
+                      then the chatgpt_stop_pattern setting; "" = never stop early).
 
     Returns:
       - On success: The text content from the model's response.
@@ -32,6 +103,33 @@ def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", mode
     api_key = settings.get("chatgpt_api_key")
     if not api_key or api_key == "-":
         return "ChatGPT API key is missing or not set in settings."
+    base_url = (settings.get("openai_base_url") or "https://api.openai.com/v1").rstrip("/")
+    client = get_provider_client("chatgpt", settings)
+    opts = upload_options(settings, upload)
+    overrides = upload or {}
+    if stream is None:
+        stream = overrides.get("stream", settings.get("chatgpt_stream", False))
+    if stop_pattern is None:
+        stop_pattern = overrides.get("stop", settings.get("chatgpt_stop_pattern", ""))
+    stop = compile_stop_pattern(stop_pattern) if stream else None
+    variant = f"{base_url}/{model}/{max_tokens}/{opts['format']}/{opts['quality']}/{opts['max_dim']}/{opts['detail']}"
+    if stop is not None:
+        variant += f"/stop={stop.pattern}"  # an early stop can shorten the answer
+    return cached_response(settings, "chatgpt", variant, prompt, image,
+                           lambda: _request_chatgpt(client, base_url, image, api_key, prompt, model,
+                                                    max_tokens, timeout, opts, deadline, bool(stream), stop))
+
+
+def _request_chatgpt(client, base_url, image, api_key, prompt, model, max_tokens, timeout, opts, deadline=None,
+                     stream=False, stop=None):
+    """Make the ChatGPT Vision request (see send_to_chatgpt)."""
+    try:
+        data, mime, size = prepare_upload(image, opts["format"], opts["quality"], opts["max_dim"])
+    except Exception as e:
+        return f"Image decode error: {e}"
+    image_base64 = base64.b64encode(data).decode("ascii")
+    verbose(f"ChatGPT upload: {size[0]}x{size[1]} {opts['format']}, {len(data) / 1024:.1f} KiB "
+            f"({len(image_base64) / 1024:.1f} KiB as base64), detail {opts['detail']}")
 
     headers = {
         "Content-Type": "application/json",
@@ -39,7 +137,7 @@ def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", mode
     }
 
     # OpenAI expects the image in a specific URL format, even for base64
-    base64_image_url = f"data:image/png;base64,{image_base64}"
+    base64_image_url = f"data:{mime};base64,{image_base64}"
 
     payload = {
         "model": model,
@@ -54,7 +152,8 @@ def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", mode
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": base64_image_url
+                            "url": base64_image_url,
+                            "detail": opts["detail"]
                         }
                     }
                 ]
@@ -62,15 +161,28 @@ def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", mode
         ],
         "max_tokens": max_tokens
     }
+    if stream:
+        payload["stream"] = True
 
     try:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
+        started = time.perf_counter()
+        response = client.post(
+            f"{base_url}/chat/completions",
             headers=headers,
             json=payload,
-            timeout=timeout
+            timeout=timeout,
+            deadline=deadline,
+            rate_key=api_key,
+            stream=stream
         )
         response.raise_for_status()
+        if stream:
+            content, ttft, stopped = read_chat_stream(response, stop, started, deadline)
+            total = time.perf_counter() - started
+            get_stream_stats().record(ttft, total, stopped)
+            verbose(f"ChatGPT stream: first token after {(ttft or 0) * 1000:.0f} ms, "
+                    f"{'stopped early' if stopped else 'finished'} after {total * 1000:.0f} ms")
+            return content.strip() if content else "Empty response from ChatGPT."
         result = response.json()
 
         # Extract the content from the first choice
@@ -94,7 +206,8 @@ def send_to_chatgpt(image_base64, settings, prompt="What's in this image?", mode
         return f"An unexpected error occurred: {e}"
 
 
-def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_poll_timeout=20, read_poll_interval=1.5):
+def send_to_azure(image, settings, feature="ocr", *, timeout=30, read_poll_timeout=20, read_poll_interval=None,
+                  upload=None, deadline=None):
     """
     Perform analysis on an image using Azure Computer Vision (direct endpoint).
 
@@ -102,9 +215,18 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
       - azure_endpoint: e.g. "https://your-resource-name.cognitiveservices.azure.com/"
       - azure_api_key:  Key1 or Key2 from the SAME resource (your-resource-name)
 
+    `image` may be a PIL image, NumPy array or base64 PNG string; it is sent as raw bytes,
+    encoded once with the upload options (see upload_options; WebP is sent as JPEG since
+    Azure does not accept it) and resized into the service's 50 px minimum, maximum
+    dimensions and 4 MB limit.
+
     Supported features:
       - "ocr"   : Legacy OCR (one call). Deprecated by Microsoft but kept for compatibility.
-      - "read"  : Read 3.2 (two-step with polling). Recommended for OCR.
+      - "read"  : Read 3.2 (two-step with polling). Recommended for OCR. The operation is polled
+                  by the shared AzureReadMultiplexer (see azure_read.py); read_poll_interval is the
+                  first poll delay (None = azure_read_first_interval), later polls back off.
+
+    `deadline` (time.monotonic() value) bounds the whole call, Read polling included.
       - "describe": Returns a single caption string (if available).
       - "analyze" : Returns tags & categories (basic extraction demo).
 
@@ -112,6 +234,8 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
       - On success: feature-specific value (see below)
       - On HTTP error: "API request failed: <...>"
       - On parse error: "JSON parsing error: <...>"
+
+    Text answers are kept in the persistent response cache (see response_cache.py).
     """
 
     endpoint = (settings.get("azure_endpoint") or "").strip()
@@ -125,16 +249,35 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
     if endpoint.endswith("/"):
         endpoint = endpoint[:-1]
 
+    client = get_provider_client("azure", settings)
+    opts = upload_options(settings, upload)
+    if opts["format"] == "WEBP":
+        opts["format"] = "JPEG"
+    # Endpoint and API version are part of the key: another resource or region may answer differently
+    variant = f"{endpoint.lower()}/{AZURE_API_VERSION}/{feature}/{opts['format']}/{opts['quality']}/{opts['max_dim']}"
+    reader = get_azure_read_multiplexer(settings) if feature == "read" else None
+    return cached_response(settings, "azure", variant, "", image,
+                           lambda: _request_azure(client, image, endpoint, key, feature, timeout,
+                                                  read_poll_timeout, read_poll_interval, opts, reader, deadline))
+
+
+def _request_azure(client, image, endpoint, key, feature, timeout, read_poll_timeout, read_poll_interval, opts,
+                   reader=None, deadline=None):
+    """Make the Azure Computer Vision request(s) (see send_to_azure)."""
     # Build base URLs safely
     def u(path):
         # path should NOT start with slash to avoid urljoin quirks across domains
         return f"{endpoint}/{path}"
 
-    # Decode base64 image once
+    # Encode once, straight to the bytes Azure wants (no base64 round trip)
     try:
-        image_bytes = base64.b64decode(image_base64)
+        image_bytes, _, size = prepare_upload(image, opts["format"], opts["quality"], opts["max_dim"],
+                                              min_size=AZURE_MIN_SIZE,
+                                              max_size=AZURE_MAX_SIZE.get(feature, AZURE_DEFAULT_MAX_SIZE),
+                                              max_bytes=AZURE_MAX_BYTES)
     except Exception as e:
         return f"Image decode error: {e}"
+    verbose(f"Azure upload: {size[0]}x{size[1]} {opts['format']}, {len(image_bytes) / 1024:.1f} KiB")
 
     # Common headers for key auth
     bin_headers = {"Ocp-Apim-Subscription-Key": key, "Content-Type": "application/octet-stream"}
@@ -143,9 +286,10 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
     try:
         if feature == "read":
             # --- Read 3.2 (recommended) ---
-            submit_url = u("vision/v3.2/read/analyze")
+            submit_url = u(f"vision/{AZURE_API_VERSION}/read/analyze")
             # You can send bytes (octet-stream) or a JSON URL payload. We'll send bytes:
-            resp = requests.post(submit_url, headers=bin_headers, data=image_bytes, timeout=timeout)
+            resp = client.post(submit_url, headers=bin_headers, data=image_bytes, timeout=timeout,
+                               deadline=deadline, rate_key=key)
             resp.raise_for_status()
 
             # Poll the Operation-Location
@@ -159,36 +303,16 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
                 # Return what we have to help debug
                 return {"warning": "Operation-Location header missing", "submit_response": j}
 
-            # Poll until succeeded/failed or timeout
-            deadline = time.time() + read_poll_timeout
-            while True:
-                poll = requests.get(op_loc, headers={"Ocp-Apim-Subscription-Key": key}, timeout=timeout)
-                poll.raise_for_status()
-                j = poll.json()
-                status = j.get("status")
-                if status in ("succeeded", "failed"):
-                    if status == "succeeded":
-                        # Return lines joined for convenience; also return raw if you want it
-                        lines = []
-                        try:
-                            for page in j["analyzeResult"]["readResults"]:
-                                for line in page.get("lines", []):
-                                    txt = line.get("text", "")
-                                    if txt:
-                                        lines.append(txt)
-                        except Exception:
-                            pass
-                        return "\n".join(lines) if lines else j  # fall back to raw if nothing parsed
-                    else:
-                        return j  # failed with details
-                if time.time() > deadline:
-                    return {"error": "READ polling timed out", "last_response": j}
-                time.sleep(read_poll_interval)
+            # Polled together with every other operation in flight until succeeded/failed or timeout
+            future = reader.track(op_loc, key, first_interval=read_poll_interval,
+                                  poll_timeout=read_poll_timeout, timeout=timeout, deadline=deadline)
+            return reader.wait(future, timeout=timeout, poll_timeout=read_poll_timeout, deadline=deadline)
 
         elif feature == "ocr":
             # --- Legacy OCR endpoint (kept for compatibility) ---
-            url = u("vision/v3.2/ocr")
-            resp = requests.post(url, headers=bin_headers, data=image_bytes, timeout=timeout)
+            url = u(f"vision/{AZURE_API_VERSION}/ocr")
+            resp = client.post(url, headers=bin_headers, data=image_bytes, timeout=timeout,
+                               deadline=deadline, rate_key=key)
             resp.raise_for_status()
             j = resp.json()
 
@@ -203,8 +327,9 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
 
         elif feature == "describe":
             # Simple caption using Describe
-            url = u("vision/v3.2/describe")
-            resp = requests.post(url, headers=bin_headers, data=image_bytes, timeout=timeout)
+            url = u(f"vision/{AZURE_API_VERSION}/describe")
+            resp = client.post(url, headers=bin_headers, data=image_bytes, timeout=timeout,
+                               deadline=deadline, rate_key=key)
             resp.raise_for_status()
             j = resp.json()
             return j.get("description", {}).get("captions", [{}])[0].get("text", "Description not found")
@@ -212,9 +337,10 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
         elif feature == "analyze":
             # Minimal example: call analyze and return tags/categories if present.
             # NOTE: Visual features are usually provided via query params; here we let service infer.
-            url = u("vision/v3.2/analyze")
+            url = u(f"vision/{AZURE_API_VERSION}/analyze")
             # Without visualFeatures param, the service may return limited info; adapt as needed:
-            resp = requests.post(url, headers=bin_headers, data=image_bytes, timeout=timeout)
+            resp = client.post(url, headers=bin_headers, data=image_bytes, timeout=timeout,
+                               deadline=deadline, rate_key=key)
             resp.raise_for_status()
             j = resp.json()
             tags = [t.get("name", "") for t in j.get("tags", [])]
@@ -239,42 +365,48 @@ def send_to_azure(image_base64, settings, feature="ocr", *, timeout=30, read_pol
         return f"JSON parsing error: {e}"
 
 
-def send_to_local_ocr(image_base64, settings, timeout=30):
+def send_to_local_ocr(image, settings, timeout=30, recognize_only=False, allowlist=None, quantize=None,
+                      deadline=None):
     """
     Perform OCR on an image using EasyOCR (local, no external binaries needed).
+    Readers come from the shared OcrEngineManager, so models are loaded once
+    per language set instead of on every call. With local_ocr_workers > 0 the
+    work runs in OcrWorkerPool processes instead.
     
     Args:
-      - image_base64: The base64-encoded string of the image.
-      - settings: The application settings dictionary (not used for local OCR).
-      - timeout: The request timeout in seconds (not used for local OCR).
+      - image: PIL image, NumPy array or base64 string (arrays are used as they are).
+      - settings: The application settings dictionary (local_ocr_languages, local_ocr_gpu,
+                  local_ocr_readers, local_ocr_workers).
+      - timeout: Maximum time in seconds to wait for a free reader/worker and for its answer.
+      - recognize_only: Skip text detection and read the whole image as one line
+                        (for small fixed fields such as counters or prices).
+      - allowlist: Optional string of the only characters the recognizer may output, e.g. "0123456789".
+      - quantize: Use the int8 (True) or float32 (False) recognizer; None follows local_ocr_quantize.
+      - deadline: Optional time.monotonic() value; the timeout shrinks to the time left.
     
     Returns:
       - On success: The extracted text from the image.
       - On error: An error message string.
     """
     try:
-        import easyocr
-        from PIL import Image
-        import base64
-        from io import BytesIO
         import numpy as np
         
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_base64)
-        image_buffer = BytesIO(image_bytes)
-        image = Image.open(image_buffer)
-        
-        # Convert PIL Image to numpy array (EasyOCR requires numpy array)
-        image_array = np.array(image)
+        timeout = cap_timeout(timeout, time_left(deadline))
+        # EasyOCR requires a numpy array; no encoding is involved
+        image_array = to_array(image)
+        if recognize_only and image_array.ndim == 3:
+            image_array = np.asarray(to_pil_image(image_array).convert("L"))
+        method = "recognize" if recognize_only else "readtext"
+        kwargs = {"allowlist": allowlist} if allowlist else {}
         
-        # Initialize EasyOCR reader (lazy loading - models download on first use)
-        # Using English by default, can be extended to support other languages
-        # Set gpu=True if you have CUDA available for faster processing
-        reader = easyocr.Reader(['en'], gpu=False)
-        
-        # Perform OCR using EasyOCR
+        # Perform OCR in a worker process or with an in-process pooled reader
         # EasyOCR returns list of (bbox, text, confidence)
-        results = reader.readtext(image_array)
+        if int(settings.get("local_ocr_workers", 0) or 0) > 0:
+            results = get_ocr_worker_pool(settings, quantize).run(image_array, method=method, timeout=timeout, **kwargs)
+        else:
+            languages = settings.get("local_ocr_languages") or ["en"]
+            results = get_ocr_engine(settings).run(method, image_array, languages, timeout=timeout,
+                                                   quantize=quantize, **kwargs)
         
         # Extract text from results
         text_lines = [result[1] for result in results]  # result[1] is the text
@@ -293,3 +425,100 @@ def send_to_local_ocr(image_base64, settings, timeout=30):
     except Exception as e:
         return f"Local OCR error: {e}"
 
+
+def send_to_glyph_ocr(image, font, allowlist=None):
+    """
+    Read a fixed-font field with trained glyph templates (see glyph_ocr.py).
+
+    Args:
+      - image: PIL image or NumPy array of the field (no base64 round trip).
+      - font: Name of the trained font (storage/glyphs/<font>.npz).
+      - allowlist: Optional string of the only characters to consider.
+
+    Returns:
+      - On success: The text read from the field.
+      - On error: An error message string.
+    """
+    try:
+        text, _ = get_glyph_ocr().read(font, image, allowlist=allowlist)
+        return text if text else "Text not found"
+    except Exception as e:
+        return f"Glyph OCR error: {e}"
+
+
+def send_batch_to_local_ocr(crops, settings, timeout=30, recognize_only=False, allowlist=None, quantize=None,
+                            deadline=None):
+    """
+    Read several regions with one Local OCR call and return one text per region.
+
+    The crops are stacked into a mosaic. In recognize mode every crop becomes one box of a
+    single batched recognizer call; otherwise text detection runs once on the mosaic and the
+    detected lines are split back per crop by position.
+    """
+    try:
+        import numpy as np
+
+        timeout = cap_timeout(timeout, time_left(deadline))
+        mosaic, bands = build_mosaic(crops)
+        if recognize_only and mosaic.ndim == 3:
+            mosaic = np.asarray(to_pil_image(mosaic).convert("L"))
+        kwargs = {"allowlist": allowlist} if allowlist else {}
+        if recognize_only:
+            method = "recognize"
+            kwargs.update(horizontal_list=[[x1, x2, y1, y2] for x1, y1, x2, y2 in bands], free_list=[],
+                          batch_size=len(bands))
+        else:
+            method = "readtext"
+
+        if int(settings.get("local_ocr_workers", 0) or 0) > 0:
+            results = get_ocr_worker_pool(settings, quantize).run(mosaic, method=method, timeout=timeout, **kwargs)
+        else:
+            languages = settings.get("local_ocr_languages") or ["en"]
+            results = get_ocr_engine(settings).run(method, mosaic, languages, timeout=timeout,
+                                                   quantize=quantize, **kwargs)
+
+        lines = [[] for _ in bands]
+        for box, text, _ in results:
+            if text:
+                lines[band_of(box, bands)].append(text)
+        return ["\n".join(found).strip() or "Text not found" for found in lines]
+
+    except ImportError:
+        return ["easyocr library not installed. Please install it with: pip install easyocr"] * len(crops)
+    except Exception as e:
+        return [f"Local OCR error: {e}"] * len(crops)
+
+
+def split_batch_answer(answer, count):
+    """Split a model answer for a mosaic into `count` texts (JSON array, else one line per field)."""
+    if is_error_result(answer):
+        return [answer] * count
+    start, end = answer.find("["), answer.rfind("]")
+    if start != -1 and end > start:
+        try:
+            values = json.loads(answer[start:end + 1])
+            if isinstance(values, list) and len(values) == count:
+                return [str(value).strip() or "Text not found" for value in values]
+        except ValueError:
+            pass
+    lines = [line.strip() for line in answer.splitlines() if line.strip()]
+    if len(lines) == count:
+        return lines
+    return [f"Unexpected response format from ChatGPT: {answer}"] * count
+
+
+def send_batch_to_chatgpt(crops, settings, prompt="", upload=None, **kwargs):
+    """
+    Read several regions with one ChatGPT Vision request on a mosaic of the crops.
+
+    The model is asked for a JSON array with one string per region, top to bottom,
+    which is split back into one text per region.
+    """
+    count = len(crops)
+    mosaic, _ = build_mosaic(crops)
+    instruction = (f"The image shows {count} separate screen fields stacked top to bottom, "
+                   f"separated by empty bands. {prompt.strip() or 'Read the text in each field.'} "
+                   f"Answer only with a JSON array of exactly {count} strings, one per field, top to bottom.")
+    kwargs["stop_pattern"] = ""  # the JSON array is needed whole
+    answer = send_to_chatgpt(mosaic, settings, prompt=instruction, upload=upload, **kwargs)
+    return split_batch_answer(answer, count)
@@ -0,0 +1,251 @@
+"""
+Azure Read 3.2 operation multiplexer.
+Read is asynchronous: a POST returns an Operation-Location that has to be
+polled until the text is ready. Instead of every caller sleeping on its own
+fixed interval, operations are registered here and one background thread
+schedules polls for all of them on an adaptive schedule (short first
+interval, then backoff, Retry-After honoured), resolving a Future per
+operation. The GETs themselves run on a few poll threads, so one slow poll
+does not hold up the others.
+"""
+import time
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import requests
+
+from .http_client import RETRY_STATUSES, DeadlineExceeded, parse_retry_after, get_provider_client, time_left
+from ..utils.logger import verbose
+
+
+def read_result_text(result):
+    """Join the lines of a succeeded Read result; return the raw JSON if nothing could be parsed."""
+    lines = []
+    try:
+        for page in result["analyzeResult"]["readResults"]:
+            for line in page.get("lines", []):
+                if line.get("text"):
+                    lines.append(line["text"])
+    except Exception:
+        pass
+    return "\n".join(lines) if lines else result
+
+
+class _Operation:
+    def __init__(self, url, key, interval, deadline, timeout):
+        self.url = url
+        self.key = key
+        self.interval = interval
+        self.deadline = deadline
+        self.timeout = timeout
+        self.started = time.perf_counter()
+        self.polls = 0
+        self.future = Future()
+
+
+class AzureReadMultiplexer:
+    """Poll any number of in-flight Read operations from one scheduler and a few poll threads."""
+
+    def __init__(self, client, first_interval=0.25, backoff=1.5, max_interval=2.0, poll_timeout=20.0, poll_workers=4):
+        """
+        Args:
+            client: ProviderClient used for the GET polls (shares the Azure connection pool).
+            first_interval: Delay before the first poll of an operation, in seconds.
+            backoff: Factor the delay grows by after every "running" answer.
+            max_interval: Largest delay between two polls of one operation.
+            poll_timeout: Default time an operation may stay unfinished before it fails.
+            poll_workers: GETs sent at the same time; a hung poll only holds up its own thread.
+        """
+        self.client = client
+        self.first_interval = float(first_interval)
+        self.backoff = max(1.0, float(backoff))
+        self.max_interval = float(max_interval)
+        self.poll_timeout = float(poll_timeout)
+        self._queue = []  # heap of (next poll time, sequence, operation)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._polling = 0  # polls running on the poll threads
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(poll_workers)), thread_name_prefix="azure-read-poll")
+        self.reset_stats()
+
+    def track(self, operation_url, key, first_interval=None, poll_timeout=None, timeout=30, deadline=None):
+        """
+        Start polling an Operation-Location returned by read/analyze.
+
+        The operation gives up after `poll_timeout` seconds or at `deadline` (time.monotonic()
+        value), whichever comes first; each GET timeout is capped to the time left.
+
+        Returns a Future resolving to the joined text lines (or the raw JSON when nothing
+        was parsed or the operation failed); polling errors resolve to "API request failed: ..."
+        strings like the other Azure calls.
+        """
+        now = time.monotonic()
+        interval = self.first_interval if first_interval is None else float(first_interval)
+        limit = self.poll_timeout if poll_timeout is None else float(poll_timeout)
+        operation = _Operation(operation_url, key, interval, min(now + limit, deadline or float("inf")), timeout)
+        with self._cond:
+            self._stats["operations"] += 1
+        self._schedule(operation, now + interval)
+        return operation.future
+
+    def _schedule(self, operation, due):
+        """Queue the next poll of `operation` at `due` (time.monotonic()), starting the scheduler if idle."""
+        with self._cond:
+            heapq.heappush(self._queue, (due, next(self._sequence), operation))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="azure-read", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def wait(self, future, timeout=30, poll_timeout=None, deadline=None):
+        """
+        Wait for a Future from track() with the same limits it was tracked with, plus one
+        request `timeout` of grace for a poll still in flight; a timeout resolves to the
+        same error dict as a timed out operation.
+        """
+        limit = self.poll_timeout if poll_timeout is None else float(poll_timeout)
+        left = time_left(deadline)
+        if left is not None:
+            limit = min(limit, max(0.0, left))
+        grace = max(timeout) if isinstance(timeout, tuple) else (timeout or 0)
+        try:
+            return future.result(timeout=limit + grace)
+        except FutureTimeout:
+            return {"error": "READ polling timed out", "last_status": "no answer from the poll thread"}
+
+    def pending(self):
+        """Number of operations still being polled."""
+        with self._cond:
+            return len(self._queue) + self._polling
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    if not self._cond.wait(timeout=30):
+                        self._thread = None  # idle: exit; track() starts a new thread when needed
+                        return
+                due, _, operation = self._queue[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._queue)
+                self._polling += 1
+            self._pool.submit(self._run_poll, operation)
+
+    def _run_poll(self, operation):
+        """Poll thread: poll once, then hand the operation back to the scheduler unless it is resolved."""
+        try:
+            next_delay = self._poll(operation)
+        except Exception as e:
+            # One bad answer must resolve its own operation, never stall the others
+            next_delay = None
+            if not operation.future.done():
+                self._resolve(operation, f"API request failed: {type(e).__name__}: {e}", "failed")
+        with self._cond:
+            self._polling -= 1
+        if next_delay is not None:
+            self._schedule(operation, time.monotonic() + next_delay)
+
+    def _poll(self, operation):
+        """Poll one operation; return the delay until its next poll, or None once it is resolved."""
+        operation.polls += 1
+        with self._cond:
+            self._stats["polls"] += 1
+        try:
+            # No blocking retries in the shared loop: throttling is rescheduled below instead
+            response = self.client.get(operation.url, headers={"Ocp-Apim-Subscription-Key": operation.key},
+                                       timeout=operation.timeout, retries=0, deadline=operation.deadline,
+                                       rate_key=operation.key)
+            if response.status_code in RETRY_STATUSES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                with self._cond:
+                    self._stats["throttled"] += 1
+                return self._reschedule(operation, retry_after, f"HTTP {response.status_code}")
+            response.raise_for_status()
+            result = response.json()
+            if not isinstance(result, dict):
+                raise ValueError(f"unexpected Read result {str(result)[:100]!r}")
+        except DeadlineExceeded:
+            return self._resolve(operation, {"error": "READ polling timed out"}, "timed_out")
+        except requests.exceptions.RequestException as e:
+            return self._resolve(operation, f"API request failed: {e}", "failed")
+        except ValueError as e:
+            return self._resolve(operation, f"JSON parsing error: {e}", "failed")
+
+        status = result.get("status")
+        if status == "succeeded":
+            return self._resolve(operation, read_result_text(result))
+        if status == "failed":
+            return self._resolve(operation, result, "failed")
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        return self._reschedule(operation, retry_after, status)
+
+    def _reschedule(self, operation, retry_after, reason):
+        if time.monotonic() >= operation.deadline:
+            return self._resolve(operation, {"error": "READ polling timed out", "last_status": reason}, "timed_out")
+        operation.interval = min(self.max_interval, operation.interval * self.backoff)
+        delay = max(operation.interval, retry_after or 0.0)
+        return min(delay, max(0.0, operation.deadline - time.monotonic()))
+
+    def _resolve(self, operation, result, outcome=None):
+        elapsed = time.perf_counter() - operation.started
+        with self._cond:
+            self._stats["latency_total"] += elapsed
+            self._stats["finished"] += 1
+            if outcome:
+                self._stats[outcome] += 1
+        verbose(f"Azure Read finished in {elapsed:.2f}s after {operation.polls} polls")
+        operation.future.set_result(result)
+        return None
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run (operations in flight keep polling)."""
+        with self._cond:
+            self._stats = {"operations": 0, "finished": 0, "polls": 0, "throttled": 0, "failed": 0, "timed_out": 0,
+                           "latency_total": 0.0}
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            done = s["finished"]
+        s["polls_per_operation"] = s["polls"] / done if done else 0.0
+        s["latency_ms_avg"] = s["latency_total"] / done * 1000 if done else 0.0
+        return s
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"Azure Read: {s['operations']} operations, {s['polls_per_operation']:.1f} polls each, "
+                f"avg {s['latency_ms_avg']:.0f} ms, {s['throttled']} throttled, {s['failed']} failed, "
+                f"{s['timed_out']} timed out")
+
+
+# Global multiplexer (created from settings on first use)
+_multiplexer = None
+_multiplexer_lock = threading.Lock()
+
+
+def get_azure_read_multiplexer(settings=None):
+    """Get the shared Azure Read multiplexer."""
+    global _multiplexer
+    with _multiplexer_lock:
+        if _multiplexer is None:
+            settings = settings or {}
+            _multiplexer = AzureReadMultiplexer(
+                get_provider_client("azure", settings),
+                first_interval=settings.get("azure_read_first_interval", 0.25),
+                backoff=settings.get("azure_read_backoff", 1.5),
+                max_interval=settings.get("azure_read_max_interval", 2.0),
+                poll_workers=settings.get("azure_read_poll_workers", 4),
+            )
+        return _multiplexer
+
+
+def peek_azure_read_multiplexer():
+    """Return the multiplexer if one was created, without creating it."""
+    return _multiplexer
@@ -0,0 +1,130 @@
+"""
+Streaming (server-sent events) reader for OpenAI chat completions.
+With "stream": true the answer arrives as "data: {...}" lines carrying
+content deltas. The text is built up as it arrives, so a short answer can
+be taken as soon as a stop pattern matches instead of waiting for the model
+to finish writing, and time-to-first-token is measured per call.
+"""
+import re
+import json
+import time
+import threading
+
+from .http_client import DeadlineExceeded, time_left
+from ..utils.logger import verbose
+
+
+def compile_stop_pattern(pattern):
+    """Compile a stop pattern (regular expression); empty or invalid patterns disable early stop."""
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        verbose(f"Ignoring invalid stop pattern {pattern!r}: {e}")
+        return None
+
+
+def read_chat_stream(response, stop_pattern=None, started=None, deadline=None):
+    """
+    Consume an SSE chat completion response.
+
+    Args:
+        response: requests.Response opened with stream=True.
+        stop_pattern: Compiled regex; once it matches the text received so far, and at least
+                      one more character has arrived after the match, the connection is closed
+                      and the text up to the end of the match returned.
+        started: time.perf_counter() value the request was sent at (for time-to-first-token).
+        deadline: Optional time.monotonic() value; the read timeout only limits each socket
+                  read, so a server trickling tokens is cut off here once it passes.
+
+    Returns:
+        (text, ttft_seconds or None, stopped_early)
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the answer is complete.
+    """
+    started = started if started is not None else time.perf_counter()
+    parts = []
+    ttft = None
+    response.encoding = "utf-8"  # SSE is always UTF-8; requests would assume ISO-8859-1 for text/*
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            left = time_left(deadline)
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"ChatGPT stream: deadline exceeded after {len(''.join(parts))} characters")
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(delta)
+            if stop_pattern is not None:
+                text = "".join(parts)
+                match = stop_pattern.search(text)
+                # A match touching the end of what has arrived may still grow ("12" of "12345")
+                if match and match.end() < len(text):
+                    return text[:match.end()], ttft, True
+    finally:
+        response.close()  # stopping early drops the connection instead of reading the rest
+    return "".join(parts), ttft, False
+
+
+class StreamStats:
+    """Time-to-first-token and early-stop counters for streamed completions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run."""
+        with self._lock:
+            self._stats = {"streams": 0, "stopped_early": 0, "ttft_total": 0.0, "ttft_count": 0, "total": 0.0}
+
+    def record(self, ttft, total, stopped):
+        with self._lock:
+            self._stats["streams"] += 1
+            self._stats["stopped_early"] += int(stopped)
+            self._stats["total"] += total
+            if ttft is not None:
+                self._stats["ttft_total"] += ttft
+                self._stats["ttft_count"] += 1
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["ttft_ms_avg"] = s["ttft_total"] / s["ttft_count"] * 1000 if s["ttft_count"] else 0.0
+        s["latency_ms_avg"] = s["total"] / s["streams"] * 1000 if s["streams"] else 0.0
+        return s
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"ChatGPT streaming: {s['streams']} streams, avg first token {s['ttft_ms_avg']:.0f} ms, "
+                f"avg total {s['latency_ms_avg']:.0f} ms, {s['stopped_early']} stopped early")
+
+
+# Global stream statistics (created on first streamed call)
+_stream_stats = None
+_stream_stats_lock = threading.Lock()
+
+
+def get_stream_stats():
+    """Get the shared streaming statistics."""
+    global _stream_stats
+    with _stream_stats_lock:
+        if _stream_stats is None:
+            _stream_stats = StreamStats()
+        return _stream_stats
+
+
+def peek_stream_stats():
+    """Return the streaming statistics if any call streamed, without creating them."""
+    return _stream_stats
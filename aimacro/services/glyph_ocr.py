@@ -0,0 +1,206 @@
+"""
+Glyph-template OCR for fixed-font fields (counters, prices, status labels).
+Characters are segmented by column projection and classified by comparing
+them with templates learned from a few labeled captures. Templates are
+stored per font in storage/glyphs/<font>.npz.
+"""
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from ..utils.logger import verbose, info
+
+GLYPH_DIR = os.path.join("storage", "glyphs")
+GLYPH_SIZE = (16, 24)  # (width, height) every glyph is resized to before comparison
+
+
+class GlyphFont:
+    """Templates for one font: a matrix of normalized glyph vectors and their characters."""
+
+    def __init__(self, name, chars=None, templates=None):
+        self.name = name
+        self.chars = list(chars) if chars is not None else []
+        size = GLYPH_SIZE[0] * GLYPH_SIZE[1]
+        self.templates = templates if templates is not None else np.empty((0, size), np.float32)
+
+    @staticmethod
+    def path_for(name):
+        return os.path.join(GLYPH_DIR, f"{name}.npz")
+
+    @classmethod
+    def load(cls, name):
+        """Load a font from storage, or return an empty font if it was never trained."""
+        path = cls.path_for(name)
+        if not os.path.exists(path):
+            return cls(name)
+        data = np.load(path)
+        return cls(name, [str(c) for c in data["chars"]], data["templates"].astype(np.float32))
+
+    def save(self):
+        os.makedirs(GLYPH_DIR, exist_ok=True)
+        np.savez_compressed(self.path_for(self.name), chars=np.array(self.chars, dtype="U1"),
+                            templates=self.templates)
+        info(f"Saved {len(self.chars)} glyph templates for font '{self.name}'")
+
+    def add(self, vectors, chars):
+        """Append templates; a near-identical template for the same char is not stored twice."""
+        for vector, char in zip(vectors, chars):
+            same = [i for i, c in enumerate(self.chars) if c == char]
+            if same and np.max(self.templates[same] @ vector) > 0.995:
+                continue
+            self.chars.append(char)
+            self.templates = np.vstack([self.templates, vector[None, :]])
+
+
+def binarize(gray):
+    """Otsu threshold with text as 1s, whichever polarity the field uses."""
+    _, mask = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Text covers fewer pixels than the background
+    if mask.mean() > 0.5:
+        mask = 1 - mask
+    return mask
+
+
+def segment(mask):
+    """
+    Split a binary text line into glyphs by column projection.
+
+    Returns:
+        (line_mask, spans): the mask cropped to the rows holding ink, and a
+        list of (x_start, x_end) column ranges, one per glyph. A span of None
+        marks a space (a gap wider than half the line height).
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return mask[:0], []
+    line = mask[rows[0]:rows[-1] + 1]
+    ink = line.any(axis=0).astype(np.int8)
+    # Edges of the runs of inked columns
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], ink, [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    if starts.size == 0:
+        return line, []
+
+    space = max(2, line.shape[0] // 2)
+    spans = [(int(starts[0]), int(ends[0]))]
+    for start, end in zip(starts[1:], ends[1:]):
+        if start - spans[-1][1] >= space:
+            spans.append(None)
+        spans.append((int(start), int(end)))
+    return line, spans
+
+
+def vectorize(line, spans):
+    """Resize each glyph to GLYPH_SIZE and return them as zero-mean, unit-length row vectors."""
+    glyphs = [s for s in spans if s is not None]
+    vectors = np.empty((len(glyphs), GLYPH_SIZE[0] * GLYPH_SIZE[1]), np.float32)
+    for i, (start, end) in enumerate(glyphs):
+        glyph = cv2.resize(line[:, start:end].astype(np.float32), GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+        vectors[i] = glyph.ravel()
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    return vectors
+
+
+def to_gray_array(image):
+    """PIL image or RGB/RGBA/gray array -> 2D uint8 array."""
+    array = np.asarray(image)
+    if array.ndim == 2:
+        return array
+    return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+
+class GlyphOcr:
+    """Reads text in trained fonts; fonts are loaded once and cached."""
+
+    def __init__(self):
+        self._fonts = {}
+        self._lock = threading.Lock()
+
+    def font(self, name):
+        with self._lock:
+            if name not in self._fonts:
+                self._fonts[name] = GlyphFont.load(name)
+            return self._fonts[name]
+
+    def train(self, name, image, text):
+        """
+        Learn templates from a capture whose content is `text`.
+
+        Raises:
+            ValueError: If the capture does not split into one glyph per non-space character.
+        """
+        line, spans = segment(binarize(to_gray_array(image)))
+        vectors = vectorize(line, spans)
+        chars = [c for c in text if not c.isspace()]
+        if len(chars) != len(vectors):
+            raise ValueError(f"Found {len(vectors)} glyphs in the capture but the label has {len(chars)} characters")
+        font = self.font(name)
+        with self._lock:
+            font.add(vectors, chars)
+            font.save()
+        return len(chars)
+
+    def read(self, name, image, allowlist=None, min_score=0.6):
+        """
+        Read a single line of text.
+
+        Args:
+            name: Font name (templates in storage/glyphs/<name>.npz).
+            image: PIL image or NumPy array of the field.
+            allowlist: Optional string restricting the characters considered.
+            min_score: Glyphs whose best correlation is below this become '?'.
+
+        Returns:
+            (text, min_confidence)
+        """
+        font = self.font(name)
+        if not font.chars:
+            raise ValueError(f"Font '{name}' has no trained glyphs")
+        templates, chars = font.templates, np.array(font.chars)
+        if allowlist:
+            keep = np.isin(chars, list(allowlist))
+            templates, chars = templates[keep], chars[keep]
+            if not len(chars):
+                raise ValueError(f"Font '{name}' has no glyphs for the allowlist {allowlist!r}")
+
+        line, spans = segment(binarize(to_gray_array(image)))
+        if not spans:
+            return "", 0.0
+        vectors = vectorize(line, spans)
+        # One matrix product scores every glyph against every template
+        scores = vectors @ templates.T
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(best)), best]
+
+        text, i = [], 0
+        for span in spans:
+            if span is None:
+                text.append(" ")
+                continue
+            text.append(chars[best[i]] if confidence[i] >= min_score else "?")
+            i += 1
+        verbose(f"Glyph OCR [{name}]: {''.join(text)!r} (min score {confidence.min():.2f})")
+        return "".join(text), float(confidence.min())
+
+
+def list_glyph_fonts():
+    """Names of the fonts trained so far."""
+    if not os.path.isdir(GLYPH_DIR):
+        return []
+    return sorted(f[:-4] for f in os.listdir(GLYPH_DIR) if f.endswith(".npz"))
+
+
+# Global glyph OCR instance
+_glyph_ocr = None
+
+
+def get_glyph_ocr():
+    """Get the global glyph OCR instance."""
+    global _glyph_ocr
+    if _glyph_ocr is None:
+        _glyph_ocr = GlyphOcr()
+    return _glyph_ocr
@@ -0,0 +1,286 @@
+"""
+Pooled HTTP clients for AI providers.
+One requests.Session per provider keeps connections alive between calls
+(and between Azure Read polls), and failed requests are retried with
+jittered exponential backoff, honouring Retry-After.
+
+Each client has a circuit breaker: after repeated failures calls fail fast
+until a probe is allowed through again. Calls may also carry an absolute
+deadline (time.monotonic()), which caps every timeout and retry delay.
+Every attempt first takes a token from the shared rate limiter for the
+provider and API key (see rate_limiter.py).
+"""
+import time
+import random
+import threading
+import email.utils
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import get_rate_limiter
+from ..utils.logger import verbose
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# 429 is retried but does not count against the circuit: the provider is up, only throttling
+BREAKER_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while a provider's circuit is open."""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a call's deadline has passed before (or between) attempts."""
+
+
+def time_left(deadline):
+    """Seconds until `deadline` (a time.monotonic() value), or None without a deadline."""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def cap_timeout(timeout, limit):
+    """Shrink a requests timeout (number, (connect, read) tuple or None) to at most `limit` seconds."""
+    if limit is None:
+        return timeout
+    limit = max(0.001, limit)
+    if timeout is None:
+        return limit
+    if isinstance(timeout, tuple):
+        return tuple(limit if t is None else min(t, limit) for t in timeout)
+    return min(timeout, limit)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open -> half-open
+    after `reset_timeout` seconds, when one probe call is let through. A successful
+    probe closes the circuit, a failed one opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go out now (claims the probe slot when half-open)."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+            if self.state == "closed" or (self.state == "half-open" and not self._probing):
+                self._probing = self.state == "half-open"
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self):
+        """Seconds until the next probe is allowed."""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record(self, ok):
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+def parse_retry_after(value, now=None):
+    """Return the delay in seconds from a Retry-After header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+class ProviderClient:
+    """Keep-alive session for one provider with retry/backoff on 429, 5xx and connection errors."""
+
+    def __init__(self, name, max_retries=3, backoff_base=0.5, backoff_max=8.0, retry_after_max=60.0, pool_size=4,
+                 failure_threshold=5, reset_timeout=30.0, limiter=None):
+        """
+        Args:
+            name: Provider name used in logs.
+            max_retries: Extra attempts after the first one.
+            backoff_base: First backoff ceiling in seconds; doubles every attempt.
+            backoff_max: Largest backoff ceiling in seconds.
+            retry_after_max: Longest Retry-After delay that is honoured.
+            pool_size: Connections kept per host.
+            failure_threshold: Consecutive failed attempts that open the circuit.
+            reset_timeout: Seconds the circuit stays open before a probe is let through.
+            limiter: RateLimiter every attempt takes a token from, or None for no limit.
+        """
+        self.name = name
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.retry_after_max = float(retry_after_max)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a 0-based retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, retries=None, deadline=None, rate_key=None, **kwargs):
+        """
+        Send a request, retrying on RETRY_STATUSES and connection errors.
+
+        `retries` overrides max_retries for this call (0 = single attempt).
+        `deadline` (time.monotonic() value) caps the timeout of every attempt and
+        stops retrying once a backoff delay would run past it.
+        `rate_key` (the API key) selects the rate limit bucket; the seconds spent
+        waiting for tokens are stored on the response as `rate_wait`.
+        Returns the last response (the caller still calls raise_for_status);
+        raises the last requests exception if every attempt failed to connect,
+        CircuitOpenError while the circuit is open and DeadlineExceeded when no time is left.
+        """
+        max_retries = self.max_retries if retries is None else max(0, int(retries))
+        rate_wait = 0.0
+        for attempt in range(max_retries + 1):
+            left = time_left(deadline)
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"{self.name}: deadline exceeded before attempt {attempt + 1}")
+            # Take the token before claiming a half-open probe slot, so waiting never holds the slot
+            if self.limiter is not None:
+                waited = self.limiter.acquire(self.name, rate_key, max_wait=left)
+                if waited is None:
+                    raise DeadlineExceeded(f"{self.name}: no rate limit token before the deadline")
+                rate_wait += waited
+                with self._lock:
+                    self._stats["rate_wait_total"] += waited
+                left = time_left(deadline)
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit open after {self.breaker.failures} failures, "
+                                       f"next probe in {self.breaker.retry_in():.0f}s")
+            attempt_kwargs = dict(kwargs, timeout=cap_timeout(kwargs.get("timeout"), left))
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **attempt_kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.breaker.record(ok=False)
+                self._record(started, failed=attempt == max_retries)
+                if attempt == max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                if not self._can_retry(delay, deadline):
+                    raise
+                verbose(f"{self.name}: {type(e).__name__}, retrying in {delay:.2f}s")
+            except Exception:
+                # InvalidURL, ChunkedEncodingError, ...: not retried, but the breaker must still
+                # get an outcome or a half-open circuit would keep its probe slot forever
+                self.breaker.record(ok=False)
+                self._record(started, failed=True)
+                raise
+            else:
+                self.breaker.record(ok=response.status_code not in BREAKER_STATUSES)
+                self._record(started, failed=False)
+                response.rate_wait = rate_wait
+                if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = min(retry_after, self.retry_after_max)
+                else:
+                    delay = self.backoff(attempt)
+                if not self._can_retry(delay, deadline):
+                    return response
+                verbose(f"{self.name}: HTTP {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            with self._lock:
+                self._stats["retries"] += 1
+            time.sleep(delay)
+
+    def _can_retry(self, delay, deadline):
+        """False if waiting `delay` would pass the deadline or the failures just opened the circuit."""
+        left = time_left(deadline)
+        return (left is None or delay < left) and self.breaker.state == "closed"
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def _record(self, started, failed):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["latency_total"] += time.perf_counter() - started
+            if failed:
+                self._stats["failures"] += 1
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run (the circuit keeps its state)."""
+        with self._lock:
+            self._stats = {"requests": 0, "retries": 0, "failures": 0, "latency_total": 0.0, "rate_wait_total": 0.0}
+            self.breaker.opened = 0
+            self.breaker.rejected = 0
+
+    def stats(self):
+        s = dict(self._stats)
+        s["latency_ms_avg"] = s["latency_total"] / s["requests"] * 1000 if s["requests"] else 0.0
+        return s
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"{self.name} HTTP: {s['requests']} requests, {s['retries']} retries, {s['failures']} failures, "
+                f"avg {s['latency_ms_avg']:.1f} ms, {s['rate_wait_total']:.2f}s waiting for rate limit, circuit {self.breaker.state} "
+                f"(opened {self.breaker.opened}x, {self.breaker.rejected} calls failed fast)")
+
+    def close(self):
+        self.session.close()
+
+
+# Global clients, one per provider (created from settings on first use)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_provider_client(name, settings=None):
+    """Get the shared client for a provider ("chatgpt", "azure", "pushover", ...)."""
+    with _clients_lock:
+        if name not in _clients:
+            settings = settings or {}
+            _clients[name] = ProviderClient(
+                name,
+                max_retries=settings.get("http_max_retries", 3),
+                backoff_base=settings.get("http_backoff_base", 0.5),
+                backoff_max=settings.get("http_backoff_max", 8.0),
+                failure_threshold=settings.get("circuit_failure_threshold", 5),
+                reset_timeout=settings.get("circuit_reset_seconds", 30),
+                limiter=get_rate_limiter(settings),
+            )
+        return _clients[name]
+
+
+def peek_provider_clients():
+    """Return the clients created so far."""
+    return list(_clients.values())
@@ -1,45 +1,211 @@
 """
 Notification service integrations.
 Currently supports Pushover API.
+
+Notifications are handed to a background dispatcher so a slow network never
+pauses the macro: a bounded queue feeds one sender thread that posts through
+the shared keep-alive "pushover" client (retries, rate limit and circuit
+breaker included). Identical notifications within a short window are
+coalesced into one message with a repeat count.
 """
-import http.client
-import urllib.parse
+import time
+import queue
+import threading
+
+from .http_client import get_provider_client
+from ..utils.logger import verbose, info, error
+from ..utils.metrics import metric_phase
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+
+
+class _Job:
+    def __init__(self, name, params, label):
+        self.name = name
+        self.params = params
+        self.label = label
+        self.count = 1
+        self.sent = False
+
+
+class NotificationDispatcher:
+    """Send Pushover notifications from a background thread."""
+
+    def __init__(self, client, url=PUSHOVER_URL, queue_size=100, dedup_window=30.0, timeout=10.0):
+        """
+        Args:
+            client: ProviderClient used for the POSTs (keep-alive session, retries, circuit breaker).
+            url: Pushover messages endpoint (point at scripts/api_stub_server.py for offline tests).
+            queue_size: Notifications waiting to be sent; further ones are dropped while it is full.
+            dedup_window: Seconds an identical notification is coalesced into the previous one.
+            timeout: Time budget in seconds for delivering one notification, retries included.
+        """
+        self.client = client
+        self.url = url
+        self.dedup_window = float(dedup_window)
+        self.timeout = float(timeout)
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._recent = {}  # dedup key -> (submitted at, job)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    def submit(self, name, params, label="notification", dedup=True):
+        """
+        Queue a notification; returns "queued", "coalesced" or "dropped" without waiting.
+
+        With `dedup`, a notification identical to one submitted in the last dedup_window
+        seconds is merged into it: still queued -> sent once with "(xN)" appended,
+        already sent -> dropped.
+        """
+        key = tuple(sorted(params.items()))
+        now = time.monotonic()
+        with self._lock:
+            self._recent = {k: v for k, v in self._recent.items() if now - v[0] < self.dedup_window}
+            if dedup and key in self._recent:
+                job = self._recent[key][1]
+                job.count += 1
+                self._stats["coalesced"] += 1
+                verbose(f"Notification '{name}' coalesced ({'already sent' if job.sent else f'x{job.count} queued'})")
+                return "coalesced"
+            job = _Job(name, dict(params), label)
+            try:
+                self._queue.put_nowait((now, job))
+            except queue.Full:
+                self._stats["dropped"] += 1
+                error("Notification queue full, dropped %s '%s'", label, name)
+                return "dropped"
+            self._stats["queued"] += 1
+            if dedup:
+                self._recent[key] = (now, job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="notifications", daemon=True)
+                self._thread.start()
+        return "queued"
+
+    def _loop(self):
+        while True:
+            try:
+                submitted, job = self._queue.get(timeout=30)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None  # idle: exit; submit() starts a new thread when needed
+                        return
+                continue
+            self._send(submitted, job)
+            self._queue.task_done()
+
+    def _send(self, submitted, job):
+        with self._lock:
+            job.sent = True  # later duplicates in the window are dropped, not counted into this message
+            params = dict(job.params)
+            if job.count > 1:
+                params["message"] = f"{params.get('message', '')} (x{job.count})"
+        try:
+            response = self.client.post(self.url, data=params, timeout=self.timeout,
+                                        deadline=time.monotonic() + self.timeout, rate_key=params.get("token"))
+            ok = response.status_code == 200
+            detail = f"{response.status_code} - {response.reason}"
+        except Exception as e:
+            ok, detail = False, str(e)
+        with self._lock:
+            self._stats["sent" if ok else "failed"] += 1
+            self._stats["latency_total"] += time.monotonic() - submitted
+        if ok:
+            info("Sent %s: %s", job.label, job.name)
+        else:
+            error("Failed to send %s '%s': %s", job.label, job.name, detail)
+
+    def flush(self, timeout=None):
+        """Wait until every queued notification was sent or failed; False on timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run (queued notifications are still sent)."""
+        with self._lock:
+            self._stats = {"queued": 0, "sent": 0, "failed": 0, "coalesced": 0, "dropped": 0, "latency_total": 0.0}
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        done = s["sent"] + s["failed"]
+        s["latency_ms_avg"] = s["latency_total"] / done * 1000 if done else 0.0
+        s["pending"] = self._queue.unfinished_tasks
+        return s
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"Notifications: {s['sent']} sent, {s['failed']} failed, {s['coalesced']} coalesced, "
+                f"{s['dropped']} dropped, {s['pending']} pending, avg delivery {s['latency_ms_avg']:.0f} ms")
+
+
+# Global dispatcher (created from settings on first use)
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher(settings=None):
+    """Get the shared notification dispatcher."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            settings = settings or {}
+            _dispatcher = NotificationDispatcher(
+                get_provider_client("pushover", settings),
+                url=settings.get("pushover_url") or PUSHOVER_URL,
+                queue_size=settings.get("notification_queue_size", 100),
+                dedup_window=settings.get("notification_dedup_seconds", 30),
+                timeout=settings.get("notification_timeout", 10),
+            )
+        return _dispatcher
+
+
+def peek_notification_dispatcher():
+    """Return the dispatcher if one was created, without creating it."""
+    return _dispatcher
+
+
+def notification_params(notification, **extra):
+    """Pushover form fields for a stored notification configuration."""
+    params = {
+        "token": notification["token"],
+        "user": notification["user"],
+        "message": notification["message"],
+        "priority": notification["priority"]
+    }
+    if notification["priority"] == 2:
+        params.update({"expire": 60, "retry": 60})
+    params.update(extra)
+    return params
 
 
 def send_notification(notification_name, page1):
     """
-    Send a notification via Pushover API.
-    
+    Queue a notification for the background dispatcher (returns immediately).
+
     Args:
         notification_name: Name of the notification configuration
         page1: Page1 instance to access notification settings
-        
+
     Returns:
-        None (prints status messages)
+        None (delivery is logged from the dispatcher thread)
     """
     if not notification_name:
         return
     notification = page1.master.master.page2.notifications.get(notification_name)
     if notification:
         try:
-            conn = http.client.HTTPSConnection("api.pushover.net:443")
-            params = {
-                "token": notification["token"],
-                "user": notification["user"],
-                "message": notification["message"],
-                "priority": notification["priority"]
-            }
-            if notification["priority"] == 2:
-                params.update({"expire": 60, "retry": 60})
-            conn.request("POST", "/1/messages.json", urllib.parse.urlencode(params), {"Content-type": "application/x-www-form-urlencoded"})
-            response = conn.getresponse()
-            if response.status == 200:
-                print(f"Sent notification: {notification_name}")
-            else:
-                print(f"Failed to send notification '{notification_name}': {response.status} - {response.reason}")
-            conn.close()
+            with metric_phase("notification"):
+                dispatcher = get_notification_dispatcher(getattr(page1.master.master, "settings", {}))
+                dispatcher.submit(notification_name, notification_params(notification))
         except Exception as e:
             print(f"Error sending notification '{notification_name}': {e}")
     else:
         print(f"Notification '{notification_name}' not found in notifications: {page1.master.master.page2.notifications}")
-
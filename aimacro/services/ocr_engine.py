@@ -0,0 +1,223 @@
+"""
+Long-lived local OCR engine manager.
+Loads EasyOCR readers once per language set, can warm them up in the
+background, and hands them out to concurrent callers one at a time.
+"""
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+
+from ..utils.logger import verbose, info, error
+
+QUANTIZED_MODEL_DIR = os.path.join("storage", "ocr_models")
+
+
+def load_quantized_recognizer(recognizer, languages):
+    """
+    Return an int8 dynamically quantized copy of an EasyOCR recognition network.
+
+    The quantized module is built once and cached in storage/ocr_models, keyed
+    by language set and easyocr/torch versions, so later loads skip quantization.
+    """
+    import torch
+    import easyocr
+    name = f"recognizer_int8_{'+'.join(sorted(languages))}_easyocr{easyocr.__version__}_torch{torch.__version__}.pt"
+    path = os.path.join(QUANTIZED_MODEL_DIR, name)
+    if os.path.exists(path):
+        try:
+            return torch.load(path, map_location="cpu", weights_only=False)
+        except Exception as e:
+            error(f"Cached quantized recognizer {path} could not be loaded, rebuilding: {e}")
+
+    started = time.perf_counter()
+    model = torch.quantization.quantize_dynamic(recognizer, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+    os.makedirs(QUANTIZED_MODEL_DIR, exist_ok=True)
+    torch.save(model, path)
+    info(f"Built int8 recognizer for {sorted(languages)} in {time.perf_counter() - started:.2f}s, cached at {path}")
+    return model
+
+
+def create_reader(languages, gpu=False, quantize=True):
+    """
+    Build an EasyOCR reader.
+
+    With quantize=True (CPU only) the recognition network is replaced by the
+    cached int8 version; otherwise it runs in float32.
+    """
+    import easyocr
+    # easyocr quantizes on every load by default; do it ourselves so the result can be cached
+    reader = easyocr.Reader(list(languages), gpu=gpu, verbose=False, quantize=False)
+    if quantize and not gpu:
+        reader.recognizer = load_quantized_recognizer(reader.recognizer, languages)
+    return reader
+
+
+class OcrEngineManager:
+    """Pool of pre-loaded EasyOCR readers keyed by language set and precision."""
+
+    def __init__(self, readers_per_language=1, gpu=False, quantize=True):
+        """
+        Args:
+            readers_per_language: Readers loaded per language set; each serves one call at a time.
+            gpu: Passed to easyocr.Reader.
+            quantize: Default precision for calls that do not choose one (True = int8 recognizer on CPU).
+        """
+        self.readers_per_language = max(1, int(readers_per_language))
+        self.gpu = gpu
+        self.quantize = bool(quantize)
+        self._pools = {}            # key -> queue.Queue of readers
+        self._load_locks = {}       # key -> threading.Lock guarding the load
+        self._lock = threading.Lock()
+        self._stats = {}            # key -> counters
+
+    def _key(self, languages, quantize=None):
+        return tuple(sorted(languages or ["en"])), self.quantize if quantize is None else bool(quantize)
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._load_locks:
+                self._load_locks[key] = threading.Lock()
+                self._stats[key] = self._new_stats()
+            return self._load_locks[key]
+
+    @staticmethod
+    def _new_stats():
+        return {"load_seconds": 0.0, "calls": 0, "inference_total": 0.0, "inference_max": 0.0}
+
+    def _create_reader(self, key):
+        """Build one reader for a language set and precision (models download on first use)."""
+        languages, quantize = key
+        return create_reader(languages, gpu=self.gpu, quantize=quantize)
+
+    def _ensure_loaded(self, key):
+        """Load the readers for `key` unless already loaded; concurrent callers wait for one load."""
+        if key in self._pools:
+            return self._pools[key]
+        with self._key_lock(key):
+            if key in self._pools:
+                return self._pools[key]
+            started = time.perf_counter()
+            pool = queue.Queue()
+            for _ in range(self.readers_per_language):
+                pool.put(self._create_reader(key))
+            elapsed = time.perf_counter() - started
+            self._stats[key]["load_seconds"] += elapsed
+            self._pools[key] = pool
+            info(f"Local OCR readers for {self._name(key)} loaded in {elapsed:.2f}s")
+            return pool
+
+    @staticmethod
+    def _name(key):
+        languages, quantize = key
+        return "+".join(languages) + (" int8" if quantize else " fp32")
+
+    def is_loaded(self, languages=None, quantize=None):
+        """Return True if readers for the language set are ready."""
+        return self._key(languages, quantize) in self._pools
+
+    def warm_up(self, languages=None, quantize=None):
+        """Load readers for a language set in a background thread (no-op if already loaded)."""
+        key = self._key(languages, quantize)
+        if key in self._pools:
+            return
+
+        def load():
+            try:
+                self._ensure_loaded(key)
+            except ImportError:
+                error("easyocr library not installed, skipping local OCR warm-up")
+            except Exception as e:
+                error(f"Local OCR warm-up failed: {e}")
+
+        verbose(f"Warming up local OCR readers for {self._name(key)} in the background...")
+        threading.Thread(target=load, name="ocr-warmup", daemon=True).start()
+
+    @contextmanager
+    def reader(self, languages=None, timeout=None, quantize=None):
+        """
+        Borrow a reader for the language set, loading it first if needed.
+
+        Raises:
+            TimeoutError: If no reader becomes free within `timeout` seconds.
+        """
+        pool = self._ensure_loaded(self._key(languages, quantize))
+        try:
+            reader = pool.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No local OCR reader became free within {timeout}s")
+        try:
+            yield reader
+        finally:
+            pool.put(reader)
+
+    def run(self, method, image_array, languages=None, timeout=None, quantize=None, **kwargs):
+        """Run reader.<method> ("readtext" or "recognize") on an image array and record the inference time."""
+        key = self._key(languages, quantize)
+        with self.reader(languages, timeout=timeout, quantize=quantize) as reader:
+            started = time.perf_counter()
+            results = getattr(reader, method)(image_array, **kwargs)
+            self._record(key, time.perf_counter() - started)
+        return results
+
+    def readtext(self, image_array, languages=None, timeout=None, quantize=None, **kwargs):
+        """Detect text boxes, then recognize each of them."""
+        return self.run("readtext", image_array, languages, timeout, quantize, **kwargs)
+
+    def recognize(self, image_array, languages=None, timeout=None, quantize=None, **kwargs):
+        """Recognize the whole image as a single text line, skipping detection."""
+        return self.run("recognize", image_array, languages, timeout, quantize, **kwargs)
+
+    def _record(self, key, elapsed):
+        stats = self._stats[key]
+        with self._lock:
+            stats["calls"] += 1
+            stats["inference_total"] += elapsed
+            stats["inference_max"] = max(stats["inference_max"], elapsed)
+        verbose(f"Local OCR inference took {elapsed * 1000:.1f} ms")
+
+    def reset_stats(self):
+        """Zero the counters (loaded readers are kept), e.g. at the start of a run."""
+        with self._lock:
+            for stats in self._stats.values():
+                stats.update(self._new_stats())
+
+    def stats(self):
+        """Return load and inference timings per language set."""
+        result = {}
+        for key, s in self._stats.items():
+            result[self._name(key)] = {
+                "loaded": key in self._pools,
+                "load_seconds": s["load_seconds"],
+                "calls": s["calls"],
+                "inference_ms_avg": s["inference_total"] / s["calls"] * 1000 if s["calls"] else 0.0,
+                "inference_ms_max": s["inference_max"] * 1000,
+            }
+        return result
+
+    def format_stats(self):
+        """Return a single log line per language set used since the last reset, or '' if none was."""
+        return "\n".join(
+            f"Local OCR [{name}]: load {s['load_seconds']:.2f}s, {s['calls']} calls, "
+            f"inference avg {s['inference_ms_avg']:.1f} ms, max {s['inference_ms_max']:.1f} ms"
+            for name, s in self.stats().items() if s["calls"] or s["load_seconds"])
+
+
+# Global OCR engine manager (created from settings on first use)
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine(settings=None):
+    """Get the global OCR engine manager, creating it from `settings` on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            settings = settings or {}
+            _engine = OcrEngineManager(
+                readers_per_language=settings.get("local_ocr_readers", 1),
+                gpu=settings.get("local_ocr_gpu", False),
+                quantize=settings.get("local_ocr_quantize", True),
+            )
+        return _engine
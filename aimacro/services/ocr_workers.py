@@ -0,0 +1,284 @@
+"""
+Process-based local OCR workers.
+Each worker process holds its own loaded EasyOCR reader, so inference runs
+outside the Tk/executor process and does not compete for its GIL. Images
+are handed over through shared memory instead of base64 strings.
+"""
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..utils.logger import verbose, info, error
+from .ocr_engine import create_reader
+
+
+class OcrWorkerError(Exception):
+    """Raised when an OCR worker fails, crashes or times out."""
+
+
+def _attach_shared_memory(name):
+    """Attach to the parent's segment; the parent stays responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Spawned children share the parent's resource tracker, where the name is already registered
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(conn, languages, gpu, quantize, threads):
+    """Worker process entry point: load a reader once, then serve requests until told to stop."""
+    try:
+        started = time.perf_counter()
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        reader = create_reader(languages, gpu=gpu, quantize=quantize)
+        conn.send(("ready", time.perf_counter() - started, 0.0))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}", 0.0))
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+        method, shm_name, shape, dtype, kwargs = message
+        shm = _attach_shared_memory(shm_name)
+        try:
+            image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            started = time.perf_counter()
+            results = getattr(reader, method)(image, **kwargs)
+            elapsed = time.perf_counter() - started
+            # Plain Python types only, so results pickle cheaply and identically to in-process output
+            results = [([[int(x), int(y)] for x, y in box], text, float(confidence))
+                       for box, text, confidence in results]
+            conn.send(("ok", results, elapsed))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}", 0.0))
+        finally:
+            image = None
+            shm.close()
+
+
+class _Worker:
+    """Handle for one worker process and its pipe."""
+
+    def __init__(self, context, languages, gpu, quantize, threads):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, languages, gpu, quantize, threads),
+                                       name="ocr-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.failed = False
+        self.load_seconds = 0.0
+
+    def wait_ready(self, timeout):
+        """Block until the worker has loaded its model; return True if it just finished loading."""
+        if self.ready:
+            return False
+        if not self.conn.poll(timeout):
+            raise OcrWorkerError(f"OCR worker has not loaded its model yet (waited {timeout:.1f}s)")
+        status, payload, _ = self.conn.recv()
+        if status != "ready":
+            self.failed = True  # the process has exited; the pool replaces it
+            raise OcrWorkerError(f"OCR worker failed to start: {payload}")
+        self.ready = True
+        self.load_seconds = payload
+        return True
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+class OcrWorkerPool:
+    """Fixed-size pool of OCR worker processes with per-request timeouts and crash restarts."""
+
+    def __init__(self, workers=2, languages=("en",), gpu=False, quantize=True, load_timeout=300):
+        """
+        Args:
+            workers: Number of worker processes (each loads its own model).
+            languages: EasyOCR language codes.
+            gpu: Passed to easyocr.Reader in each worker.
+            quantize: Use the cached int8 recognizer (CPU only).
+            load_timeout: Seconds a worker may take to load its model.
+        """
+        self.size = max(1, int(workers))
+        self.languages = tuple(languages or ("en",))
+        self.gpu = gpu
+        self.quantize = bool(quantize)
+        self.load_timeout = load_timeout
+        # Split the cores between workers so they do not oversubscribe each other
+        self.threads = max(1, (os.cpu_count() or 1) // self.size)
+        # spawn: forking a process that runs Tk and other threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.reset_stats()
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        info(f"Started {self.size} local OCR worker processes for {list(self.languages)}"
+             f" ({'int8' if self.quantize else 'fp32'})")
+
+    def _spawn(self):
+        return _Worker(self._context, self.languages, self.gpu, self.quantize, self.threads)
+
+    def _restart(self, worker, reason):
+        """Replace a crashed or hung worker with a fresh process."""
+        error(f"Restarting OCR worker (pid {worker.process.pid}): {reason}")
+        worker.process.terminate()
+        worker.process.join(timeout=1)
+        worker.conn.close()
+        with self._lock:
+            self._stats["restarts"] += 1
+        return self._spawn()
+
+    def run(self, image_array, method="readtext", timeout=30, **kwargs):
+        """
+        Run `reader.<method>(image, **kwargs)` in a worker process.
+
+        Args:
+            image_array: uint8 NumPy image.
+            method: EasyOCR Reader method to call ("readtext" or "recognize").
+            timeout: Seconds the whole call may take: waiting for a free worker, for its model
+                     to load (at most load_timeout) and for its answer.
+
+        Returns:
+            EasyOCR-style results: list of (box, text, confidence).
+
+        Raises:
+            OcrWorkerError: On worker error, crash (after one retry) or timeout.
+        """
+        image_array = np.ascontiguousarray(image_array)
+        end = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise OcrWorkerError(f"No OCR worker became free within {timeout}s")
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image_array.nbytes))
+        try:
+            np.ndarray(image_array.shape, dtype=image_array.dtype, buffer=shm.buf)[...] = image_array
+            message = (method, shm.name, image_array.shape, image_array.dtype.str, kwargs)
+            for attempt in range(2):
+                try:
+                    # A worker that is still loading stays in the pool; the call gives up at its budget
+                    if worker.wait_ready(max(0.0, min(self.load_timeout, end - time.monotonic()))):
+                        with self._lock:
+                            self._stats["load_total"] += worker.load_seconds
+                    started = time.perf_counter()
+                    worker.conn.send(message)
+                    if not worker.conn.poll(max(0.0, end - time.monotonic())):
+                        with self._lock:
+                            self._stats["timeouts"] += 1
+                        worker = self._restart(worker, f"no answer within {timeout}s")
+                        raise OcrWorkerError(f"Local OCR request timed out after {timeout}s")
+                    status, payload, elapsed = worker.conn.recv()
+                    break
+                except (EOFError, BrokenPipeError, ConnectionResetError, OSError) as e:
+                    worker = self._restart(worker, f"worker crashed ({type(e).__name__})")
+                    if attempt:
+                        with self._lock:
+                            self._stats["calls"] += 1
+                            self._stats["errors"] += 1
+                        raise OcrWorkerError("OCR worker crashed twice on the same request")
+            roundtrip = time.perf_counter() - started
+        finally:
+            shm.close()
+            shm.unlink()
+            if worker.failed or not worker.process.is_alive():
+                worker = self._restart(worker, "worker failed to start" if worker.failed else "worker exited")
+            self._idle.put(worker)
+
+        with self._lock:
+            self._stats["calls"] += 1
+            if status != "ok":
+                self._stats["errors"] += 1
+            else:
+                self._stats["inference_total"] += elapsed
+                self._stats["inference_max"] = max(self._stats["inference_max"], elapsed)
+                self._stats["roundtrip_total"] += roundtrip
+        if status != "ok":
+            raise OcrWorkerError(payload)
+        verbose(f"Local OCR worker inference {elapsed * 1000:.1f} ms (round trip {roundtrip * 1000:.1f} ms)")
+        return payload
+
+    def reset_stats(self):
+        """Zero the counters (workers keep running), e.g. at the start of a run."""
+        with self._lock:
+            self._stats = {"calls": 0, "errors": 0, "timeouts": 0, "restarts": 0,
+                           "load_total": 0.0, "inference_total": 0.0, "inference_max": 0.0, "roundtrip_total": 0.0}
+
+    def stats(self):
+        """Return call, error, restart and timing counters."""
+        s = dict(self._stats)
+        ok = s["calls"] - s["errors"]
+        return {
+            "workers": self.size,
+            "load_seconds": s["load_total"],
+            "calls": s["calls"],
+            "errors": s["errors"],
+            "timeouts": s["timeouts"],
+            "restarts": s["restarts"],
+            "inference_ms_avg": s["inference_total"] / ok * 1000 if ok else 0.0,
+            "inference_ms_max": s["inference_max"] * 1000,
+            "roundtrip_ms_avg": s["roundtrip_total"] / ok * 1000 if ok else 0.0,
+        }
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"Local OCR workers ({s['workers']}, {'int8' if self.quantize else 'fp32'}): load {s['load_seconds']:.2f}s, {s['calls']} calls, {s['errors']} errors, "
+                f"{s['timeouts']} timeouts, {s['restarts']} restarts, inference avg {s['inference_ms_avg']:.1f} ms, "
+                f"round trip avg {s['roundtrip_ms_avg']:.1f} ms")
+
+    def close(self):
+        """Stop all idle workers."""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+# Global worker pools, one per precision (created from settings on first use)
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_ocr_worker_pool(settings=None, quantize=None):
+    """Get the global OCR worker pool for a precision, creating it from `settings` on first use."""
+    settings = settings or {}
+    if quantize is None:
+        quantize = settings.get("local_ocr_quantize", True)
+    quantize = bool(quantize)
+    with _pool_lock:
+        if quantize not in _pools:
+            _pools[quantize] = OcrWorkerPool(
+                workers=settings.get("local_ocr_workers", 2),
+                languages=settings.get("local_ocr_languages") or ["en"],
+                gpu=settings.get("local_ocr_gpu", False),
+                quantize=quantize,
+            )
+        return _pools[quantize]
+
+
+def peek_ocr_worker_pools():
+    """Return the worker pools started so far, without starting any."""
+    return list(_pools.values())
@@ -0,0 +1,279 @@
+"""
+Latency-aware routing for the "Auto" Image AI provider.
+Each backend (Local OCR, Azure Read, ChatGPT) keeps a rolling window of
+latencies and failures. A request goes to the fastest healthy backend; if
+it has not answered by its own latency percentile, the same image is sent
+to the next backend as a hedge and the first good answer wins. Failed
+answers fail over to the next backend straight away. A small share of
+requests goes first to a backend without enough samples (or marked
+unhealthy), so routing keeps learning about all of them; the usual
+favourite is still the hedge for those requests.
+"""
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from .ai_services import send_to_local_ocr, send_to_azure, send_to_chatgpt, is_error_result
+from .http_client import time_left
+from ..utils.logger import verbose, info
+
+DEFAULT_PROMPT = "Read the text in this image. Reply with the text only."
+
+
+def _local_ocr(image, settings, feature, prompt, options, deadline):
+    return send_to_local_ocr(image, settings, recognize_only=(feature == "recognize"),
+                             allowlist=options.get("allowlist"), quantize=options.get("quantize"), deadline=deadline)
+
+
+def _azure(image, settings, feature, prompt, options, deadline):
+    return send_to_azure(image, settings, feature="read", upload=options, deadline=deadline)
+
+
+def _chatgpt(image, settings, feature, prompt, options, deadline):
+    return send_to_chatgpt(image, settings, prompt=prompt or DEFAULT_PROMPT, upload=options, deadline=deadline)
+
+
+BACKENDS = {"Local OCR": _local_ocr, "Azure": _azure, "ChatGPT": _chatgpt}
+
+
+def configured_backends(settings):
+    """Backends from router_backends that have the settings they need."""
+    names = []
+    for name in settings.get("router_backends") or list(BACKENDS):
+        if name not in BACKENDS:
+            continue
+        if name == "ChatGPT" and not settings.get("chatgpt_api_key"):
+            continue
+        if name == "Azure" and not (settings.get("azure_endpoint")
+                                    and (settings.get("azure_api_key") or settings.get("azure_subscription_key"))):
+            continue
+        names.append(name)
+    return names
+
+
+class BackendHealth:
+    """Rolling latency and error window for one backend."""
+
+    def __init__(self, window=50):
+        self.samples = deque(maxlen=window)  # (latency seconds, ok)
+        self.calls = 0
+        self.wins = 0
+
+    def record(self, latency, ok):
+        self.samples.append((latency, ok))
+        self.calls += 1
+
+    def latencies(self):
+        return [latency for latency, ok in self.samples if ok]
+
+    def error_rate(self):
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, q):
+        latencies = self.latencies()
+        return float(np.percentile(latencies, q)) if latencies else None
+
+
+class ProviderRouter:
+    """Send each request to the fastest healthy backend, hedging to the next one when it is slow."""
+
+    def __init__(self, window=50, hedge_percentile=90, hedge_after=2.0, max_error_rate=0.5, min_samples=5,
+                 explore_rate=0.05):
+        """
+        Args:
+            window: Recent calls kept per backend for latency and error statistics.
+            hedge_percentile: Latency percentile of the chosen backend after which a hedge is sent.
+            hedge_after: Hedge delay in seconds while a backend has fewer than min_samples answers.
+            max_error_rate: Backends failing more often than this are only used as a last resort.
+            min_samples: Answers needed before a backend's own latency statistics are trusted.
+            explore_rate: Share of requests sent first to an under-sampled or unhealthy backend.
+        """
+        self.window = int(window)
+        self.hedge_percentile = float(hedge_percentile)
+        self.hedge_after = float(hedge_after)
+        self.max_error_rate = float(max_error_rate)
+        self.min_samples = int(min_samples)
+        self.explore_rate = float(explore_rate)
+        self._health = {name: BackendHealth(self.window) for name in BACKENDS}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(BACKENDS), thread_name_prefix="router")
+        self.reset_stats()
+
+    def ranked(self, settings):
+        """Configured backends, best first: healthy by median latency, then untried, then unhealthy."""
+        def sort_key(item):
+            index, name = item
+            health = self._health[name]
+            if len(health.samples) < self.min_samples:
+                return 1, index, 0.0
+            if health.error_rate() > self.max_error_rate:
+                return 2, health.error_rate(), index
+            return 0, health.percentile(50) or float("inf"), index
+        with self._lock:
+            return [name for _, name in sorted(enumerate(configured_backends(settings)), key=sort_key)]
+
+    def _explore(self, queue):
+        """Occasionally move the least known backend that is not already first to the front."""
+        if len(queue) < 2 or random.random() >= self.explore_rate:
+            return False
+        with self._lock:
+            candidates = [name for name in queue[1:]
+                          if len(self._health[name].samples) < self.min_samples
+                          or self._health[name].error_rate() > self.max_error_rate]
+            if not candidates:
+                return False
+            name = min(candidates, key=lambda n: len(self._health[n].samples))
+            self._stats["explored"] += 1
+        queue.remove(name)
+        queue.insert(0, name)
+        return True
+
+    def hedge_delay(self, name):
+        """Seconds to wait for `name` before hedging: its latency percentile once known."""
+        with self._lock:
+            health = self._health[name]
+            if len(health.latencies()) < self.min_samples:
+                return self.hedge_after
+            return max(0.05, health.percentile(self.hedge_percentile))
+
+    def _call(self, name, image, settings, feature, prompt, options, deadline):
+        started = time.perf_counter()
+        try:
+            text = BACKENDS[name](image, settings, feature, prompt, options, deadline)
+        except Exception as e:
+            text = f"An unexpected error occurred: {e}"
+        ok = isinstance(text, str) and not is_error_result(text)
+        with self._lock:
+            self._health[name].record(time.perf_counter() - started, ok)
+        return text, ok
+
+    def read(self, image, settings, feature="ocr", prompt="", options=None, deadline=None):
+        """
+        Answer an Image AI request with the first good result from the routed backends.
+        Every backend call, hedges and failovers included, shares the same `deadline`.
+        """
+        options = options or {}
+        queue = self.ranked(settings)
+        if not queue:
+            return "Unknown provider: Auto (no configured backends in router_backends)"
+        with self._lock:
+            self._stats["requests"] += 1
+        explored = self._explore(queue)
+        started = time.perf_counter()
+        pending = {}
+        hedged = None
+        last_error = None
+
+        def launch(name):
+            pending[self._executor.submit(self._call, name, image, settings, feature, prompt, options,
+                                          deadline)] = name
+            return time.perf_counter() + self.hedge_delay(name)
+
+        primary = queue.pop(0)
+        verbose(f"Router: sending to {primary}{' to explore it' if explored else ''} "
+                f"(order: {', '.join([primary] + queue)})")
+        hedge_at = launch(primary)
+        while pending:
+            left = time_left(deadline)
+            if left is not None and left <= 0:
+                # Out of time: start nothing new and stop waiting; the calls in flight end at the deadline too
+                last_error = f"API request failed: deadline exceeded waiting for {', '.join(pending.values())}"
+                verbose(f"Router: {last_error}")
+                break
+            timeout = max(0.0, hedge_at - time.perf_counter()) if queue and hedged is None else None
+            if left is not None:
+                timeout = left if timeout is None else min(timeout, left)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if not (queue and hedged is None and time.perf_counter() >= hedge_at):
+                    continue  # woke up for the deadline, not the hedge delay
+                # The chosen backend missed its latency percentile: race the next one against it
+                hedged = queue.pop(0)
+                verbose(f"Router: {primary} slower than {self.hedge_delay(primary) * 1000:.0f} ms, "
+                        f"hedging to {hedged}")
+                with self._lock:
+                    self._stats["hedged"] += 1
+                launch(hedged)
+                continue
+            for future in done:
+                name = pending.pop(future)
+                text, ok = future.result()
+                if ok:
+                    with self._lock:
+                        self._health[name].wins += 1
+                        if name == hedged:
+                            self._stats["hedge_wins"] += 1
+                    race = ""
+                    if hedged:
+                        race = f" (hedge beat {primary})" if name == hedged else f" (beat hedge to {hedged})"
+                    verbose(f"Router: answer from {name} in {(time.perf_counter() - started) * 1000:.0f} ms{race}")
+                    return text
+                last_error = text
+                verbose(f"Router: {name} failed: {text}")
+            if not pending and queue and (deadline is None or time.monotonic() < deadline):
+                # Everything sent so far failed: fail over to the next backend without waiting
+                with self._lock:
+                    self._stats["failovers"] += 1
+                hedge_at = launch(queue.pop(0))
+        with self._lock:
+            self._stats["failures"] += 1
+        return last_error
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run (latency windows used for routing are kept)."""
+        with self._lock:
+            self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "failures": 0,
+                           "explored": 0}
+            for health in self._health.values():
+                health.calls = 0
+                health.wins = 0
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["backends"] = {
+                name: {"calls": h.calls, "wins": h.wins, "error_rate": h.error_rate(),
+                       "p50_ms": (h.percentile(50) or 0.0) * 1000,
+                       "p90_ms": (h.percentile(self.hedge_percentile) or 0.0) * 1000}
+                for name, h in self._health.items() if h.calls
+            }
+        return s
+
+    def format_stats(self):
+        """Return routing counters and per-backend latency as a single log line."""
+        s = self.stats()
+        backends = ", ".join(f"{name} {b['calls']} calls/{b['wins']} wins p50 {b['p50_ms']:.0f} ms "
+                             f"err {b['error_rate']:.0%}" for name, b in s["backends"].items())
+        return (f"Router: {s['requests']} requests, {s['hedged']} hedged ({s['hedge_wins']} hedge wins), "
+                f"{s['failovers']} failovers, {s['failures']} failed, {s['explored']} explored" + (f" | {backends}" if backends else ""))
+
+
+# Global router (created from settings on first use)
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router(settings=None):
+    """Get the shared router for the "Auto" Image AI provider."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            settings = settings or {}
+            _router = ProviderRouter(
+                window=settings.get("router_window", 50),
+                hedge_percentile=settings.get("router_hedge_percentile", 90),
+                hedge_after=settings.get("router_hedge_after", 2.0),
+                max_error_rate=settings.get("router_max_error_rate", 0.5),
+                explore_rate=settings.get("router_explore_rate", 0.05),
+            )
+            info(f"Provider router backends: {', '.join(configured_backends(settings)) or 'none configured'}")
+        return _router
+
+
+def peek_provider_router():
+    """Return the router if one was created, without creating it."""
+    return _router
@@ -0,0 +1,211 @@
+"""
+Client-side token-bucket rate limiting for provider API keys.
+Each (provider, API key) pair gets a bucket refilled at `rate` requests per
+second up to `burst`. Every HTTP attempt takes a token first, so concurrent
+macros and background Image AI calls share the key's budget instead of all
+running into 429s and retrying together.
+
+With rate_limit_lock_dir set, the bucket state lives in a small file under a
+lock, so several aimacro processes using the same key share one budget.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+from ..utils.logger import verbose
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def key_id(key):
+    """Short stable id for an API key, so keys never end up in file names or logs."""
+    return hashlib.sha1(str(key or "").encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. A caller reserves a token even when none is left
+    (the balance goes negative) and sleeps until its reservation is covered, so
+    waiting callers are served in arrival order without holding the lock.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Take a token; return the seconds to wait before using it, or None if that exceeds max_wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1.0
+            return wait
+
+
+class _FileLock:
+    """Exclusive lock on an open file (fcntl on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, handle):
+        self.handle = handle
+
+    def __enter__(self):
+        if os.name == "nt":
+            self.handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s of contention; keep trying
+                    continue
+        else:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == "nt":
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose balance is kept in a locked file shared with other processes."""
+
+    def __init__(self, rate, burst, path):
+        super().__init__(rate, burst)
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def reserve(self, max_wait=None):
+        # The thread lock keeps this process's callers from contending on the file lock
+        with self._lock, open(self.path, "a+") as handle, _FileLock(handle):
+            handle.seek(0)
+            try:
+                state = json.loads(handle.read() or "{}")
+            except ValueError:
+                state = {}
+            now = time.time()  # wall clock: monotonic clocks are not comparable between processes
+            tokens = float(state.get("tokens", self.burst))
+            tokens = min(self.burst, tokens + max(0.0, now - float(state.get("updated", now))) * self.rate)
+            wait = max(0.0, (1.0 - tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps({"tokens": tokens - 1.0, "updated": now}))
+            handle.flush()
+            return wait
+
+
+class RateLimiter:
+    """Token buckets per (provider, API key), configured per provider."""
+
+    def __init__(self, limits=None, lock_dir=""):
+        """
+        Args:
+            limits: {provider: {"rate": requests per second, "burst": bucket size}};
+                    providers without an entry (or with rate 0) are not limited.
+            lock_dir: Directory for shared bucket files ("" = limit within this process only).
+        """
+        self.limits = {name: dict(limit) for name, limit in (limits or {}).items()}
+        self.lock_dir = lock_dir or ""
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @staticmethod
+    def _new_stats():
+        return {"requests": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0, "rejected": 0}
+
+    def _bucket(self, provider, key):
+        limit = self.limits.get(provider) or {}
+        if not float(limit.get("rate") or 0):
+            return None
+        ident = (provider, key_id(key))
+        with self._lock:
+            bucket = self._buckets.get(ident)
+            if bucket is None:
+                rate, burst = float(limit["rate"]), limit.get("burst", 1)
+                if self.lock_dir:
+                    bucket = SharedTokenBucket(rate, burst, os.path.join(self.lock_dir, f"{provider}-{ident[1]}.json"))
+                else:
+                    bucket = TokenBucket(rate, burst)
+                self._buckets[ident] = bucket
+                self._stats[provider] = self._stats.get(provider) or self._new_stats()
+            return bucket
+
+    def acquire(self, provider, key=None, max_wait=None):
+        """
+        Wait for a token for `provider` / `key`.
+
+        Returns the seconds spent waiting (0.0 when unlimited or a token was free),
+        or None without waiting or taking a token if the wait would exceed max_wait.
+        """
+        bucket = self._bucket(provider, key)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve(max_wait)
+        with self._lock:
+            stats = self._stats[provider]
+            if wait is None:
+                stats["rejected"] += 1
+                return None
+            stats["requests"] += 1
+            if wait > 0:
+                stats["waited"] += 1
+                stats["wait_total"] += wait
+                stats["wait_max"] = max(stats["wait_max"], wait)
+        if wait > 0:
+            verbose(f"{provider}: rate limit, waiting {wait * 1000:.0f} ms for a token")
+            time.sleep(wait)
+        return wait
+
+    def reset_stats(self):
+        """Zero the counters, e.g. at the start of a run (buckets keep their tokens)."""
+        with self._lock:
+            for stats in self._stats.values():
+                stats.update(self._new_stats())
+
+    def stats(self):
+        with self._lock:
+            return {provider: dict(s) for provider, s in self._stats.items()}
+
+    def format_stats(self):
+        """Return per-provider waits as a single log line (empty if nothing was limited)."""
+        parts = [f"{provider} {s['requests']} requests, {s['waited']} waited "
+                 f"(total {s['wait_total']:.2f}s, max {s['wait_max'] * 1000:.0f} ms), {s['rejected']} over deadline"
+                 for provider, s in self.stats().items() if s["requests"] or s["rejected"]]
+        return ("Rate limits: " + "; ".join(parts)) if parts else ""
+
+
+# Global limiter (created from settings on first use)
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(settings=None):
+    """Get the shared rate limiter (rate_limits / rate_limit_lock_dir settings)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = settings or {}
+            _limiter = RateLimiter(settings.get("rate_limits"), settings.get("rate_limit_lock_dir", ""))
+        return _limiter
+
+
+def peek_rate_limiter():
+    """Return the limiter if one was created, without creating it."""
+    return _limiter
@@ -0,0 +1,173 @@
+"""
+Persistent AI response cache in SQLite (storage/ai_cache.sqlite3).
+ChatGPT and Azure answers are stored by image hash, provider, model/feature
+and prompt, so re-running a macro over the same screens skips the network.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from ..utils.logger import verbose, error
+
+DEFAULT_PATH = os.path.join("storage", "ai_cache.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class ResponseCache:
+    """SQLite-backed cache of provider responses with TTL and entry-count eviction."""
+
+    def __init__(self, path=DEFAULT_PATH, ttl_hours=24, max_entries=5000):
+        """
+        Args:
+            path: SQLite database file.
+            ttl_hours: Entries older than this are ignored and pruned (0 = never expire).
+            max_entries: Least recently used entries beyond this count are deleted.
+        """
+        self.path = path
+        self.ttl = float(ttl_hours) * 3600
+        self.max_entries = max(1, int(max_entries))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._puts_since_prune = 0
+        self.reset_stats()
+
+    @staticmethod
+    def make_key(image_digest, provider, variant, prompt=""):
+        """Hash of everything that determines a response (image_digest identifies the pixels)."""
+        digest = hashlib.sha256()
+        for part in (provider, variant, prompt or "", image_digest):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _fresh_after(self):
+        return time.time() - self.ttl if self.ttl > 0 else 0.0
+
+    def get(self, key):
+        """Return the cached response, or None if missing or expired."""
+        started = time.perf_counter()
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ? AND created >= ?",
+                                     (key, self._fresh_after())).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                                   (time.time(), key))
+            self.stats["hits" if row else "misses"] += 1
+            self.stats["lookup_total"] += time.perf_counter() - started
+        return row[0] if row else None
+
+    def put(self, key, provider, variant, response):
+        """Store a response, pruning now and then."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, provider, variant, response, created, last_used) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", (key, provider, variant, response, now, now))
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 50:
+                self._prune_locked()
+
+    def _prune_locked(self):
+        self._puts_since_prune = 0
+        expired = self._conn.execute("DELETE FROM responses WHERE created < ?", (self._fresh_after(),)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)).rowcount
+        return expired, overflow
+
+    def prune(self):
+        """Delete expired entries and the least recently used ones above max_entries; return (expired, evicted)."""
+        with self._lock:
+            return self._prune_locked()
+
+    def clear(self, provider=None):
+        """Delete all entries, or only those of one provider; return the number deleted."""
+        with self._lock:
+            if provider:
+                return self._conn.execute("DELETE FROM responses WHERE provider = ?", (provider,)).rowcount
+            return self._conn.execute("DELETE FROM responses").rowcount
+
+    def summary(self):
+        """Return per-provider/variant entry counts, hits and sizes."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT provider, variant, COUNT(*), SUM(hits), SUM(LENGTH(response)), MIN(created), MAX(last_used) "
+                "FROM responses GROUP BY provider, variant ORDER BY provider, variant").fetchall()
+
+    def entries(self, limit=20):
+        """Return the most recently used entries."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, provider, variant, hits, created, last_used, response FROM responses "
+                "ORDER BY last_used DESC LIMIT ?", (limit,)).fetchall()
+
+    def vacuum(self):
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def reset_stats(self):
+        """Zero the lookup counters, e.g. at the start of a run (stored entries are kept)."""
+        self.stats = {"hits": 0, "misses": 0, "lookup_total": 0.0}
+
+    def format_stats(self):
+        """Return the lookup counters since the last reset as a single log line."""
+        s = self.stats
+        lookups = s["hits"] + s["misses"]
+        avg_ms = s["lookup_total"] / lookups * 1000 if lookups else 0.0
+        return f"AI response cache: {s['hits']} hits, {s['misses']} misses, lookup avg {avg_ms:.2f} ms"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Global response cache (created from settings on first use)
+_response_cache = None
+_response_cache_failed = False
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(settings=None):
+    """Get the global response cache, or None if disabled in settings or the database cannot be opened."""
+    global _response_cache, _response_cache_failed
+    settings = settings or {}
+    if not settings.get("ai_cache_enabled", True) or _response_cache_failed:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache(
+                    path=settings.get("ai_cache_path") or DEFAULT_PATH,
+                    ttl_hours=settings.get("ai_cache_ttl_hours", 24),
+                    max_entries=settings.get("ai_cache_max_entries", 5000),
+                )
+                verbose(f"Opened AI response cache at {_response_cache.path}")
+            except sqlite3.Error as e:
+                error(f"AI response cache disabled: {e}")
+                _response_cache_failed = True
+                return None
+        return _response_cache
+
+
+def peek_response_cache():
+    """Return the global response cache if it was opened, without opening it."""
+    return _response_cache
@@ -0,0 +1,149 @@
+"""
+In-memory cache of Image AI results keyed by the captured pixels.
+A capture identical to an earlier one (same provider, feature, prompt and
+options) returns the earlier text without another OCR pass or API call.
+
+With a tolerance, entries also keep a uint8 gray copy and a 16x16 area
+thumbnail. A block average never differs by more than the largest pixel
+difference, so thumbnails rule out most entries before any full-size compare.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from ..utils.logger import verbose
+
+# Captures above this many pixels are only matched exactly (no copy kept for tolerance checks)
+MAX_TOLERANT_PIXELS = 1_000_000
+THUMBNAIL_SIZE = 16
+
+
+def _gray(array):
+    """Cheap luminance approximation used for tolerance comparisons."""
+    if array.ndim == 2:
+        return array.astype(np.uint8, copy=False)
+    return (array[..., :3].sum(axis=2, dtype=np.uint16) // 3).astype(np.uint8)
+
+
+def _thumbnail(gray):
+    """Exact block averages (float32) of a gray capture, at most THUMBNAIL_SIZE per side."""
+    h, w = gray.shape[:2]
+    size = (min(THUMBNAIL_SIZE, w), min(THUMBNAIL_SIZE, h))
+    return cv2.resize(gray.astype(np.float32), size, interpolation=cv2.INTER_AREA)
+
+
+def _tolerant_copy(array):
+    gray = _gray(array)
+    return gray, _thumbnail(gray)
+
+
+class ImageResultCache:
+    """LRU cache of Image AI results with optional per-pixel tolerance."""
+
+    def __init__(self, max_entries=128, tolerance=0):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted (0 disables the cache).
+            tolerance: Largest per-pixel gray difference (0-255) still treated as the same capture;
+                       0 means byte-identical captures only.
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.tolerance = max(0, int(tolerance))
+        self._entries = OrderedDict()  # (context, shape, digest) -> ((gray, thumbnail) or None, text)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @staticmethod
+    def _digest(array):
+        return hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16).hexdigest()
+
+    def lookup(self, array, context):
+        """
+        Return the cached text for a capture, or None on a miss.
+
+        Args:
+            array: Captured pixels (NumPy array).
+            context: Hashable tuple of everything besides the pixels that affects the result.
+        """
+        if not self.max_entries:
+            return None
+        key = (context, array.shape, self._digest(array))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key][1]
+
+            if self.tolerance and array.size <= MAX_TOLERANT_PIXELS:
+                gray, thumbnail = _tolerant_copy(array)
+                limit = self.tolerance + 1e-3  # float32 rounding in the block averages
+                # Most recent first: a looping macro usually matches the last read
+                for other_key in reversed(self._entries):
+                    if other_key[0] != context or other_key[1] != array.shape:
+                        continue
+                    pixels, text = self._entries[other_key]
+                    if pixels is None or np.abs(thumbnail - pixels[1]).max() > limit:
+                        continue
+                    if cv2.absdiff(gray, pixels[0]).max() <= self.tolerance:
+                        self._entries.move_to_end(other_key)
+                        self._stats["near_hits"] += 1
+                        return text
+
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, array, context, text):
+        """Remember the text read from a capture."""
+        if not self.max_entries:
+            return
+        key = (context, array.shape, self._digest(array))
+        pixels = None
+        if self.tolerance and array.size <= MAX_TOLERANT_PIXELS:
+            pixels = _tolerant_copy(array)
+        with self._lock:
+            self._entries[key] = (pixels, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        verbose(f"Cached Image AI result ({len(self._entries)}/{self.max_entries} entries)")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    def stats(self):
+        """Return hit/miss counters and the hit rate."""
+        s = dict(self._stats)
+        lookups = s["hits"] + s["near_hits"] + s["misses"]
+        s["entries"] = len(self._entries)
+        s["hit_rate"] = (s["hits"] + s["near_hits"]) / lookups if lookups else 0.0
+        return s
+
+    def format_stats(self):
+        """Return counters as a single log line."""
+        s = self.stats()
+        return (f"Image AI cache: {s['hits']} hits, {s['near_hits']} near hits, {s['misses']} misses "
+                f"(hit rate {s['hit_rate']:.0%}), {s['evictions']} evictions, {s['entries']} entries")
+
+
+# Global result cache (created from settings on first use)
+_result_cache = None
+
+
+def get_result_cache(settings=None):
+    """Get the global Image AI result cache, creating it from `settings` on first use."""
+    global _result_cache
+    if _result_cache is None:
+        settings = settings or {}
+        _result_cache = ImageResultCache(
+            max_entries=settings.get("image_ai_cache_size", 128),
+            tolerance=settings.get("image_ai_cache_tolerance", 0),
+        )
+    return _result_cache
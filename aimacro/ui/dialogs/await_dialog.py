@@ -0,0 +1,60 @@
+"""
+Await Variable dialog for waiting on the result of an async Image AI event.
+"""
+import tkinter as tk
+from tkinter import ttk
+from . import bind_enter_key
+
+
+def open_await_window(parent, coords_callback, variables, initial_values=None):
+    """Open the Await Variable settings window."""
+    iv = initial_values or {}
+    item_id = iv.get("item_id") or iv.get("item_number")
+
+    win = tk.Toplevel(parent)
+    win.title("Edit Await Variable" if item_id else "Add Await Variable")
+
+    screen_width = win.winfo_screenwidth()
+    screen_height = win.winfo_screenheight()
+    win.geometry(f"{int(screen_width * 0.25)}x{int(screen_height * 0.25)}")
+    win.attributes("-topmost", True)
+
+    names = [name for name in (variables or {}) if not name.startswith("time_")]
+
+    tk.Label(win, text="Variable (filled by an async Image AI event):").pack(pady=5)
+    variable_dropdown = ttk.Combobox(win, values=names)
+    variable_dropdown.pack(pady=5)
+
+    tk.Label(win, text="Timeout (seconds):").pack(pady=5)
+    timeout_entry = tk.Entry(win)
+    timeout_entry.pack(pady=5)
+
+    if iv.get("variable"):
+        variable_dropdown.set(iv["variable"])
+    elif names:
+        variable_dropdown.set(names[0])
+    timeout_entry.insert(0, str(iv.get("timeout") or "30.0"))
+
+    def save_await_event():
+        """Save the Await Variable event."""
+        variable_name = variable_dropdown.get().strip()
+        if not variable_name.isidentifier():
+            print("Please enter a valid variable name.")
+            return
+        try:
+            timeout = float(timeout_entry.get())
+        except ValueError:
+            print("Invalid timeout, please enter a number.")
+            return
+        event = f"Await Variable - Variable: {variable_name}, Timeout: {timeout}s"
+
+        if item_id is not None:
+            coords_callback(event, item_id=item_id)
+        else:
+            coords_callback(event)
+
+        print(f"{'Updated' if item_id is not None else 'Added'} Await Variable event: {event}")
+        win.destroy()
+
+    tk.Button(win, text="OK", command=save_await_event).pack(pady=10)
+    bind_enter_key(win, save_await_event, timeout_entry)
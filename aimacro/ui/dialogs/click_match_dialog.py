@@ -0,0 +1,68 @@
+"""
+Click Match dialog for clicking matches stored by a 'Find All' pattern search.
+"""
+import tkinter as tk
+from tkinter import ttk
+from . import bind_enter_key
+
+
+def open_click_match_window(parent, coords_callback, variables, initial_values=None):
+    """Open the Click Match settings window."""
+    iv = initial_values or {}
+    item_id = iv.get("item_id") or iv.get("item_number")
+
+    win = tk.Toplevel(parent)
+    win.title("Edit Click Match" if item_id else "Add Click Match")
+
+    screen_width = win.winfo_screenwidth()
+    screen_height = win.winfo_screenheight()
+    win.geometry(f"{int(screen_width * 0.25)}x{int(screen_height * 0.3)}")
+    win.attributes("-topmost", True)
+
+    # Variables created by Find All searches have a companion "<name>_matches" entry
+    names = [name[:-len("_matches")] for name in (variables or {}) if name.endswith("_matches")]
+
+    tk.Label(win, text="Find All Variable:").pack(pady=5)
+    variable_dropdown = ttk.Combobox(win, values=names)
+    variable_dropdown.pack(pady=5)
+
+    tk.Label(win, text="Mode:").pack(pady=5)
+    mode_dropdown = ttk.Combobox(win, values=["Next", "All"], state="readonly")
+    mode_dropdown.set("Next")
+    mode_dropdown.pack(pady=5)
+
+    tk.Label(win, text="Interval after each click (seconds):").pack(pady=5)
+    interval_entry = tk.Entry(win)
+    interval_entry.pack(pady=5)
+
+    if iv.get("variable"):
+        variable_dropdown.set(iv["variable"])
+    elif names:
+        variable_dropdown.set(names[0])
+    if iv.get("mode"):
+        mode_dropdown.set(iv["mode"])
+    interval_entry.insert(0, str(iv.get("interval") or "0.2"))
+
+    def save_click_match_event():
+        """Save the Click Match event."""
+        variable_name = variable_dropdown.get().strip()
+        if not variable_name.isidentifier():
+            print("Please enter a valid variable name.")
+            return
+        try:
+            interval = float(interval_entry.get())
+        except ValueError:
+            print("Invalid interval, please enter a number.")
+            return
+        event = f"Click Match - Variable: {variable_name}, Mode: {mode_dropdown.get()}, Interval: {interval}s"
+
+        if item_id is not None:
+            coords_callback(event, item_id=item_id)
+        else:
+            coords_callback(event)
+
+        print(f"{'Updated' if item_id is not None else 'Added'} Click Match event: {event}")
+        win.destroy()
+
+    tk.Button(win, text="OK", command=save_click_match_event).pack(pady=10)
+    bind_enter_key(win, save_click_match_event, interval_entry)
@@ -0,0 +1,101 @@
+"""
+Glyph training dialog: teach Glyph OCR a fixed font from labeled captures.
+"""
+import tkinter as tk
+import tkinter.messagebox as messagebox
+
+from aimacro.utils.image_utils import RegionCapture, render_base64_on_label, encode_image_to_base64
+from aimacro.services.glyph_ocr import get_glyph_ocr
+from . import bind_enter_key
+
+
+def open_glyph_training_window(parent, font_name=None, on_close=None):
+    """
+    Open the glyph training window.
+
+    - parent: owning window
+    - font_name: font to prefill (optional)
+    - on_close: function(font_name) called when the window is closed (optional)
+    """
+    win = tk.Toplevel(parent)
+    win.title("Train Glyph OCR")
+    screen_width, screen_height = win.winfo_screenwidth(), win.winfo_screenheight()
+    win.geometry(f"{int(screen_width * 0.3)}x{int(screen_height * 0.5)}")
+    win.attributes("-topmost", True)
+    win.sample = None
+
+    tk.Label(win, text="Font Name:").pack(pady=5)
+    font_entry = tk.Entry(win)
+    font_entry.insert(0, font_name or "")
+    font_entry.pack(pady=5)
+
+    tk.Label(win, text="Capture a field, type exactly what it shows, then Add Sample.\n"
+                       "A few samples covering every character are enough.").pack(pady=5)
+    preview_label = tk.Label(win, text="No sample captured yet")
+
+    def capture_sample():
+        img, _ = RegionCapture().capture()
+        if img is None:
+            print("Capture aborted.")
+            return
+        win.sample = img
+        render_base64_on_label(preview_label, encode_image_to_base64(img), size=(300, 60))
+        status_label.config(text="")
+
+    tk.Button(win, text="Capture Sample (F8 twice)", command=capture_sample).pack(pady=5)
+    preview_label.pack(pady=5)
+
+    tk.Label(win, text="Sample Text:").pack(pady=5)
+    text_entry = tk.Entry(win)
+    text_entry.pack(pady=5)
+
+    status_label = tk.Label(win, text="")
+
+    def get_font():
+        name = font_entry.get().strip()
+        if not name.isidentifier():
+            messagebox.showerror("Invalid Font Name", "Use letters, digits and underscores only.", parent=win)
+            return None
+        return name
+
+    def add_sample():
+        name = get_font()
+        if name is None:
+            return
+        if win.sample is None:
+            messagebox.showerror("Missing Sample", "Please capture a sample first.", parent=win)
+            return
+        try:
+            count = get_glyph_ocr().train(name, win.sample, text_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Sample Not Added", str(e), parent=win)
+            return
+        font = get_glyph_ocr().font(name)
+        status_label.config(text=f"Learned {count} glyphs; '{name}' knows: {''.join(sorted(set(font.chars)))}")
+
+    def test_read():
+        name = get_font()
+        if name is None or win.sample is None:
+            return
+        try:
+            text, score = get_glyph_ocr().read(name, win.sample)
+        except ValueError as e:
+            status_label.config(text=str(e))
+            return
+        status_label.config(text=f"Read: {text!r} (lowest glyph score {score:.2f})")
+
+    button_frame = tk.Frame(win)
+    button_frame.pack(pady=5)
+    tk.Button(button_frame, text="Add Sample", command=add_sample).grid(row=0, column=0, padx=5)
+    tk.Button(button_frame, text="Test Read", command=test_read).grid(row=0, column=1, padx=5)
+    status_label.pack(pady=5)
+
+    def close():
+        name = font_entry.get().strip()
+        win.destroy()
+        if on_close:
+            on_close(name)
+
+    tk.Button(win, text="Close", command=close).pack(pady=10)
+    win.protocol("WM_DELETE_WINDOW", close)
+    bind_enter_key(win, add_sample, text_entry)
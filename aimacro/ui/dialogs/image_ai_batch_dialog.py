@@ -0,0 +1,149 @@
+"""
+Image AI Batch dialog: several screen regions read in one event, one variable per region.
+"""
+import ast
+import tkinter as tk
+from tkinter import ttk
+import tkinter.messagebox as messagebox
+from aimacro.utils.image_utils import RegionCapture, parse_coords
+from aimacro.services.glyph_ocr import list_glyph_fonts
+from . import bind_enter_key
+
+FEATURES = {
+    "Local OCR": ["recognize", "ocr"],
+    "Glyph OCR": [],  # filled with the trained fonts
+    "ChatGPT": ["vision"],
+    "Azure": ["read", "ocr"],
+}
+
+
+def open_image_ai_batch_window(parent, coords_callback, initial_values=None):
+    """Open the Image AI Batch window. Edit mode auto-detected from initial_values['item_id']."""
+    iv = initial_values or {}
+    item_id = iv.get("item_id") or iv.get("item_number")
+
+    win = tk.Toplevel(parent)
+    win.title("Edit Image AI Batch" if item_id else "Add Image AI Batch")
+    screen_width, screen_height = win.winfo_screenwidth(), win.winfo_screenheight()
+    win.geometry(f"{int(screen_width * 0.35)}x{int(screen_height * 0.6)}")
+    win.attributes("-topmost", True)
+
+    regions = []  # [{'area': {'start': (x, y), 'end': (x, y)}, 'variable': name}, ...]
+
+    tk.Label(win, text="Regions (captured together, one variable each):").pack(pady=5)
+    region_list = tk.Listbox(win, height=8, width=60)
+    region_list.pack(pady=5)
+
+    def refresh_regions():
+        region_list.delete(0, tk.END)
+        for region in regions:
+            region_list.insert(tk.END, f"{region['variable']}: {region['area']['start']} -> {region['area']['end']}")
+
+    tk.Label(win, text="Variable for the next region:").pack(pady=5)
+    variable_entry = tk.Entry(win)
+    variable_entry.pack(pady=5)
+
+    def add_region():
+        variable_name = variable_entry.get().strip()
+        if not variable_name.isidentifier():
+            messagebox.showerror("Missing Variable Name", "Enter a variable name before adding a region.", parent=win)
+            return
+        _, coords = RegionCapture().capture()
+        if not coords:
+            print("Capture aborted.")
+            return
+        regions.append({"area": coords, "variable": variable_name})
+        variable_entry.delete(0, tk.END)
+        refresh_regions()
+
+    def remove_region():
+        for index in reversed(region_list.curselection()):
+            del regions[index]
+        refresh_regions()
+
+    buttons = tk.Frame(win)
+    buttons.pack(pady=5)
+    tk.Button(buttons, text="Add Region (F8 twice)", command=add_region).pack(side=tk.LEFT, padx=5)
+    tk.Button(buttons, text="Remove Selected", command=remove_region).pack(side=tk.LEFT, padx=5)
+
+    tk.Label(win, text="Select AI Provider:").pack(pady=5)
+    provider_dropdown = ttk.Combobox(win, values=list(FEATURES), state="readonly")
+    provider_dropdown.set("Local OCR")
+    provider_dropdown.pack(pady=5)
+
+    tk.Label(win, text="Feature / Glyph Font:").pack(pady=5)
+    feature_dropdown = ttk.Combobox(win)
+    feature_dropdown.pack(pady=5)
+
+    def on_provider_change(*_):
+        provider = provider_dropdown.get()
+        values = list_glyph_fonts() if provider == "Glyph OCR" else FEATURES[provider]
+        feature_dropdown.config(values=values)
+        if feature_dropdown.get() not in values:
+            feature_dropdown.set(values[0] if values else "")
+    provider_dropdown.bind("<<ComboboxSelected>>", on_provider_change)
+    on_provider_change()
+
+    tk.Label(win, text="Allowed Characters (optional, Local/Glyph OCR):").pack(pady=5)
+    allowlist_entry = tk.Entry(win)
+    allowlist_entry.pack(pady=5)
+
+    tk.Label(win, text="Prompt (optional, ChatGPT):").pack(pady=5)
+    prompt_entry = tk.Entry(win, width=50)
+    prompt_entry.pack(pady=5)
+
+    # ---- Populate for edit ----
+    if iv.get("regions"):
+        try:
+            for region in ast.literal_eval(iv["regions"]):
+                area = parse_coords(region.get("area"))
+                if area and region.get("variable"):
+                    regions.append({"area": area, "variable": region["variable"]})
+        except (ValueError, SyntaxError):
+            pass
+        refresh_regions()
+    if iv.get("ai_provider") in FEATURES:
+        provider_dropdown.set(iv["ai_provider"])
+        on_provider_change()
+    if iv.get("feature"):
+        feature_dropdown.set(iv["feature"])
+    if iv.get("options"):
+        try:
+            allowlist_entry.insert(0, ast.literal_eval(iv["options"]).get("allowlist", ""))
+        except (ValueError, SyntaxError):
+            pass
+    prompt_entry.insert(0, iv.get("variable_content") or "")
+
+    def save_batch_event():
+        if not regions:
+            messagebox.showerror("Missing Regions", "Add at least one region first.", parent=win)
+            return
+        provider = provider_dropdown.get()
+        feature = feature_dropdown.get().strip()
+        if not feature:
+            messagebox.showerror("Missing Feature", "Select a feature or glyph font first.", parent=win)
+            return
+        options = {}
+        if provider in ("Local OCR", "Glyph OCR") and allowlist_entry.get():
+            options["allowlist"] = allowlist_entry.get()
+
+        # Make sure every target variable exists
+        if hasattr(parent, "variables"):
+            for region in regions:
+                parent.variables.setdefault(region["variable"], "")
+            if hasattr(parent, "page2") and hasattr(parent.page2, "update_variables_list"):
+                parent.page2.update_variables_list()
+
+        event = (f"Image AI Batch - Provider: {provider}, Feature: {feature}, Regions: {regions}, "
+                 + (f"Options: {options}, " if options else "") +
+                 f"Variable Content: {prompt_entry.get()}")
+        if item_id is not None:
+            coords_callback(event, item_id=item_id)
+        else:
+            coords_callback(event)
+
+        print(f"{'Updated' if item_id is not None else 'Added'} Image AI Batch event: {event}")
+        win.destroy()
+
+    tk.Button(win, text="OK", command=save_batch_event).pack(pady=10)
+    bind_enter_key(win, save_batch_event, variable_entry)
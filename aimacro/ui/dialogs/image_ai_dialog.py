@@ -1,8 +1,12 @@
 # image_ai_dialog.py
+import re
+import ast
 import tkinter as tk
-from tkinter import Toplevel
+from tkinter import Toplevel, ttk
 import tkinter.messagebox as messagebox
 from aimacro.utils.image_utils import select_area, parse_coords, update_image_from_coords
+from aimacro.services.glyph_ocr import list_glyph_fonts
+from .glyph_training_dialog import open_glyph_training_window
 from . import bind_enter_key
 
 def open_image_ai_window(parent, coords_callback, variables=None, initial_values=None):
@@ -62,7 +66,7 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
     # Dropdown for selecting AI provider
     tk.Label(scrollable, text="Select AI Provider:").pack(pady=5)
     ai_provider_var = tk.StringVar(value="ChatGPT")  # Default to Azure
-    ai_provider_dropdown = tk.OptionMenu(scrollable, ai_provider_var, "ChatGPT", "Local OCR", "Azure")
+    ai_provider_dropdown = tk.OptionMenu(scrollable, ai_provider_var, "ChatGPT", "Local OCR", "Glyph OCR", "Azure", "Auto")
     ai_provider_dropdown.pack(pady=5)
 
     # Dropdown for selecting feature (Azure-specific)
@@ -70,6 +74,52 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
     feature_var = tk.StringVar(value="ocr")  # Default to OCR
     feature_dropdown = tk.OptionMenu(scrollable, feature_var, "ocr", "describe", "analyze", "detect_faces", "object_detection", "landmark_recognition", "content_moderation", "read", "generate_thumbnail")
 
+    # Local OCR mode and character allowlist
+    local_mode_label = tk.Label(scrollable, text="Local OCR Mode:")
+    local_mode_var = tk.StringVar(value="ocr")
+    local_mode_dropdown = tk.OptionMenu(scrollable, local_mode_var, "ocr", "recognize")
+    local_mode_hint = tk.Label(scrollable, text="recognize: read the whole area as one line, no text detection")
+    precision_label = tk.Label(scrollable, text="Recognizer Precision:")
+    precision_var = tk.StringVar(value="default")
+    precision_dropdown = tk.OptionMenu(scrollable, precision_var, "default", "int8", "fp32")
+    allowlist_label = tk.Label(scrollable, text="Allowed Characters (optional, e.g. 0123456789):")
+    allowlist_entry = tk.Entry(scrollable)
+
+    # Glyph OCR font (templates trained from labeled captures)
+    glyph_font_label = tk.Label(scrollable, text="Glyph Font:")
+    glyph_font_dropdown = ttk.Combobox(scrollable, values=list_glyph_fonts())
+
+    def on_training_closed(font_name):
+        glyph_font_dropdown.config(values=list_glyph_fonts())
+        if font_name:
+            glyph_font_dropdown.set(font_name)
+
+    glyph_train_button = tk.Button(
+        scrollable, text="Train Glyphs...",
+        command=lambda: open_glyph_training_window(win, glyph_font_dropdown.get(), on_close=on_training_closed)
+    )
+
+    # Upload size controls for ChatGPT/Azure ("default" = use the global settings)
+    upload_format_label = tk.Label(scrollable, text="Upload Format:")
+    upload_format_var = tk.StringVar(value="default")
+    upload_format_dropdown = tk.OptionMenu(scrollable, upload_format_var, "default", "PNG", "JPEG", "WEBP")
+    upload_quality_label = tk.Label(scrollable, text="JPEG/WebP Quality (optional, 1-95):")
+    upload_quality_entry = tk.Entry(scrollable)
+    max_dim_label = tk.Label(scrollable, text="Max Upload Dimension in px (optional):")
+    max_dim_entry = tk.Entry(scrollable)
+    detail_label = tk.Label(scrollable, text="Image Detail:")
+    detail_var = tk.StringVar(value="default")
+    detail_dropdown = tk.OptionMenu(scrollable, detail_var, "default", "low", "high", "auto")
+    # Streaming for ChatGPT: stop reading once the stop pattern matches
+    stream_label = tk.Label(scrollable, text="Stream Response:")
+    stream_var = tk.StringVar(value="default")
+    stream_dropdown = tk.OptionMenu(scrollable, stream_var, "default", "on", "off")
+    stop_label = tk.Label(scrollable, text="Stop Pattern (optional regex, e.g. \\d+):")
+    stop_entry = tk.Entry(scrollable)
+    stream_widgets = (stream_label, stream_dropdown, stop_label, stop_entry)
+    upload_widgets = (upload_format_label, upload_format_dropdown, upload_quality_label, upload_quality_entry,
+                      max_dim_label, max_dim_entry)
+
     # Prompt field
     prompt_label = tk.Label(scrollable, text="Image AI content (prompt / expected text)")
     variable_message = tk.Entry(scrollable)
@@ -77,6 +127,9 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
     # Variable entry (always visible, used as anchor point)
     variable_name_label = tk.Label(scrollable, text="Output Variable Name:")
     variable_entry = tk.Entry(scrollable)
+    async_var = tk.BooleanVar(value=False)
+    async_check = tk.Checkbutton(scrollable, text="Run in background (If / Await Variable wait for the result)",
+                                 variable=async_var)
 
     def repack_all_elements():
         """Repack all elements in the correct order based on provider"""
@@ -87,6 +140,10 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
         feature_dropdown.pack_forget()
         prompt_label.pack_forget()
         variable_message.pack_forget()
+        for widget in (local_mode_label, local_mode_dropdown, local_mode_hint, precision_label, precision_dropdown,
+                       allowlist_label, allowlist_entry, glyph_font_label, glyph_font_dropdown, glyph_train_button,
+                       detail_label, detail_dropdown) + upload_widgets + stream_widgets:
+            widget.pack_forget()
         
         # Pack in correct order before variable_name_label
         if provider == "Azure":
@@ -94,10 +151,26 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
             feature_dropdown.pack(pady=5, before=variable_name_label)
             prompt_label.pack(pady=5, before=variable_name_label)
             variable_message.pack(pady=5, before=variable_name_label)
+            for widget in upload_widgets:
+                widget.pack(pady=5, before=variable_name_label)
         elif provider == "ChatGPT":
             prompt_label.pack(pady=5, before=variable_name_label)
             variable_message.pack(pady=5, before=variable_name_label)
-        # Local OCR: nothing to pack (prompt is hidden)
+            for widget in upload_widgets + (detail_label, detail_dropdown) + stream_widgets:
+                widget.pack(pady=5, before=variable_name_label)
+        elif provider == "Local OCR":
+            # Prompt is hidden; show mode and allowlist instead
+            for widget in (local_mode_label, local_mode_dropdown, local_mode_hint, precision_label, precision_dropdown,
+                           allowlist_label, allowlist_entry):
+                widget.pack(pady=5, before=variable_name_label)
+        elif provider == "Glyph OCR":
+            for widget in (glyph_font_label, glyph_font_dropdown, glyph_train_button, allowlist_label, allowlist_entry):
+                widget.pack(pady=5, before=variable_name_label)
+        elif provider == "Auto":
+            # Routed to Local OCR, Azure Read or ChatGPT; the prompt is only used by ChatGPT
+            for widget in (local_mode_label, local_mode_dropdown, allowlist_label, allowlist_entry,
+                           prompt_label, variable_message):
+                widget.pack(pady=5, before=variable_name_label)
 
     def on_provider_change(*args):
         """Handle provider change"""
@@ -106,6 +179,7 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
     # Pack variable entry (always visible)
     variable_name_label.pack(pady=5)
     variable_entry.pack(pady=5)
+    async_check.pack(pady=5)
 
     # Bind the provider change event
     ai_provider_var.trace("w", on_provider_change)
@@ -130,12 +204,68 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
             on_provider_change()
         if "feature" in iv:
             feature_var.set(iv["feature"])
+            if iv["feature"] in ("ocr", "recognize"):
+                local_mode_var.set(iv["feature"])
+            elif iv.get("ai_provider") == "Glyph OCR":
+                glyph_font_dropdown.set(iv["feature"])
+        if iv.get("options"):
+            try:
+                options = ast.literal_eval(iv["options"])
+            except (ValueError, SyntaxError):
+                options = {}
+            allowlist_entry.insert(0, options.get("allowlist", ""))
+            if options.get("quantize") is not None:
+                precision_var.set("int8" if options["quantize"] else "fp32")
+            upload_format_var.set(options.get("format", "default"))
+            detail_var.set(options.get("detail", "default"))
+            if "stream" in options:
+                stream_var.set("on" if options["stream"] else "off")
+            stop_entry.insert(0, options.get("stop", ""))
+            upload_quality_entry.insert(0, str(options.get("quality", "")))
+            max_dim_entry.insert(0, str(options.get("max_dim", "")))
+            async_var.set(bool(options.get("async")))
 
     def save_image_ai_event():
         variable_name = variable_entry.get().strip()
         variable_content = variable_message.get()
         ai_provider = ai_provider_var.get()
-        feature = feature_var.get() if ai_provider == "Azure" else ("vision" if ai_provider == "ChatGPT" else "ocr")
+        feature = feature_var.get() if ai_provider == "Azure" else ("vision" if ai_provider == "ChatGPT" else local_mode_var.get())
+        if ai_provider == "Glyph OCR":
+            feature = glyph_font_dropdown.get().strip()
+            if not feature.isidentifier():
+                messagebox.showerror("Missing Glyph Font", "Please select or train a glyph font first.", parent=win)
+                return
+        options = {}
+        if ai_provider in ("Local OCR", "Glyph OCR", "Auto") and allowlist_entry.get():
+            options["allowlist"] = allowlist_entry.get()
+        if ai_provider == "Local OCR" and precision_var.get() != "default":
+            options["quantize"] = precision_var.get() == "int8"
+        if ai_provider in ("ChatGPT", "Azure"):
+            if upload_format_var.get() != "default":
+                options["format"] = upload_format_var.get()
+            try:
+                if upload_quality_entry.get().strip():
+                    options["quality"] = min(95, max(1, int(upload_quality_entry.get())))
+                if max_dim_entry.get().strip():
+                    options["max_dim"] = max(0, int(max_dim_entry.get()))
+            except ValueError:
+                messagebox.showerror("Invalid Upload Size", "Quality and max dimension must be whole numbers.",
+                                     parent=win)
+                return
+        if ai_provider == "ChatGPT" and detail_var.get() != "default":
+            options["detail"] = detail_var.get()
+        if ai_provider == "ChatGPT" and stream_var.get() != "default":
+            options["stream"] = stream_var.get() == "on"
+        if ai_provider == "ChatGPT" and stop_entry.get():
+            try:
+                re.compile(stop_entry.get())
+            except re.error as e:
+                messagebox.showerror("Invalid Stop Pattern", f"The stop pattern is not a valid regex: {e}",
+                                     parent=win)
+                return
+            options["stop"] = stop_entry.get()
+        if async_var.get():
+            options["async"] = True
 
         if not variable_name:
             messagebox.showerror("Missing Variable Name", "Please provide a variable name before saving.", parent=win)
@@ -158,6 +288,7 @@ def open_image_ai_window(parent, coords_callback, variables=None, initial_values
         coords = win.image_ai_coords
         event = (f"Image AI - Provider: {ai_provider}, Feature: {feature}, Area: {coords}, "
                  f"Variable: {variable_name}, "
+                 + (f"Options: {options}, " if options else "") +
                  f"Variable Content: {variable_content}")
         values = (coords, variable_name, variable_content, ai_provider, feature)
 
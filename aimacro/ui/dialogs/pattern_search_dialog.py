@@ -161,6 +161,14 @@ def open_pattern_window(
     tk.Checkbutton(scrollable_frame, text="Click if Found",
                    variable=click_var).pack(pady=5)
 
+    find_all_var = tk.BooleanVar()
+    find_all_frame = tk.Frame(scrollable_frame)
+    find_all_frame.pack(pady=5)
+    find_all_entry = Entry(find_all_frame, width=15, state="disabled")
+    tk.Checkbutton(find_all_frame, text="Find all matches, store in variable:", variable=find_all_var,
+                   command=lambda: find_all_entry.config(state="normal" if find_all_var.get() else "disabled")).grid(row=0, column=0, padx=5)
+    find_all_entry.grid(row=0, column=1, padx=5)
+
     Label(scrollable_frame, text="Wait Time (seconds):").pack(pady=5)
     wait_time_entry = Entry(scrollable_frame)
     wait_time_entry.insert(0, "5")
@@ -200,6 +208,10 @@ def open_pattern_window(
         set_bool_var(fail_send_var, iv.get('fail_send'))
         if iv.get('fail_notification'):
             fail_notification_dropdown.set(iv['fail_notification'])
+        if iv.get('find_all'):
+            find_all_var.set(True)
+            find_all_entry.config(state="normal")
+            find_all_entry.insert(0, iv['find_all'])
 
     if initial_values:
         populate_fields_from_initial_values()
@@ -248,6 +260,9 @@ def open_pattern_window(
                 event += f", Succeed Notification: {succeed_notification}"
             if fail_send and fail_notification != "None":
                 event += f", Fail Notification: {fail_notification}"
+            find_all = find_all_entry.get().strip() if find_all_var.get() else ""
+            if find_all:
+                event += f", Find All: {find_all}"
 
             values = (
                 pattern_window.pattern_image_base64,
@@ -261,7 +276,8 @@ def open_pattern_window(
                 str(succeed_send),
                 succeed_notification,
                 str(fail_send),
-                fail_notification
+                fail_notification,
+                find_all
             )
 
             if item_id is not None:
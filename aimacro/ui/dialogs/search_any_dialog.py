@@ -0,0 +1,144 @@
+# search_any_dialog.py
+import tkinter as tk
+from tkinter import Toplevel, Label, Button, Entry, ttk
+import tkinter.messagebox as messagebox
+
+from aimacro.utils.image_utils import RegionCapture, select_area, update_image_from_coords, render_base64_on_label, encode_image_to_base64
+from . import bind_enter_key
+
+
+def open_search_any_window(parent, coords_callback, initial_values=None, checkpoints=None):
+    """
+    Open the 'Search Any' window: several patterns matched against one capture,
+    each with its own checkpoint.
+
+    - parent: Page1 (or any widget exposing .checkpoints)
+    - coords_callback: function(event_text, values=tuple, item_id=optional)
+    - initial_values: dict for prefill ('search_coords', 'patterns', 'fail_checkpoint', 'click', 'wait_time', 'item_id')
+    - checkpoints: iterable for the checkpoint comboboxes (optional)
+    """
+    iv = initial_values or {}
+    item_id = iv.get("item_id")
+
+    win = Toplevel(parent)
+    win.title("Search Any Pattern")
+    win.search_coords = None
+    win.patterns = list(iv.get("patterns") or [])
+    screen_width, screen_height = win.winfo_screenwidth(), win.winfo_screenheight()
+    win.geometry(f"{int(screen_width*0.4)}x{int(screen_height*0.8)}")
+    win.attributes("-topmost", True)
+
+    if checkpoints is None:
+        try:
+            checkpoints = list(parent.checkpoints.keys())
+        except Exception:
+            checkpoints = []
+    goto_values = ["Next"] + list(checkpoints)
+
+    Label(win, text="Define Search Area (optional, full screen if empty)").pack(pady=5)
+    search_preview_label = Label(win, text="No search area selected yet")
+    Button(win, text="Select Search Area",
+           command=lambda: select_area(win, search_preview_label, "search")).pack(pady=5)
+    search_preview_label.pack(pady=5)
+
+    # ---- Pattern list ----
+    Label(win, text="Patterns (first match in list order wins):").pack(pady=5)
+    patterns_listbox = tk.Listbox(win, height=6, width=50)
+    patterns_listbox.pack(pady=5)
+    pattern_preview_label = Label(win, text="")
+    pattern_preview_label.pack(pady=5)
+
+    add_frame = tk.Frame(win)
+    add_frame.pack(pady=5)
+    Label(add_frame, text="Go To:").grid(row=0, column=0, padx=5)
+    goto_dropdown = ttk.Combobox(add_frame, values=goto_values, state="readonly", width=15)
+    goto_dropdown.set("Next")
+    goto_dropdown.grid(row=0, column=1, padx=5)
+    Label(add_frame, text="Threshold:").grid(row=0, column=2, padx=5)
+    threshold_entry = Entry(add_frame, width=6)
+    threshold_entry.insert(0, "0.8")
+    threshold_entry.grid(row=0, column=3, padx=5)
+
+    def refresh_patterns():
+        patterns_listbox.delete(0, tk.END)
+        for i, p in enumerate(win.patterns):
+            patterns_listbox.insert(tk.END, f"#{i}: Go To {p['goto']} (threshold {p['threshold']})")
+
+    def on_pattern_select(_):
+        selected = patterns_listbox.curselection()
+        if selected:
+            render_base64_on_label(pattern_preview_label, win.patterns[selected[0]]["image"], size=(150, 100))
+
+    def add_pattern():
+        try:
+            threshold = float(threshold_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Threshold", "Threshold must be a number.", parent=win)
+            return
+        img, coords = RegionCapture().capture()
+        if img is None:
+            print("Capture aborted.")
+            return
+        win.patterns.append({"image": encode_image_to_base64(img), "threshold": threshold, "goto": goto_dropdown.get()})
+        refresh_patterns()
+
+    def remove_pattern():
+        for index in reversed(patterns_listbox.curselection()):
+            del win.patterns[index]
+        refresh_patterns()
+
+    patterns_listbox.bind("<<ListboxSelect>>", on_pattern_select)
+    button_frame = tk.Frame(win)
+    button_frame.pack(pady=5)
+    Button(button_frame, text="Add Pattern", command=add_pattern).grid(row=0, column=0, padx=5)
+    Button(button_frame, text="Remove Selected", command=remove_pattern).grid(row=0, column=1, padx=5)
+
+    Label(win, text="If None Found, Go To:").pack(pady=5)
+    fail_dropdown = ttk.Combobox(win, values=goto_values, state="readonly")
+    fail_dropdown.set("Next")
+    fail_dropdown.pack(pady=5)
+
+    click_var = tk.BooleanVar()
+    tk.Checkbutton(win, text="Click if Found", variable=click_var).pack(pady=5)
+
+    Label(win, text="Wait Time (seconds):").pack(pady=5)
+    wait_time_entry = Entry(win)
+    wait_time_entry.insert(0, "5")
+    wait_time_entry.pack(pady=5)
+
+    # ---- Populate for edit ----
+    if iv.get("search_coords") and iv["search_coords"] != "Full Screen":
+        update_image_from_coords(win, iv["search_coords"], search_preview_label, "search")
+    if iv.get("fail_checkpoint"):
+        fail_dropdown.set(iv["fail_checkpoint"])
+    if iv.get("click") is not None:
+        click_var.set(str(iv["click"]).lower() in ("true", "1"))
+    if iv.get("wait_time") is not None:
+        wait_time_entry.delete(0, tk.END); wait_time_entry.insert(0, str(iv["wait_time"]))
+    refresh_patterns()
+
+    def save_search_any_event():
+        try:
+            wait_time = float(wait_time_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Wait Time", "Wait time must be a number.", parent=win)
+            return
+        if not win.patterns:
+            messagebox.showerror("Missing Patterns", "Please add at least one pattern.", parent=win)
+            return
+
+        search_coords = win.search_coords or "Full Screen"
+        event = (f"Search Any - Search Area: {search_coords}, Fail Go To: {fail_dropdown.get()}, "
+                 f"Click: {click_var.get()}, Wait: {wait_time}s, Patterns: {win.patterns}")
+        values = (search_coords, fail_dropdown.get(), str(click_var.get()), str(wait_time), len(win.patterns))
+
+        if item_id is not None:
+            coords_callback(event, item_id=item_id, values=values)
+        else:
+            coords_callback(event, values=values)
+
+        print(f"{'Updated' if item_id is not None else 'Added'} Search Any event with {len(win.patterns)} patterns")
+        win.destroy()
+
+    Button(win, text="OK", command=save_search_any_event).pack(pady=10)
+    bind_enter_key(win, save_search_any_event, wait_time_entry)
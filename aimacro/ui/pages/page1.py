@@ -8,7 +8,11 @@ from ..widgets.draggable_treeview import DraggableTreeview
 from ..dialogs.checkpoint_dialog import open_checkpoint_window
 from ..dialogs.wait_dialog import open_wait_window
 from ..dialogs.pattern_search_dialog import open_pattern_window
+from ..dialogs.search_any_dialog import open_search_any_window
+from ..dialogs.click_match_dialog import open_click_match_window
+from ..dialogs.await_dialog import open_await_window
 from ..dialogs.image_ai_dialog import open_image_ai_window
+from ..dialogs.image_ai_batch_dialog import open_image_ai_batch_window
 from ..dialogs.if_condition_dialog import open_if_window
 import base64
 import io
@@ -24,6 +28,7 @@ class Page1(tk.Frame):
         self.current_profile = None
         self.run_continuously = tk.BooleanVar(value=False)
         self.variables = {}  # Dictionary to store OCR values
+        self.pending_results = {}  # Variable name -> Future of an async Image AI event still running
         self.checkpoints = {}  # Dictionary to store checkpoints (name: index)
         self.start_recording_key = master.master.settings.get("start_macro_record_shortcut", "r")
         self.stop_recording_key = master.master.settings.get("stop_macro_record_shortcut", "s")
@@ -90,6 +95,9 @@ class Page1(tk.Frame):
         self.ocr_button = ttk.Button(button_frame, image=self.ocr_icon, style="Custom.TButton", command=self.open_image_ai_window_wrapper)
         self.ocr_button.pack(side=tk.LEFT, padx=5)
 
+        self.ocr_batch_button = ttk.Button(button_frame, image=self.ocr_icon, text="Batch", compound=tk.LEFT, style="Custom.TButton", command=self.open_image_ai_batch_window_wrapper)
+        self.ocr_batch_button.pack(side=tk.LEFT, padx=5)
+
         self.if_button = ttk.Button(button_frame, image=self.if_icon, style="Custom.TButton", command=self.open_if_window_wrapper)
         self.if_button.pack(side=tk.LEFT, padx=5)
 
@@ -99,6 +107,15 @@ class Page1(tk.Frame):
         self.pattern_button = ttk.Button(button_frame, image=self.pattern_icon, style="Custom.TButton", command=self.open_pattern_window_wrapper)
         self.pattern_button.pack(side=tk.LEFT, padx=5)
 
+        self.search_any_button = ttk.Button(button_frame, image=self.pattern_icon, text="Any", compound=tk.LEFT, style="Custom.TButton", command=self.open_search_any_window_wrapper)
+        self.search_any_button.pack(side=tk.LEFT, padx=5)
+
+        self.click_match_button = ttk.Button(button_frame, image=self.flat_icon, text="Click", compound=tk.LEFT, style="Custom.TButton", command=self.open_click_match_window_wrapper)
+        self.click_match_button.pack(side=tk.LEFT, padx=5)
+
+        self.await_button = ttk.Button(button_frame, image=self.wait_icon, text="Await", compound=tk.LEFT, style="Custom.TButton", command=self.open_await_window_wrapper)
+        self.await_button.pack(side=tk.LEFT, padx=5)
+
         self.wait_button = ttk.Button(button_frame, image=self.wait_icon, style="Custom.TButton", command=self.open_wait_window_wrapper)
         self.wait_button.pack(side=tk.LEFT, padx=5)
 
@@ -207,6 +224,18 @@ class Page1(tk.Frame):
         """Open the pattern search window."""
         open_pattern_window(self, self.add_event_to_treeview)
 
+    def open_search_any_window_wrapper(self):
+        """Open the multi-pattern (Search Any) window."""
+        open_search_any_window(self, self.add_event_to_treeview)
+
+    def open_click_match_window_wrapper(self):
+        """Open the Click Match window for matches stored by a Find All search."""
+        open_click_match_window(self, self.add_event_to_treeview, self.variables)
+
+    def open_await_window_wrapper(self):
+        """Open the Await Variable window for results of async Image AI events."""
+        open_await_window(self, self.add_event_to_treeview, self.variables)
+
     def start_recording(self):
         """Start recording a new macro."""
         self.current_profile = "macro_" + str(int(time.time()))
@@ -280,6 +309,10 @@ class Page1(tk.Frame):
     def open_image_ai_window_wrapper(self):
         open_image_ai_window(self, self.add_event_to_treeview)
 
+    def open_image_ai_batch_window_wrapper(self):
+        """Open the Image AI Batch window for reading several regions in one event."""
+        open_image_ai_batch_window(self, self.add_event_to_treeview)
+
     def open_if_window_wrapper(self):
         """Open the If condition window with updated variables."""
         open_if_window(self, self.add_event_to_treeview, self.variables)
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, Toplevel, Label, Entry, OptionMenu, StringVar, Button
-import http.client
-import urllib.parse
 import json
 import os
+from aimacro.services.notification_service import get_notification_dispatcher, notification_params
 
 class Page2(tk.Frame):
     def __init__(self, master, page1):
@@ -129,28 +128,11 @@ class Page2(tk.Frame):
             return
 
         notification = self.notifications[name]
-        conn = http.client.HTTPSConnection("api.pushover.net:443")
-        params = {
-            "token": notification["token"],
-            "user": notification["user"],
-            "message": notification["message"],
-            "sound": "vibrate",
-            "priority": notification["priority"]
-        }
-        if notification["priority"] == 2:
-            params.update({"expire": 60, "retry": 60})
-
+        # Same background path as macro notifications; never coalesced, so every click sends
         try:
-            conn.request("POST", "/1/messages.json",
-                         urllib.parse.urlencode(params),
-                         {"Content-type": "application/x-www-form-urlencoded"})
-            response = conn.getresponse()
-            if response.status == 200:
-                print(f"Test notification '{name}' sent successfully.")
-            else:
-                print(f"Failed to send test notification '{name}': {response.status} - {response.reason}")
+            dispatcher = get_notification_dispatcher(self.master.master.settings)
+            dispatcher.submit(name, notification_params(notification, sound="vibrate"),
+                              label="test notification", dedup=False)
         except Exception as e:
             print(f"Error sending test notification '{name}': {e}")
-        finally:
-            conn.close()
 
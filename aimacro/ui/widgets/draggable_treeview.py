@@ -4,6 +4,7 @@ import re
 from aimacro.ui.dialogs.pattern_search_dialog import open_pattern_window
 from aimacro.ui.dialogs.image_ai_dialog import open_image_ai_window
 from aimacro.ui.dialogs.if_condition_dialog import open_if_window
+from aimacro.utils.logger import verbose, info
 
 class DraggableTreeview(ttk.Treeview):
     def __init__(self, master, accepted_sources=None, allow_drop=True, allow_self_drag=True, **kwargs):
@@ -34,7 +35,7 @@ class DraggableTreeview(ttk.Treeview):
         selected = self.selection()
         if selected:
             self.clipboard_items = [self.item(i, "text") for i in selected]
-            print(f"Copied {len(self.clipboard_items)} items")
+            info("Copied %d items", len(self.clipboard_items))
 
     def cut_selected_items(self, event=None):
         selected = self.selection()
@@ -43,11 +44,11 @@ class DraggableTreeview(ttk.Treeview):
             for i in selected:
                 self.delete(i)
             self._rebuild_checkpoint_indices()
-            print(f"Cut {len(self.clipboard_items)} items")
+            info("Cut %d items", len(self.clipboard_items))
 
     def paste_items(self, event=None):
         if not self.clipboard_items:
-            print("Clipboard empty")
+            info("Clipboard empty")
             return
 
         selected = self.selection()
@@ -62,7 +63,7 @@ class DraggableTreeview(ttk.Treeview):
 
         # Rebuild checkpoint indices after paste
         self._rebuild_checkpoint_indices()
-        print(f"Pasted {len(self.clipboard_items)} items")
+        info("Pasted %d items", len(self.clipboard_items))
 
 
     def open_edit_dialog(self, event):
@@ -92,6 +93,7 @@ class DraggableTreeview(ttk.Treeview):
                     "fail_notification": d.get("Fail Notification"),
                     "succeed_send": "Succeed Notification" in d and d.get("Succeed Notification") != "None",
                     "fail_send": "Fail Notification" in d and d.get("Fail Notification") != "None",
+                    "find_all": d.get("Find All"),
                     "item_id": item_idx
                 }
 
@@ -103,6 +105,7 @@ class DraggableTreeview(ttk.Treeview):
                     "variable_content": d.get("Variable Content"),
                     "ai_provider": d.get("Provider"),
                     "feature": d.get("Feature"),
+                    "options": d.get("Options"),
                     "item_id": item_idx  # Use item_id if not present
 
                 }
@@ -129,8 +132,82 @@ class DraggableTreeview(ttk.Treeview):
                     self.master.master.add_event_to_treeview,  # real updater
                     initial_values=iv
             )
+            elif item_text.startswith("Search Any"):
+                import ast
+                from aimacro.core.event_patterns import SEARCH_ANY_PATTERN
+                from aimacro.ui.dialogs.search_any_dialog import open_search_any_window
+                search_any_match = SEARCH_ANY_PATTERN.match(item_text)
+                if search_any_match:
+                    search_area, fail_checkpoint, click, wait_time, patterns = search_any_match.groups()
+                    iv = {
+                        "search_coords": search_area,
+                        "fail_checkpoint": fail_checkpoint,
+                        "click": click,
+                        "wait_time": wait_time,
+                        "patterns": ast.literal_eval(patterns),
+                        "item_id": item_id
+                    }
+                    open_search_any_window(
+                        self.master.master,
+                        self.master.master.add_event_to_treeview,
+                        initial_values=iv
+                    )
+            elif item_text.startswith("Click Match"):
+                from aimacro.core.event_patterns import CLICK_MATCH_PATTERN
+                from aimacro.ui.dialogs.click_match_dialog import open_click_match_window
+                click_match = CLICK_MATCH_PATTERN.match(item_text)
+                if click_match:
+                    variable, mode, interval = click_match.groups()
+                    iv = {
+                        "variable": variable,
+                        "mode": mode,
+                        "interval": interval,
+                        "item_id": item_id
+                    }
+                    open_click_match_window(
+                        self.master.master,
+                        self.master.master.add_event_to_treeview,
+                        self.master.master.variables,
+                        initial_values=iv
+                    )
+            elif item_text.startswith("Await Variable"):
+                from aimacro.core.event_patterns import AWAIT_PATTERN
+                from aimacro.ui.dialogs.await_dialog import open_await_window
+                await_match = AWAIT_PATTERN.match(item_text)
+                if await_match:
+                    variable, timeout = await_match.groups()
+                    iv = {
+                        "variable": variable,
+                        "timeout": timeout,
+                        "item_id": item_id
+                    }
+                    open_await_window(
+                        self.master.master,
+                        self.master.master.add_event_to_treeview,
+                        self.master.master.variables,
+                        initial_values=iv
+                    )
+            elif item_text.startswith("Image AI Batch"):
+                from aimacro.core.event_patterns import OCR_BATCH_PATTERN
+                from aimacro.ui.dialogs.image_ai_batch_dialog import open_image_ai_batch_window
+                batch_match = OCR_BATCH_PATTERN.match(item_text)
+                if batch_match:
+                    provider, feature, regions, options, variable_content = batch_match.groups()
+                    iv = {
+                        "ai_provider": provider,
+                        "feature": feature,
+                        "regions": regions,
+                        "options": options,
+                        "variable_content": variable_content,
+                        "item_id": item_id
+                    }
+                    open_image_ai_batch_window(
+                        self.master.master,
+                        self.master.master.add_event_to_treeview,
+                        initial_values=iv
+                    )
             elif item_text.startswith("Image AI") or item_text.startswith("Image AI"):
-                print(f"Opening Image AI or Image AI for item: {item_text}")
+                verbose("Opening Image AI window for item: %s", item_text)
                 iv = map_image_ai_keys(parsed_dict)
                 iv["item_id"] = item_id  # pass the stable Treeview IID
                 open_image_ai_window(
@@ -139,7 +216,7 @@ class DraggableTreeview(ttk.Treeview):
                     initial_values=iv
                 )
             elif item_text.startswith("If"):
-                print(f"Opening If window for item: {item_text}")
+                verbose("Opening If window for item: %s", item_text)
                 iv = map_if_keys(parsed_dict)
                 iv["item_id"] = item_id  # pass the stable Treeview IID
                 open_if_window(
@@ -210,14 +287,14 @@ class DraggableTreeview(ttk.Treeview):
         """Start dragging selected items."""
         if not self.drag_data["dragging"] and self.drag_data["items"]:
             self.drag_data["dragging"] = True
-            print("Drag started")
+            verbose("Drag started")
             self.config(style="NoHighlight.Treeview")
         elif not self.drag_data["selection_locked"]:
             selected = self.selection()
             if selected:
                 self.drag_data["items"] = selected
                 self.drag_data["dragging"] = True
-                print(f"Drag started, items: {[self.item(i, 'text') for i in selected]}")
+                verbose(lambda: f"Drag started, items: {[self.item(i, 'text') for i in selected]}")
                 self.config(style="NoHighlight.Treeview")
 
         if self.drag_data["dragging"]:
@@ -234,7 +311,7 @@ class DraggableTreeview(ttk.Treeview):
                     self.item(hover_item, tags=["hover"])
                     self.drag_data["hover_item"] = hover_item
                     self.drag_data["hover_treeview"] = self
-                    print(f"Self hover: {self.item(hover_item, 'text')}")
+                    verbose(lambda: f"Self hover: {self.item(hover_item, 'text')}")
             elif (isinstance(drop_target, DraggableTreeview) and drop_target.allow_drop and 
                   self in drop_target.accepted_sources):
                 drop_y = event.y_root - drop_target.winfo_rooty()
@@ -243,7 +320,7 @@ class DraggableTreeview(ttk.Treeview):
                     drop_target.item(hover_item, tags=["target_hover"])
                     self.drag_data["hover_item"] = hover_item
                     self.drag_data["hover_treeview"] = drop_target
-                    print(f"Target hover: {drop_target.item(hover_item, 'text')}")
+                    verbose(lambda: f"Target hover: {drop_target.item(hover_item, 'text')}")
 
         return "break"
 
@@ -258,18 +335,18 @@ class DraggableTreeview(ttk.Treeview):
     def drop(self, event):
         """Handle dropping of dragged items."""
         if not self.drag_data["items"] or not self.drag_data["dragging"]:
-            print("Drop cancelled: no items or not dragging")
+            verbose("Drop cancelled: no items or not dragging")
             self.cleanup()
             return
 
         drop_target = self.winfo_containing(event.x_root, event.y_root)
-        print(f"Drop target: {drop_target}, This treeview: {self}")
+        verbose("Drop target: %s, This treeview: %s", drop_target, self)
 
         if drop_target == self and self.allow_self_drag:
             # Reorder within the same treeview
             drop_item = self.identify_row(event.y)
             drop_index = self.index(drop_item) if drop_item else len(self.get_children())
-            print(f"Self drop: {drop_item}, index: {drop_index}")
+            verbose("Self drop: %s, index: %s", drop_item, drop_index)
             items_to_move = self.drag_data["items"]
             for item in reversed(items_to_move):
                 self.detach(item)
@@ -284,11 +361,11 @@ class DraggableTreeview(ttk.Treeview):
             drop_y = event.y_root - drop_target.winfo_rooty()
             drop_item = drop_target.identify_row(drop_y)
             drop_index = drop_target.index(drop_item) if drop_item else len(drop_target.get_children())
-            print(f"Target drop: {drop_item}, index: {drop_index}")
+            verbose("Target drop: %s, index: %s", drop_item, drop_index)
             items_to_move = self.drag_data["items"]
             for item in reversed(items_to_move):
                 text = self.item(item, "text")
-                print(f"Moved item: {text}")
+                verbose("Moved item: %s", text)
                 self.delete(item)
                 new_item = drop_target.insert("", drop_index, text=text)
                 drop_index += 1
@@ -305,10 +382,10 @@ class DraggableTreeview(ttk.Treeview):
         if selected_items:
             for item in selected_items:
                 self.delete(item)
-                print(f"Deleted item: {item}")
+                verbose("Deleted item: %s", item)
             self._rebuild_checkpoint_indices()
         else:
-            print("No items selected to delete")
+            verbose("No items selected to delete")
 
     def _rebuild_checkpoint_indices(self):
         """Rebuild all checkpoint indices by scanning the treeview."""
@@ -325,7 +402,7 @@ class DraggableTreeview(ttk.Treeview):
             if action.strip().startswith("Checkpoint: "):
                 checkpoint_name = action.split("Checkpoint: ", 1)[1].strip()
                 self.master.master.checkpoints[checkpoint_name] = i
-                print(f"Updated checkpoint '{checkpoint_name}' to index {i}")
+                verbose("Updated checkpoint '%s' to index %d", checkpoint_name, i)
 
     def cleanup(self):
         """Reset drag state and clear highlights."""
@@ -346,7 +423,7 @@ class DraggableTreeview(ttk.Treeview):
         self.drag_data["items"] = []
         self.drag_data["dragging"] = False
         self.drag_data["selection_locked"] = False
-        print("All highlights cleared")
+        verbose("All highlights cleared")
 
     def highlight_active_item(self, index, previous_index=None):
         """Highlight the item at the specified index, updating only previous and active items."""
@@ -357,13 +434,14 @@ class DraggableTreeview(ttk.Treeview):
         # Clear highlight from previous item if valid
         if previous_index is not None and 0 <= previous_index < len(children):
             self.item(children[previous_index], tags=[])
-            print(f"Removed highlight from previous item at index {previous_index}: {self.item(children[previous_index], 'text')}")
+            verbose(lambda: f"Removed highlight from previous item at index {previous_index}: "
+                            f"{self.item(children[previous_index], 'text')}")
 
         # Highlight the active item if valid
         if 0 <= index < len(children):
             self.item(children[index], tags=["active"])
-            print(f"Highlighted active item at index {index}: {self.item(children[index], 'text')}")
+            verbose(lambda: f"Highlighted active item at index {index}: {self.item(children[index], 'text')}")
         elif index == -1:  # Clear all highlights
             for item in children:
                 self.item(item, tags=[])
-            print("Cleared all highlights")
\ No newline at end of file
+            verbose("Cleared all highlights")
\ No newline at end of file
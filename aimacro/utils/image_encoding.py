@@ -0,0 +1,154 @@
+"""
+Image conversion helpers for the capture-to-provider pipeline.
+Captures travel as PIL images or NumPy arrays and are encoded once, in the
+form each provider needs (raw PNG bytes for Azure, base64 for JSON bodies,
+arrays for local OCR).
+"""
+import base64
+import hashlib
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+
+def to_pil_image(image):
+    """PIL image, NumPy array or base64 PNG/JPG string -> PIL image."""
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return Image.open(BytesIO(base64.b64decode(image)))
+
+
+def to_array(image):
+    """PIL image, NumPy array or base64 string -> NumPy array (no copy for arrays)."""
+    if isinstance(image, np.ndarray):
+        return image
+    return np.asarray(to_pil_image(image))
+
+
+def ensure_min_size(img, min_size=(50, 50)):
+    """Upscale a PIL image, keeping its aspect ratio, so it is at least min_size (w, h)."""
+    w, h = img.size
+    min_w, min_h = min_size
+    if w < min_w or h < min_h:
+        scale = max(min_w / w, min_h / h)
+        img = img.resize((int(round(w * scale)), int(round(h * scale))), Image.BICUBIC)
+    return img
+
+
+def encode_image(image, format="PNG", **save_kwargs):
+    """Encode an image to bytes; base64 strings are decoded instead of re-encoded."""
+    if isinstance(image, str):
+        return base64.b64decode(image)
+    buf = BytesIO()
+    to_pil_image(image).save(buf, format=format, **save_kwargs)
+    return buf.getvalue()
+
+
+def encode_image_base64(image, format="PNG", **save_kwargs):
+    """Encode an image to a base64 string; base64 strings pass through unchanged."""
+    if isinstance(image, str):
+        return image
+    return base64.b64encode(encode_image(image, format, **save_kwargs)).decode("ascii")
+
+
+def image_digest(image):
+    """Stable hash of an image's pixels (or of the string for base64 input), without encoding it."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(image, str):
+        digest.update(image.encode())
+        return digest.hexdigest()
+    if isinstance(image, Image.Image):
+        digest.update(image.mode.encode())
+    array = np.ascontiguousarray(to_array(image))
+    digest.update(str(array.shape).encode())
+    digest.update(array.data)
+    return digest.hexdigest()
+
+
+UPLOAD_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def prepare_upload(image, format="PNG", quality=85, max_dim=0, min_size=(1, 1), max_size=None, max_bytes=None):
+    """
+    Resize and encode an image for upload, once.
+
+    Args:
+        image: PIL image, NumPy array or base64 string.
+        format: "PNG", "JPEG" or "WEBP".
+        quality: JPEG/WebP quality (1-95).
+        max_dim: Longest side in pixels after downscaling (0 = keep size).
+        min_size: (w, h) the image is upscaled to at least (service minimum).
+        max_size: (w, h) the image is downscaled to fit (service maximum), or None.
+        max_bytes: Largest accepted payload; the image is shrunk further until it fits, or None.
+
+    Returns:
+        (bytes, mime_type, (width, height))
+    """
+    format = (format or "PNG").upper()
+    if format == "JPG":
+        format = "JPEG"
+    if format not in UPLOAD_MIME_TYPES:
+        raise ValueError(f"Unsupported upload format: {format}")
+    img = to_pil_image(image)
+
+    limit_w, limit_h = max_size or (None, None)
+    if max_dim:
+        limit_w = min(limit_w or max_dim, max_dim)
+        limit_h = min(limit_h or max_dim, max_dim)
+    if limit_w and limit_h and (img.width > limit_w or img.height > limit_h):
+        scale = min(limit_w / img.width, limit_h / img.height)
+        img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.LANCZOS)
+    img = ensure_min_size(img, min_size)
+
+    if format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    save_kwargs = {} if format == "PNG" else {"quality": int(quality)}
+    data = encode_image(img, format, **save_kwargs)
+    # Too large for the service: shrink by a quarter until it fits (never below the minimum size)
+    while max_bytes and len(data) > max_bytes and img.width > min_size[0] and img.height > min_size[1]:
+        img = img.resize((max(min_size[0], int(img.width * 0.75)), max(min_size[1], int(img.height * 0.75))),
+                         Image.LANCZOS)
+        data = encode_image(img, format, **save_kwargs)
+    return data, UPLOAD_MIME_TYPES[format], img.size
+
+
+def build_mosaic(crops, gap=16):
+    """
+    Stack region crops top to bottom into one image so a batch costs a single call.
+
+    Crops are left-aligned and separated by `gap` rows filled with the median border
+    colour of the crops, so the separators read as empty background.
+
+    Returns:
+        (mosaic_array, bands) where bands[i] = (x1, y1, x2, y2) is crop i inside the mosaic.
+    """
+    crops = [to_array(crop) for crop in crops]
+    color = crops[0].ndim == 3
+    if color:
+        crops = [crop[:, :, :3] if crop.ndim == 3 else np.stack([crop] * 3, axis=-1) for crop in crops]
+    borders = np.concatenate([np.concatenate([c[0], c[-1], c[:, 0], c[:, -1]]).reshape(-1, 3 if color else 1)
+                              for c in crops])
+    fill = np.median(borders, axis=0).astype(np.uint8)
+
+    width = max(crop.shape[1] for crop in crops)
+    height = sum(crop.shape[0] for crop in crops) + gap * (len(crops) - 1)
+    mosaic = np.empty((height, width, 3) if color else (height, width), dtype=np.uint8)
+    mosaic[...] = fill if color else fill[0]
+    bands, y = [], 0
+    for crop in crops:
+        h, w = crop.shape[:2]
+        mosaic[y:y + h, :w] = crop
+        bands.append((0, y, w, y + h))
+        y += h + gap
+    return mosaic, bands
+
+
+def band_of(box, bands):
+    """Index of the band nearest to the vertical centre of an OCR box (list of (x, y) points)."""
+    ys = [point[1] for point in box]
+    center = (min(ys) + max(ys)) / 2
+    distances = [0 if y1 <= center < y2 else min(abs(center - y1), abs(center - y2)) for _, y1, _, y2 in bands]
+    return distances.index(min(distances))
@@ -6,6 +6,8 @@ from collections.abc import Mapping
 from PIL import Image, ImageTk
 import pyautogui
 from pynput import keyboard  # for RegionCapture
+from .screen_capture import get_screen_capture
+from .image_encoding import to_pil_image, ensure_min_size, encode_image_base64
 
 
 class RegionCapture:
@@ -43,7 +45,7 @@ class RegionCapture:
         height = y2 - y1
 
         print(f"Capturing region: ({x1}, {y1}, {width}, {height})")
-        img = pyautogui.screenshot(region=(x1, y1, width, height))
+        img = get_screen_capture().region_image({"start": (x1, y1), "end": (x2, y2)})
         return img, {"start": (x1, y1), "end": (x2, y2)}
 
 
@@ -51,21 +53,9 @@ def upscale_min_size(image_base64: str, min_size=(50, 50)) -> str:
     """
     Take a base64 PNG/JPG string, ensure it's at least min_size (w,h),
     upscale while keeping aspect ratio, and return a new base64 PNG string.
+    Prefer ensure_min_size on PIL images, which avoids the decode/encode round trip.
     """
-    raw = base64.b64decode(image_base64)
-    img = Image.open(BytesIO(raw))
-
-    w, h = img.size
-    min_w, min_h = min_size
-    if w < min_w or h < min_h:
-        scale = max(min_w / w, min_h / h)
-        new_w = int(round(w * scale))
-        new_h = int(round(h * scale))
-        img = img.resize((new_w, new_h), Image.BICUBIC)
-
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("ascii")
+    return encode_image_base64(ensure_min_size(to_pil_image(image_base64), min_size))
 
 
 def parse_coords(c):
@@ -138,7 +128,7 @@ def screenshot_from_coords(coords):
         print("Invalid coordinates (non-positive width/height).")
         return None, None
 
-    img = pyautogui.screenshot(region=(x1, y1, x2 - x1, y2 - y1))
+    img = get_screen_capture().region_image(coords)
     return img, encode_image_to_base64(img)
 
 
@@ -1,52 +1,180 @@
 """
 Logging utility for verbose mode.
 Provides functions to log messages conditionally based on verbose mode setting.
+
+Messages are formatted lazily: pass %-style arguments (or a callable) and the
+text is only built when the message is actually shown, so disabled verbose
+calls in hot paths cost one attribute check. Shown messages and structured
+records (log_event) can also be written as JSON lines to a rotating file by a
+background writer thread.
 """
+import os
 import sys
+import json
+import time
+import queue
+import atexit
+import threading
+
+DEBUG = 10
+INFO = 20
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "verbose", INFO: "info", ERROR: "error"}
+
+
+def _render(message, args):
+    """Build the text of a message: call it if callable, then apply %-style args."""
+    if callable(message):
+        message = message()
+    if args:
+        try:
+            return str(message) % args
+        except (TypeError, ValueError):
+            return " ".join([str(message)] + [str(arg) for arg in args])
+    return str(message)
+
+
+class JsonLinesSink:
+    """
+    Append records as JSON lines from a background thread, rotating the file
+    at max_bytes (path -> path.1 -> ... -> path.<backups>). Records are dropped,
+    and counted, while the bounded queue is full, so logging never blocks a caller.
+    """
+
+    def __init__(self, path, max_bytes=5_000_000, backups=3, queue_size=10000):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.backups = max(0, int(backups))
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._thread = threading.Thread(target=self._loop, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Write whatever else is already queued in the same pass, one flush per batch
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if self._file is None:
+                    self._open()
+                for record in batch:
+                    self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except OSError as e:
+                print(f"[ERROR] Log file {self.path}: {e}", file=sys.stderr)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=2.0):
+        """Wait until queued records are written (used at exit)."""
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < end:
+            time.sleep(0.01)
 
 
 class Logger:
     """Simple logger that respects verbose mode setting."""
-    
-    def __init__(self, verbose=False):
+
+    def __init__(self, verbose=False, sink=None):
         """
         Initialize logger.
-        
+
         Args:
             verbose: If True, verbose messages will be printed. Default: False
+            sink: Optional JsonLinesSink that also receives every shown message and log_event records.
         """
         self.verbose = verbose
-    
+        self.sink = sink
+
     def set_verbose(self, verbose):
         """Update verbose mode."""
         self.verbose = verbose
-    
-    def info(self, message):
+
+    def enabled(self, level):
+        """Cheap check before building anything expensive for a message of this level."""
+        return level >= INFO or self.verbose
+
+    def log(self, level, message, *args):
+        """Show a message of `level`, formatting it only if that level is enabled."""
+        if level < INFO and not self.verbose:
+            return
+        text = _render(message, args)
+        print(f"[VERBOSE] {text}" if level < INFO else f"[ERROR] {text}" if level >= ERROR else text)
+        if self.sink is not None:
+            self.sink.write({"ts": time.time(), "level": LEVEL_NAMES.get(level, level), "msg": text})
+
+    def event(self, kind, **fields):
+        """Write a structured record to the file sink only (nothing is built without one)."""
+        if self.sink is not None:
+            fields["ts"] = time.time()
+            fields["kind"] = kind
+            self.sink.write(fields)
+
+    def info(self, message, *args):
         """Print informational message (always shown)."""
-        print(message)
-    
-    def verbose_msg(self, message):
+        self.log(INFO, message, *args)
+
+    def verbose_msg(self, message, *args):
         """Print verbose/debug message (only if verbose mode is enabled)."""
-        if self.verbose:
-            print(f"[VERBOSE] {message}")
-    
-    def debug(self, message):
+        self.log(DEBUG, message, *args)
+
+    def debug(self, message, *args):
         """Alias for verbose_msg (for consistency)."""
-        self.verbose_msg(message)
-    
-    def error(self, message):
+        self.verbose_msg(message, *args)
+
+    def error(self, message, *args):
         """Print error message (always shown)."""
-        print(f"[ERROR] {message}")
+        self.log(ERROR, message, *args)
 
 
 # Global logger instance (will be initialized with settings)
 _logger = None
 
 
-def init_logger(verbose=False):
-    """Initialize the global logger with verbose mode."""
+def init_logger(verbose=False, settings=None):
+    """
+    Initialize the global logger with verbose mode and, if the `log_file`
+    setting is set, a rotating JSON-lines file (log_max_bytes, log_backups).
+    """
     global _logger
-    _logger = Logger(verbose)
+    settings = settings or {}
+    sink = None
+    if settings.get("log_file"):
+        sink = JsonLinesSink(settings["log_file"], settings.get("log_max_bytes", 5_000_000),
+                             settings.get("log_backups", 3))
+        atexit.register(sink.flush)
+    _logger = Logger(verbose, sink)
 
 
 def get_logger():
@@ -57,22 +185,33 @@ def get_logger():
     return _logger
 
 
-def info(message):
+def is_verbose():
+    """True if verbose messages are shown (guard for expensive debug-only work)."""
+    return get_logger().verbose
+
+
+def info(message, *args):
     """Print informational message (always shown)."""
-    get_logger().info(message)
+    get_logger().info(message, *args)
 
 
-def verbose(message):
+def verbose(message, *args):
     """Print verbose/debug message (only if verbose mode is enabled)."""
-    get_logger().verbose_msg(message)
+    logger = _logger or get_logger()
+    if logger.verbose:  # checked here so disabled calls in hot loops return at once
+        logger.verbose_msg(message, *args)
 
 
-def debug(message):
+def debug(message, *args):
     """Alias for verbose (for consistency)."""
-    get_logger().debug(message)
+    verbose(message, *args)
 
 
-def error(message):
+def error(message, *args):
     """Print error message (always shown)."""
-    get_logger().error(message)
+    get_logger().error(message, *args)
+
 
+def log_event(kind, **fields):
+    """Write a structured record (event index, type, durations, ...) to the log file, if one is set."""
+    get_logger().event(kind, **fields)
@@ -0,0 +1,258 @@
+"""
+Per-event-type latency metrics for macro runs.
+The executor marks which event type the current thread is running; every
+phase timed while it runs (wait, capture, match, ai, notification, ui) lands
+in a fixed-bucket histogram for that event type and phase. "total" is the
+whole event and "parse" is what is left of it outside the timed phases
+(regex dispatch and executor bookkeeping).
+
+Recording is a bisect and a few additions under a lock, so it can stay on
+in every run. snapshot() reads live numbers while a macro is running, export()
+writes JSON and Prometheus text files at the end of a run, and
+start_metrics_server() serves both over HTTP on localhost.
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .logger import info, error
+
+PHASES = ("parse", "wait", "capture", "match", "ai", "notification", "ui")
+# Upper bucket bounds in seconds (Prometheus "le"); +Inf is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BACKGROUND = "background"  # event type for phases timed outside the executor thread (async Image AI, ...)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds)."""
+
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i > 0 else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                value = low + (high - low) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+    def to_dict(self):
+        cumulative, running = {}, 0
+        for bound, n in zip(BUCKETS + ("+Inf",), self.counts):
+            running += n
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "min_ms": round(self.min * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "buckets": cumulative,
+        }
+
+
+class _Phase:
+    """Context manager timing one phase (see MacroMetrics.phase)."""
+
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class MacroMetrics:
+    """Histograms per (event type, phase) for the current run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Start a new run: drop all histograms."""
+        with self._lock:
+            self._histograms = {}  # (event type, phase) -> Histogram
+            self.started = time.time()
+
+    def begin_event(self, event_type):
+        """Attribute phases timed on this thread to `event_type` until end_event()."""
+        self._local.event = event_type
+        self._local.timed = 0.0
+
+    def end_event(self, seconds):
+        """Record the event's total time and the untimed remainder as "parse"."""
+        event_type = getattr(self._local, "event", None) or BACKGROUND
+        timed = getattr(self._local, "timed", 0.0)
+        self._local.event = None
+        with self._lock:
+            self._histogram(event_type, "total").observe(seconds)
+            self._histogram(event_type, "parse").observe(max(0.0, seconds - timed))
+
+    def _histogram(self, event_type, phase):
+        histogram = self._histograms.get((event_type, phase))
+        if histogram is None:
+            histogram = self._histograms[(event_type, phase)] = Histogram()
+        return histogram
+
+    def observe(self, phase, seconds):
+        """Record `seconds` spent in `phase` for the event running on this thread."""
+        event_type = getattr(self._local, "event", None)
+        if event_type is None:
+            event_type = BACKGROUND
+        else:
+            self._local.timed += seconds
+        with self._lock:
+            self._histogram(event_type, phase).observe(seconds)
+
+    def phase(self, name):
+        """`with metrics.phase("ui"): ...` times the block as phase `name`."""
+        return _Phase(self, name)
+
+    def snapshot(self):
+        """Live view of the run so far: {event type: {phase: histogram dict}}."""
+        with self._lock:
+            items = [(key, histogram.to_dict()) for key, histogram in self._histograms.items()]
+            started = self.started
+        events = {}
+        for (event_type, phase), data in sorted(items):
+            events.setdefault(event_type, {})[phase] = data
+        return {"started": started, "elapsed_s": round(time.time() - started, 3), "events": events}
+
+    def to_prometheus(self):
+        """Prometheus text exposition of all histograms (seconds)."""
+        def label(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        with self._lock:
+            items = sorted((key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items())
+        lines = ["# HELP aimacro_phase_seconds Time spent per macro event type and phase.",
+                 "# TYPE aimacro_phase_seconds histogram"]
+        for (event_type, phase), counts, count, total in items:
+            labels = f'event="{label(event_type)}",phase="{label(phase)}"'
+            running = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                running += n
+                lines.append(f'aimacro_phase_seconds_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f"aimacro_phase_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"aimacro_phase_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """Write macro_metrics.json and macro_metrics.prom to `directory`; return the JSON path."""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, "macro_metrics.json")
+        with open(json_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        with open(os.path.join(directory, "macro_metrics.prom"), "w") as f:
+            f.write(self.to_prometheus())
+        return json_path
+
+    def format_stats(self):
+        """Return the slowest event types (by total time) as a single log line."""
+        with self._lock:
+            totals = [(h.sum, event_type, h.count) for (event_type, phase), h in self._histograms.items()
+                      if phase == "total"]
+        if not totals:
+            return ""
+        top = ", ".join(f"{event_type} {count}x {total:.2f}s"
+                        for total, event_type, count in sorted(totals, reverse=True)[:5])
+        return f"Event time: {top}"
+
+
+# Global metrics (one per process; reset at the start of every run)
+_metrics = MacroMetrics()
+_server = None
+
+
+def get_macro_metrics():
+    """Get the shared macro metrics."""
+    return _metrics
+
+
+def observe_phase(phase, seconds):
+    """Record `seconds` in `phase` for the event running on this thread."""
+    _metrics.observe(phase, seconds)
+
+
+def metric_phase(name):
+    """Time a block as phase `name`: `with metric_phase("capture"): ...`."""
+    return _Phase(_metrics, name)
+
+
+def timed_sleep(seconds):
+    """time.sleep that is recorded as the "wait" phase."""
+    started = time.perf_counter()
+    time.sleep(seconds)
+    _metrics.observe("wait", time.perf_counter() - started)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/metrics":
+            body, content_type = _metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(_metrics.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port):
+    """Serve /metrics (Prometheus) and /metrics.json on 127.0.0.1:`port` (once per process)."""
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+    except OSError as e:
+        error(f"Metrics server could not listen on port {port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    info(f"Live metrics on http://127.0.0.1:{_server.server_port}/metrics")
+    return _server
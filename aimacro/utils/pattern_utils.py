@@ -9,7 +9,16 @@ import pyautogui
 from PIL import Image
 import traceback
 import os
-from .logger import verbose, error
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from .logger import verbose, error, is_verbose
+from .screen_capture import get_screen_capture
+from .metrics import metric_phase, timed_sleep
+
+# Shared pool for template matching; cv2.matchTemplate releases the GIL
+_match_pool = None
+_match_pool_workers = 0
 
 
 def load_image(pattern_img_str):
@@ -18,7 +27,7 @@ def load_image(pattern_img_str):
     pattern_data = base64.b64decode(pattern_img_str)
     pattern_buffer = BytesIO(pattern_data)
     pattern_img = Image.open(pattern_buffer)
-    verbose(f"Pattern image loaded successfully, size: {pattern_img.size}")
+    verbose("Pattern image loaded successfully, size: %s", pattern_img.size)
     return pattern_img
 
 
@@ -41,6 +50,214 @@ def image_to_base64(screenshot):
     return img_str
 
 
+def to_gray(image):
+    """Convert a PIL Image or RGB/RGBA array to a grayscale uint8 array."""
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert("RGB"))
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+def match_pattern(screen_gray, pattern_gray):
+    """
+    Find the best match of a pattern in a grayscale screen image.
+
+    Returns:
+        (score, (x, y)) of the best normalized correlation, or (0.0, None)
+        if the pattern is larger than the screen area.
+    """
+    ph, pw = pattern_gray.shape[:2]
+    sh, sw = screen_gray.shape[:2]
+    if ph > sh or pw > sw:
+        return 0.0, None
+    result = cv2.matchTemplate(screen_gray, pattern_gray, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return float(max_val), max_loc
+
+
+def resolve_match_workers(settings=None):
+    """Return the configured template matching worker count (0 or missing = all cores)."""
+    workers = int((settings or {}).get("match_workers", 0) or 0)
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def get_match_pool(workers=None):
+    """Return the shared template matching thread pool, resized if `workers` changed."""
+    global _match_pool, _match_pool_workers
+    workers = workers or os.cpu_count() or 1
+    if _match_pool is None or _match_pool_workers != workers:
+        if _match_pool is not None:
+            _match_pool.shutdown(wait=False)
+        _match_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match")
+        _match_pool_workers = workers
+    return _match_pool
+
+
+def match_pattern_tiled(screen_gray, pattern_gray, workers=1, min_tile_pixels=500_000):
+    """
+    Same result as match_pattern(), but splits large areas into overlapping
+    horizontal bands matched in parallel on the shared pool.
+
+    Bands overlap by the pattern height minus one row, so every placement of
+    the pattern lies entirely inside one band and gets the same score it would
+    get in a single full-area match.
+
+    Args:
+        screen_gray: Grayscale screen area
+        pattern_gray: Grayscale pattern
+        workers: Number of bands/threads (1 disables tiling)
+        min_tile_pixels: Areas smaller than this are matched in one call
+    """
+    ph, pw = pattern_gray.shape[:2]
+    sh, sw = screen_gray.shape[:2]
+    placements = sh - ph + 1
+    if ph > sh or pw > sw:
+        return 0.0, None
+    if workers <= 1 or sh * sw < min_tile_pixels or placements < 2 * workers:
+        return match_pattern(screen_gray, pattern_gray)
+
+    step = -(-placements // workers)  # ceil division
+    bands = [(y, min(y + step, placements)) for y in range(0, placements, step)]
+
+    def match_band(band):
+        y_start, y_end = band
+        score, location = match_pattern(screen_gray[y_start:y_end + ph - 1], pattern_gray)
+        return score, (location[0], location[1] + y_start) if location else None
+
+    results = list(get_match_pool(workers).map(match_band, bands))
+    return max(results, key=lambda result: result[0])
+
+
+def match_map_tiled(screen_gray, pattern_gray, workers=1, min_tile_pixels=500_000):
+    """
+    Full TM_CCOEFF_NORMED score map, computed in overlapping bands like
+    match_pattern_tiled(). Returns None if the pattern is larger than the area.
+    """
+    ph, pw = pattern_gray.shape[:2]
+    sh, sw = screen_gray.shape[:2]
+    placements = sh - ph + 1
+    if ph > sh or pw > sw:
+        return None
+    if workers <= 1 or sh * sw < min_tile_pixels or placements < 2 * workers:
+        return cv2.matchTemplate(screen_gray, pattern_gray, cv2.TM_CCOEFF_NORMED)
+
+    step = -(-placements // workers)
+    bands = [(y, min(y + step, placements)) for y in range(0, placements, step)]
+    maps = get_match_pool(workers).map(
+        lambda band: cv2.matchTemplate(screen_gray[band[0]:band[1] + ph - 1], pattern_gray, cv2.TM_CCOEFF_NORMED),
+        bands)
+    return np.vstack(list(maps))
+
+
+def non_max_suppression(scores, xs, ys, width, height, overlap=0.3):
+    """
+    Greedy non-maximum suppression for same-sized boxes.
+
+    Args:
+        scores, xs, ys: 1-D arrays of candidate scores and top-left corners
+        width, height: Box size (the pattern size)
+        overlap: Maximum intersection-over-union kept between two boxes
+
+    Returns:
+        Indices of the kept candidates, best score first
+    """
+    order = np.argsort(-scores)
+    area = width * height
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter_w = np.clip(width - np.abs(xs[rest] - xs[best]), 0, None)
+        inter_h = np.clip(height - np.abs(ys[rest] - ys[best]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (2 * area - inter)
+        order = rest[iou <= overlap]
+    return keep
+
+
+def find_all_matches(screen_gray, pattern_gray, threshold, workers=1, min_tile_pixels=500_000, overlap=0.3, max_candidates=2000):
+    """
+    Find every placement of a pattern scoring at least `threshold`, deduplicated
+    with non-maximum suppression.
+
+    Returns:
+        List of (x, y, score) top-left corners relative to the area, in reading
+        order (top to bottom, then left to right)
+    """
+    result = match_map_tiled(screen_gray, pattern_gray, workers, min_tile_pixels)
+    if result is None:
+        return []
+    ys, xs = np.nonzero(result >= threshold)
+    if not len(xs):
+        return []
+    scores = result[ys, xs]
+    if len(scores) > max_candidates:
+        # Flat areas can exceed the threshold almost everywhere; keep only the best candidates
+        top = np.argpartition(-scores, max_candidates)[:max_candidates]
+        xs, ys, scores = xs[top], ys[top], scores[top]
+    ph, pw = pattern_gray.shape[:2]
+    keep = non_max_suppression(scores, xs.astype(np.int64), ys.astype(np.int64), pw, ph, overlap)
+    matches = [(int(xs[i]), int(ys[i]), float(scores[i])) for i in keep]
+    return sorted(matches, key=lambda m: (m[1] // max(1, ph // 2), m[0]))
+
+
+def search_for_all_patterns(pattern_img_str, search_coords, settings, page1=None, wait_time=0, threshold=0.7):
+    """
+    Search for every occurrence of a pattern in one capture per cycle.
+
+    Args:
+        pattern_img_str: Base64 encoded pattern image
+        search_coords: Coordinates dict or 'Full Screen'
+        settings: Application settings (match_workers, match_tile_min_pixels)
+        page1: Page1 instance for checking running state
+        wait_time: Maximum time to wait for at least one match (seconds)
+        threshold: Confidence threshold for pattern matching
+
+    Returns:
+        List of (center_x, center_y) screen coordinates, empty if nothing matched
+    """
+    settings = settings or {}
+    workers = resolve_match_workers(settings)
+    min_tile_pixels = int(settings.get("match_tile_min_pixels", 500_000))
+    try:
+        pattern_gray = to_gray(load_image(pattern_img_str))
+    except ValueError as ve:
+        error(f"ValueError during pattern search: {ve} - Possibly invalid base64 data")
+        return []
+    if search_coords and search_coords != 'Full Screen':
+        area = unpack_coords(search_coords)
+        if not area:
+            return []
+        offset_x, offset_y = area["x1"], area["y1"]
+    else:
+        area = None
+        offset_x, offset_y = 0, 0
+    ph, pw = pattern_gray.shape[:2]
+
+    start_time = time.time()
+    while page1 is None or page1.running:
+        frame = get_screen_capture().grab()
+        screen = frame.region(area["x1"], area["y1"], area["x2"], area["y2"]) if area else frame.array
+        with metric_phase("match"):
+            matches = find_all_matches(to_gray(screen), pattern_gray, threshold, workers, min_tile_pixels)
+        if matches:
+            verbose("Found %d matches: %s", len(matches), matches)
+            return [(offset_x + x + pw // 2, offset_y + y + ph // 2) for x, y, _ in matches]
+
+        elapsed = time.time() - start_time
+        if elapsed >= wait_time:
+            break
+        verbose("No match found, retrying... (Elapsed: %.1fs of %ss)", elapsed, wait_time)
+        timed_sleep(min(1, wait_time - elapsed))
+
+    verbose("Pattern not found after %ss of retries", wait_time)
+    return []
+
+
 def search_for_pattern(pattern_img_str, search_coords, settings, page1=None, click_if_found=False, wait_time=0, threshold=0.7):
     """
     Search for a pattern in the specified screen area.
@@ -48,7 +265,7 @@ def search_for_pattern(pattern_img_str, search_coords, settings, page1=None, cli
     Args:
         pattern_img_str: Base64 encoded pattern image
         search_coords: Coordinates dict or 'Full Screen'
-        settings: Application settings (not used but kept for compatibility)
+        settings: Application settings (match_workers, match_tile_min_pixels)
         page1: Page1 instance for checking running state
         click_if_found: Whether to click if pattern is found
         wait_time: Maximum time to search (seconds)
@@ -57,46 +274,55 @@ def search_for_pattern(pattern_img_str, search_coords, settings, page1=None, cli
     Returns:
         True if pattern found, False otherwise
     """
-    verbose(f"Search coordinates: {search_coords}")
+    verbose("Search coordinates: %s", search_coords)
+    settings = settings or {}
+    workers = resolve_match_workers(settings)
+    min_tile_pixels = int(settings.get("match_tile_min_pixels", 500_000))
     start_time = time.time()
+    pattern_gray = None
     while (page1 is None or page1.running) and time.time() - start_time < wait_time:
         try:
-            pattern_img = load_image(pattern_img_str)
+            if pattern_gray is None:
+                pattern_img = load_image(pattern_img_str)
+                pattern_gray = to_gray(pattern_img)
+            frame = get_screen_capture().grab()
             if search_coords and search_coords != 'Full Screen':
                 x1, y1, x2, y2, width, height = unpack_coords(search_coords).values()
-                verbose(f"Capturing screenshot in area: {search_coords}")
-                screen = pyautogui.screenshot(region=(x1, y1, width, height))
+                verbose("Using screen area: %s", search_coords)
+                screen = frame.region(x1, y1, x2, y2)
                 search_offset_x, search_offset_y = x1, y1
             else:
-                verbose("Capturing full screen screenshot...")
-                screen = pyautogui.screenshot()
+                verbose("Using full screen frame...")
+                screen = frame.array
                 search_offset_x, search_offset_y = 0, 0
-            verbose(f"Screen image captured, size: {screen.size}")
-            verbose(f"Searching for pattern with confidence={threshold}, grayscale=True...")
-            os.makedirs("./logs", exist_ok=True)
-            screen.save("./logs/pattern_a.png")
-            pattern_img.save("./logs/patter.png")
-            location = pyautogui.locate(pattern_img, screen, grayscale=True, confidence=threshold)
-            if location:
-                verbose(f"Pattern found at {location}")
+            verbose("Screen image captured, size: %dx%d", screen.shape[1], screen.shape[0])
+            verbose("Searching for pattern with confidence=%s, grayscale=True, workers=%s...", threshold, workers)
+            if is_verbose():
+                # Debug copies of what was compared; encoding PNGs on every retry is too slow otherwise
+                os.makedirs("./logs", exist_ok=True)
+                Image.fromarray(screen).save("./logs/pattern_a.png")
+                pattern_img.save("./logs/patter.png")
+            with metric_phase("match"):
+                score, location = match_pattern_tiled(to_gray(screen), pattern_gray, workers, min_tile_pixels)
+            if location and score >= threshold:
+                verbose("Pattern found at %s (score %.3f)", location, score)
                 if click_if_found:
-                    center_x = search_offset_x + location.left + location.width // 2
-                    center_y = search_offset_y + location.top + location.height // 2
-                    verbose(f"Preparing to click at center: ({center_x}, {center_y})")
-                    time.sleep(0.5)
+                    ph, pw = pattern_gray.shape[:2]
+                    center_x = search_offset_x + location[0] + pw // 2
+                    center_y = search_offset_y + location[1] + ph // 2
+                    verbose("Preparing to click at center: (%s, %s)", center_x, center_y)
+                    timed_sleep(0.5)
                     pyautogui.click(center_x, center_y)
-                    verbose(f"Clicked at pattern center: ({center_x}, {center_y})")
+                    verbose("Clicked at pattern center: (%s, %s)", center_x, center_y)
                 return True
             else:
                 if page1 and not page1.running:
                     verbose("Macro has been stopped. Exiting pattern search early.")
                     return False
-                verbose(f"Pattern not found, retrying in 1 second... (Elapsed: {time.time() - start_time:.1f}s of {wait_time}s)")
-                time.sleep(1)
+                verbose("Pattern not found (best score %.3f), retrying in 1 second... (Elapsed: %.1fs of %ss)",
+                        score, time.time() - start_time, wait_time)
+                timed_sleep(1)
 
-        except pyautogui.ImageNotFoundException:
-            verbose(f"Pattern not found (ImageNotFoundException), retrying in 1 second... (Elapsed: {time.time() - start_time:.1f}s of {wait_time}s)")
-            time.sleep(1)
         except ValueError as ve:
             error(f"ValueError during pattern search: {ve} - Possibly invalid base64 data or coordinates")
             return False
@@ -105,6 +331,66 @@ def search_for_pattern(pattern_img_str, search_coords, settings, page1=None, cli
             error(f"Unexpected error during pattern search: {type(e).__name__}: {e}\nStack trace:\n{error_trace}")
             return False
 
-    verbose(f"Pattern not found after {wait_time}s of retries")
+    verbose("Pattern not found after %ss of retries", wait_time)
     return False
 
+
+def search_for_any_pattern(patterns, search_coords, settings, page1=None, click_if_found=False, wait_time=0):
+    """
+    Search for several patterns in one screen capture per cycle.
+
+    Args:
+        patterns: List of dicts with 'image' (base64) and 'threshold'
+        search_coords: Coordinates dict or 'Full Screen'
+        settings: Application settings
+        page1: Page1 instance for checking running state
+        click_if_found: Whether to click the matched pattern
+        wait_time: Maximum time to search (seconds)
+
+    Returns:
+        Index of the first pattern (in list order) found in the same frame, or None
+    """
+    try:
+        pattern_grays = [to_gray(load_image(p["image"])) for p in patterns]
+    except ValueError as ve:
+        error(f"ValueError while loading patterns: {ve} - Possibly invalid base64 data")
+        return None
+    if search_coords and search_coords != 'Full Screen':
+        area = unpack_coords(search_coords)
+        if not area:
+            return None
+        offset_x, offset_y = area["x1"], area["y1"]
+    else:
+        area = None
+        offset_x, offset_y = 0, 0
+
+    pool = get_match_pool(resolve_match_workers(settings))
+    start_time = time.time()
+    while page1 is None or page1.running:
+        frame = get_screen_capture().grab()
+        screen = frame.region(area["x1"], area["y1"], area["x2"], area["y2"]) if area else frame.array
+        with metric_phase("match"):
+            screen_gray = to_gray(screen)
+            results = list(pool.map(lambda pattern_gray: match_pattern(screen_gray, pattern_gray), pattern_grays))
+        verbose(lambda: f"Search Any scores: {[round(score, 3) for score, _ in results]}")
+        for index, ((score, location), pattern) in enumerate(zip(results, patterns)):
+            if location is None or score < float(pattern.get("threshold", 0.7)):
+                continue
+            verbose("Pattern #%s found at %s (score %.3f)", index, location, score)
+            if click_if_found:
+                ph, pw = pattern_grays[index].shape[:2]
+                center_x = offset_x + location[0] + pw // 2
+                center_y = offset_y + location[1] + ph // 2
+                timed_sleep(0.5)
+                pyautogui.click(center_x, center_y)
+                verbose("Clicked at pattern center: (%s, %s)", center_x, center_y)
+            return index
+
+        elapsed = time.time() - start_time
+        if elapsed >= wait_time:
+            break
+        verbose("No pattern found, retrying... (Elapsed: %.1fs of %ss)", elapsed, wait_time)
+        timed_sleep(min(1, wait_time - elapsed))
+
+    verbose("None of %s patterns found after %ss", len(patterns), wait_time)
+    return None
@@ -0,0 +1,193 @@
+"""
+Shared screen capture service.
+Keeps the most recent full-screen frame as a NumPy buffer so consecutive
+consumers (pattern search, Image AI, scene change, dialogs) can reuse it
+instead of each paying for a new grab.
+
+Backends:
+  - "xshm"     : MIT-SHM grabber on Linux/X11 (see xshm_grabber.py).
+  - "pyautogui": pyautogui.screenshot (works everywhere).
+  - "auto"     : xshm when available, otherwise pyautogui.
+"""
+import time
+import threading
+import cv2
+import numpy as np
+import pyautogui
+from PIL import Image
+from .logger import verbose, info, error
+from .metrics import observe_phase
+
+
+class Frame:
+    """A full-screen RGB capture with the time it was taken."""
+
+    def __init__(self, array, timestamp):
+        self.array = array
+        self.timestamp = timestamp
+
+    @property
+    def age(self):
+        """Seconds elapsed since the frame was captured."""
+        return time.perf_counter() - self.timestamp
+
+    @property
+    def size(self):
+        """Frame size as (width, height)."""
+        return self.array.shape[1], self.array.shape[0]
+
+    def region(self, x1, y1, x2, y2):
+        """Return a zero-copy view of the area (x1, y1)-(x2, y2), clipped to the frame."""
+        height, width = self.array.shape[:2]
+        x1, x2 = max(0, int(x1)), min(width, int(x2))
+        y1, y2 = max(0, int(y1)), min(height, int(y2))
+        return self.array[y1:y2, x1:x2]
+
+    def region_image(self, x1, y1, x2, y2):
+        """Return the area (x1, y1)-(x2, y2) as a PIL Image (copies the pixels)."""
+        return Image.fromarray(self.region(x1, y1, x2, y2))
+
+
+class ScreenCapture:
+    """
+    Thread-safe full-screen grabber with per-tick frame reuse.
+
+    Consumers ask for a frame no older than `max_age` seconds; if the cached
+    frame is fresh enough it is returned as is, otherwise a new grab is made.
+    """
+
+    def __init__(self, max_age=0.05, backend="auto"):
+        """
+        Args:
+            max_age: Default maximum frame age in seconds used when a caller
+                     does not pass one. 0 forces a new grab every time.
+            backend: "auto", "xshm" or "pyautogui".
+        """
+        self.max_age = max_age
+        self._frame = None
+        self._lock = threading.Lock()
+        self._xshm = None
+        self.backend = "pyautogui"
+        if backend in ("auto", "xshm"):
+            self._open_xshm(quiet=backend == "auto")
+        self.reset_stats()
+
+    def _open_xshm(self, quiet=False):
+        """Try to switch to the MIT-SHM backend; stay on pyautogui on failure."""
+        from .xshm_grabber import XShmGrabber, XShmError
+        try:
+            self._xshm = XShmGrabber()
+            self.backend = "xshm"
+            verbose(f"Screen capture backend: xshm ({self._xshm.width}x{self._xshm.height})")
+        except (XShmError, OSError) as e:
+            self._xshm = None
+            self.backend = "pyautogui"
+            (verbose if quiet else info)(f"MIT-SHM capture unavailable ({e}), using pyautogui")
+
+    def _grab_array(self):
+        """Grab the whole screen and return it as an RGB uint8 array."""
+        if self._xshm is not None:
+            try:
+                # The shared segment is reused, so convert into a new array the frame can own
+                return cv2.cvtColor(self._xshm.grab(), cv2.COLOR_BGRA2RGB)
+            except Exception as e:
+                # Typically a resolution change; reopen once, otherwise fall back
+                error(f"MIT-SHM grab failed: {e}")
+                self._xshm.close()
+                self._open_xshm()
+                if self._xshm is not None:
+                    return cv2.cvtColor(self._xshm.grab(), cv2.COLOR_BGRA2RGB)
+        return np.asarray(pyautogui.screenshot().convert("RGB"))
+
+    def grab(self, max_age=None):
+        """
+        Return a Frame no older than `max_age` seconds.
+
+        Args:
+            max_age: Maximum accepted age in seconds (None uses the default).
+        """
+        if max_age is None:
+            max_age = self.max_age
+        with self._lock:
+            frame = self._frame
+            if frame is not None and frame.age <= max_age:
+                self.reused += 1
+                return frame
+            started = time.perf_counter()
+            array = self._grab_array()
+            elapsed = time.perf_counter() - started
+            self._frame = frame = Frame(array, time.perf_counter())
+            self.captures += 1
+            self.capture_time_total += elapsed
+            self.capture_time_max = max(self.capture_time_max, elapsed)
+        observe_phase("capture", elapsed)
+        verbose(f"Screen captured in {elapsed * 1000:.1f} ms, size: {frame.size}")
+        return frame
+
+    def region(self, coords, max_age=None):
+        """
+        Return a zero-copy view of a screen area from a fresh enough frame.
+
+        Args:
+            coords: Dict {'start': (x, y), 'end': (x, y)} or None for the full screen.
+            max_age: Maximum accepted frame age in seconds (None uses the default).
+        """
+        frame = self.grab(max_age)
+        if not coords:
+            return frame.array
+        x1, y1 = coords["start"]
+        x2, y2 = coords["end"]
+        return frame.region(x1, y1, x2, y2)
+
+    def region_image(self, coords, max_age=None):
+        """Same as region() but returns a PIL Image."""
+        return Image.fromarray(self.region(coords, max_age))
+
+    def invalidate(self):
+        """Drop the cached frame so the next request grabs a new one."""
+        with self._lock:
+            self._frame = None
+
+    def reset_stats(self):
+        """Reset capture counters."""
+        self.captures = 0
+        self.reused = 0
+        self.capture_time_total = 0.0
+        self.capture_time_max = 0.0
+
+    def stats(self):
+        """Return capture counters and latency as a dict."""
+        requests = self.captures + self.reused
+        return {
+            "backend": self.backend,
+            "captures": self.captures,
+            "reused": self.reused,
+            "reuse_ratio": self.reused / requests if requests else 0.0,
+            "capture_ms_avg": self.capture_time_total / self.captures * 1000 if self.captures else 0.0,
+            "capture_ms_max": self.capture_time_max * 1000,
+        }
+
+    def format_stats(self):
+        """Return capture counters as a single log line."""
+        s = self.stats()
+        return (f"Screen capture ({s['backend']}): {s['captures']} grabs, {s['reused']} reused "
+                f"({s['reuse_ratio']:.0%}), avg {s['capture_ms_avg']:.1f} ms, max {s['capture_ms_max']:.1f} ms")
+
+
+# Global capture instance (will be initialized with settings)
+_capture = None
+
+
+def init_screen_capture(max_age=0.05, backend="auto"):
+    """Initialize the global screen capture service."""
+    global _capture
+    _capture = ScreenCapture(max_age=max_age, backend=backend)
+    return _capture
+
+
+def get_screen_capture():
+    """Get the global screen capture instance."""
+    global _capture
+    if _capture is None:
+        _capture = ScreenCapture()
+    return _capture
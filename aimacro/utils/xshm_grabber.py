@@ -0,0 +1,263 @@
+"""
+MIT-SHM (XShm) screen grabber for X11.
+Grabs the root window into a reused shared-memory segment through libX11/libXext
+(ctypes only, no extra Python packages) and exposes it as a NumPy array.
+"""
+import os
+import sys
+import ctypes
+import ctypes.util
+import threading
+import contextlib
+from types import SimpleNamespace
+import numpy as np
+
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFFFFFFFFFF if ctypes.sizeof(ctypes.c_ulong) == 8 else 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XShmError(Exception):
+    """Raised when the MIT-SHM grabber cannot be set up or a grab fails."""
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Only the leading fields are read; the function table that follows is left opaque.
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+# The handler is process-wide (Tk has its own), so it is only installed around SHM calls
+_trap_lock = threading.Lock()
+_trap_display = None
+_previous_handler = None
+_x_errors = []
+
+
+@_X_ERROR_HANDLER
+def _on_x_error(display, event):
+    # The default Xlib handler terminates the process; record errors on the grabber's display
+    # instead and hand everything else (e.g. Tk's own connection) to the previous handler.
+    if display == _trap_display:
+        _x_errors.append(event.contents.error_code)
+        return 0
+    if _previous_handler:
+        return _X_ERROR_HANDLER(_previous_handler)(display, event)
+    return 0
+
+
+_on_x_error_ptr = ctypes.cast(_on_x_error, ctypes.c_void_p)
+
+
+def _load(name):
+    path = ctypes.util.find_library(name)
+    if not path:
+        raise XShmError(f"lib{name} not found")
+    return ctypes.CDLL(path)
+
+
+def _bind(lib, name, restype, argtypes):
+    func = getattr(lib, name)
+    func.restype = restype
+    func.argtypes = argtypes
+    return func
+
+
+class XShmGrabber:
+    """
+    Full-screen grabber backed by a single MIT-SHM segment.
+
+    `grab()` refreshes the segment in place and returns a BGRA view of it;
+    the view is overwritten by the next grab, so copy it if it must outlive
+    that call.
+    """
+
+    def __init__(self, display_name=None):
+        """
+        Args:
+            display_name: X display to open (None uses $DISPLAY).
+
+        Raises:
+            XShmError: If X11, the MIT-SHM extension or a 32 bpp visual is unavailable.
+        """
+        if not sys.platform.startswith("linux"):
+            raise XShmError("MIT-SHM grabbing is only available on Linux")
+        if not (display_name or os.environ.get("DISPLAY")):
+            raise XShmError("DISPLAY is not set")
+
+        self._display = None
+        self._image = None
+        self._shminfo = _XShmSegmentInfo(shmid=-1)
+        self._attached = False
+        self._setup_libs()
+
+        self._display = self._x.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self._display:
+            raise XShmError(f"Cannot open display {display_name or os.environ.get('DISPLAY')}")
+        try:
+            self._setup_image()
+        except Exception:
+            self.close()
+            raise
+
+    def _setup_libs(self):
+        x = _load("X11")
+        ext = _load("Xext")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._x = SimpleNamespace()
+        vp, i, ui, ul = ctypes.c_void_p, ctypes.c_int, ctypes.c_uint, ctypes.c_ulong
+        seg = ctypes.POINTER(_XShmSegmentInfo)
+        img = ctypes.POINTER(_XImage)
+        self._x.XOpenDisplay = _bind(x, "XOpenDisplay", vp, [ctypes.c_char_p])
+        self._x.XCloseDisplay = _bind(x, "XCloseDisplay", i, [vp])
+        self._x.XDefaultScreen = _bind(x, "XDefaultScreen", i, [vp])
+        self._x.XRootWindow = _bind(x, "XRootWindow", ul, [vp, i])
+        self._x.XDefaultVisual = _bind(x, "XDefaultVisual", vp, [vp, i])
+        self._x.XDefaultDepth = _bind(x, "XDefaultDepth", i, [vp, i])
+        self._x.XDisplayWidth = _bind(x, "XDisplayWidth", i, [vp, i])
+        self._x.XDisplayHeight = _bind(x, "XDisplayHeight", i, [vp, i])
+        self._x.XSync = _bind(x, "XSync", i, [vp, i])
+        self._x.XDestroyImage = _bind(x, "XDestroyImage", i, [img])
+        self._x.XSetErrorHandler = _bind(x, "XSetErrorHandler", vp, [vp])
+        self._x.XShmQueryExtension = _bind(ext, "XShmQueryExtension", i, [vp])
+        self._x.XShmCreateImage = _bind(ext, "XShmCreateImage", img, [vp, vp, ui, i, vp, seg, ui, ui])
+        self._x.XShmAttach = _bind(ext, "XShmAttach", i, [vp, seg])
+        self._x.XShmDetach = _bind(ext, "XShmDetach", i, [vp, seg])
+        self._x.XShmGetImage = _bind(ext, "XShmGetImage", i, [vp, ul, img, i, i, ul])
+        self._shmget = _bind(self._libc, "shmget", i, [i, ctypes.c_size_t, i])
+        self._shmat = _bind(self._libc, "shmat", vp, [i, vp, i])
+        self._shmdt = _bind(self._libc, "shmdt", i, [vp])
+        self._shmctl = _bind(self._libc, "shmctl", i, [i, i, vp])
+
+    @contextlib.contextmanager
+    def _trap_errors(self):
+        """Collect X errors on this display while the block runs; yields the list they land in."""
+        global _trap_display, _previous_handler
+        with _trap_lock:
+            del _x_errors[:]
+            _trap_display = self._display
+            _previous_handler = self._x.XSetErrorHandler(_on_x_error_ptr)
+            try:
+                yield _x_errors
+            finally:
+                self._x.XSetErrorHandler(_previous_handler)
+                _previous_handler = None
+                _trap_display = None
+
+    def _setup_image(self):
+        x, d = self._x, self._display
+        if not x.XShmQueryExtension(d):
+            raise XShmError("MIT-SHM extension not available on this display")
+        screen = x.XDefaultScreen(d)
+        self._root = x.XRootWindow(d, screen)
+        self.width = x.XDisplayWidth(d, screen)
+        self.height = x.XDisplayHeight(d, screen)
+        depth = x.XDefaultDepth(d, screen)
+
+        image = x.XShmCreateImage(d, x.XDefaultVisual(d, screen), depth, ZPIXMAP, None,
+                                  ctypes.byref(self._shminfo), self.width, self.height)
+        if not image:
+            raise XShmError("XShmCreateImage failed")
+        self._image = image
+        info = image.contents
+        if info.bits_per_pixel != 32:
+            raise XShmError(f"Unsupported pixel format: {info.bits_per_pixel} bpp")
+
+        size = info.bytes_per_line * info.height
+        shmid = self._shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if shmid < 0:
+            raise XShmError(f"shmget failed: {os.strerror(ctypes.get_errno())}")
+        self._shminfo.shmid = shmid
+        addr = self._shmat(shmid, None, 0)
+        if addr is None or addr == ctypes.c_void_p(-1).value:
+            raise XShmError(f"shmat failed: {os.strerror(ctypes.get_errno())}")
+        self._shminfo.shmaddr = addr
+        self._shminfo.readOnly = 0
+        info.data = addr
+
+        with self._trap_errors() as errors:
+            x.XShmAttach(d, ctypes.byref(self._shminfo))
+            x.XSync(d, 0)
+            failed = list(errors)
+        if failed:
+            raise XShmError(f"XShmAttach failed (X error {failed[-1]}), e.g. a remote display")
+        self._attached = True
+        # The segment stays alive until both sides detach
+        self._shmctl(shmid, IPC_RMID, None)
+
+        buffer = (ctypes.c_ubyte * size).from_address(addr)
+        self._array = np.ctypeslib.as_array(buffer).reshape(
+            info.height, info.bytes_per_line // 4, 4)[:, :info.width]
+
+    def grab(self):
+        """Grab the whole screen into the shared segment and return its BGRA view."""
+        with self._trap_errors() as errors:
+            ok = self._x.XShmGetImage(self._display, self._root, self._image, 0, 0, ALL_PLANES) and not errors
+        if not ok:
+            raise XShmError("XShmGetImage failed")
+        return self._array
+
+    def close(self):
+        """Detach and release the shared segment and the display connection."""
+        if self._display and self._attached:
+            self._x.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._x.XSync(self._display, 0)
+            self._attached = False
+        if self._image:
+            self._x.XDestroyImage(self._image)
+            self._image = None
+        if self._shminfo.shmaddr:
+            self._shmdt(self._shminfo.shmaddr)
+            self._shminfo.shmaddr = None
+        if self._shminfo.shmid >= 0:
+            # No-op when already marked for removal after attaching
+            self._shmctl(self._shminfo.shmid, IPC_RMID, None)
+            self._shminfo.shmid = -1
+        if self._display:
+            self._x.XCloseDisplay(self._display)
+            self._display = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
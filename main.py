@@ -7,6 +7,7 @@ from aimacro.ui.pages.page2 import Page2
 
 from aimacro.config.settings import load_api_settings
 from aimacro.utils.logger import init_logger
+from aimacro.utils.screen_capture import init_screen_capture
 
 class MainApplication(tk.Tk):
     """Main application class for the macro automation tool."""
@@ -14,7 +15,9 @@ class MainApplication(tk.Tk):
         super().__init__()
         self.settings = load_api_settings()
         # Initialize logger with verbose mode from settings
-        init_logger(verbose=self.settings.get("verbose_mode", False))
+        init_logger(verbose=self.settings.get("verbose_mode", False), settings=self.settings)
+        init_screen_capture(max_age=self.settings.get("capture_max_age_ms", 50) / 1000,
+                            backend=self.settings.get("capture_backend", "auto"))
         self.title("aimacro")
 
         # Set up the menu bar
@@ -0,0 +1,53 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from aimacro.services.http_client import ProviderClient
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    status = 429
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(self.status)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def status_server():
+    def start(status):
+        handler = type("Handler", (_StatusHandler,), {"status": status})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/"
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rate_limited_responses_do_not_open_the_circuit(status_server):
+    url = status_server(429)
+    client = ProviderClient("test", max_retries=2, failure_threshold=2, reset_timeout=60)
+    for _ in range(5):
+        assert client.get(url, timeout=5).status_code == 429
+    assert client.breaker.state == "closed"
+    assert client.breaker.rejected == 0
+    assert client.stats()["retries"] == 10
+
+
+def test_server_errors_open_the_circuit(status_server):
+    url = status_server(503)
+    client = ProviderClient("test", max_retries=0, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        assert client.get(url, timeout=5).status_code == 503
+    assert client.breaker.state == "open"
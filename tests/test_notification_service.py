@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from aimacro.scripts.api_stub_server import start_stub_server
+from aimacro.services.http_client import ProviderClient
+from aimacro.services.notification_service import NotificationDispatcher
+
+
+@pytest.fixture
+def stub():
+    # Slow enough that the first message is still in flight while the others are submitted
+    server, state = start_stub_server(port=0, latency_ms=300)
+    yield f"http://127.0.0.1:{server.server_port}/1/messages.json", state
+    server.shutdown()
+    server.server_close()
+
+
+def params(message):
+    return {"token": "app-token", "user": "user-key", "message": message, "priority": 0}
+
+
+def test_dispatcher_coalesces_bounds_and_delivers(stub):
+    url, state = stub
+    dispatcher = NotificationDispatcher(ProviderClient("pushover-test", max_retries=0), url=url,
+                                        queue_size=2, dedup_window=30)
+
+    assert dispatcher.submit("first", params("first")) == "queued"
+    time.sleep(0.1)  # the sender thread has taken "first"; the queue is empty again
+    assert [dispatcher.submit("repeat", params("repeat")) for _ in range(3)] == ["queued", "coalesced", "coalesced"]
+    assert dispatcher.submit("other", params("other")) == "queued"
+    assert dispatcher.submit("overflow", params("overflow")) == "dropped"
+
+    assert dispatcher.flush(timeout=10)
+    assert [fields["message"] for fields in state.notifications] == ["first", "repeat (x3)", "other"]
+    stats = dispatcher.stats()
+    assert (stats["sent"], stats["failed"], stats["coalesced"], stats["dropped"]) == (3, 0, 2, 1)
+
+    # Already delivered: a duplicate inside the window is dropped instead of sent again
+    assert dispatcher.submit("repeat", params("repeat")) == "coalesced"
+    assert dispatcher.flush(timeout=10)
+    assert len(state.notifications) == 3
+
+
+def test_dispatcher_without_dedup_sends_every_message(stub):
+    url, state = stub
+    dispatcher = NotificationDispatcher(ProviderClient("pushover-test", max_retries=0), url=url, queue_size=10)
+    for _ in range(3):
+        assert dispatcher.submit("test", params("test"), dedup=False) == "queued"
+    assert dispatcher.flush(timeout=10)
+    assert [fields["message"] for fields in state.notifications] == ["test"] * 3